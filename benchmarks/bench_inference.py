@@ -0,0 +1,237 @@
+"""Times score/classify, per sample and per batch, for every logical op,
+aggregation strat and implication combination (or the subset given by
+--logical-ands, --logical-ors, --aggregations, --implications) over
+synthetic systems, and writes results as JSON. Given a baseline results
+file, also reports (and exits non-zero on) regressions.
+
+Usage (from repo root):
+    PYTHONPATH=. python benchmarks/bench_inference.py --out results.json
+    PYTHONPATH=. python benchmarks/bench_inference.py --out new.json \
+        --baseline results.json
+    PYTHONPATH=. python benchmarks/bench_inference.py --out hamacher.json \
+        --logical-ands hamacher --logical-ors hamacher --implications prod
+"""
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+import synthetic
+from synthetic import (AGGREGATION_STRATS, IMPLICATIONS, LOGICAL_AND_STRATS,
+                       LOGICAL_OR_STRATS)
+from zadeh.error import UndefinedMappingError
+from zadeh.inference_engine import DEBUG_MODE, FAST_MODE, InferenceEngine
+from zadeh.system import FuzzyRuleBasedSystem
+
+RULE_BASE_KINDS = ("cnf", "conjunctive")
+TIMING_KEYS = ("score_per_sample_s", "classify_per_sample_s",
+               "score_batch_s", "classify_batch_s")
+CONFIG_KEYS = ("rule_base_kind", "num_features", "num_mfs", "num_rules",
+               "num_classes", "num_samples", "logical_and", "logical_or",
+               "aggregation", "implication", "mode")
+# for baseline results from before a config key was added
+CONFIG_KEY_DEFAULTS = {"implication": "prod"}
+
+
+def parse_int_list(str_):
+    return [int(val) for val in str_.split(",")]
+
+
+def parse_name_list(str_, names):
+    """Comma separated subset of names (keys of one of the strat tables)."""
+    vals = str_.split(",")
+    unknown_vals = [val for val in vals if val not in names]
+    if len(unknown_vals) > 0:
+        raise argparse.ArgumentTypeError(
+            f"unknown: {','.join(unknown_vals)} (known: {','.join(names)})")
+    return vals
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--features", type=parse_int_list, default=[4])
+    parser.add_argument("--mfs", type=parse_int_list, default=[5])
+    parser.add_argument("--rules", type=parse_int_list, default=[100])
+    parser.add_argument("--classes", type=parse_int_list, default=[3])
+    parser.add_argument("--samples", type=parse_int_list, default=[1000])
+    parser.add_argument("--kinds",
+                        default=",".join(RULE_BASE_KINDS),
+                        help="comma separated rule base kinds")
+    for (arg_name, names) in (("--logical-ands", LOGICAL_AND_STRATS),
+                              ("--logical-ors", LOGICAL_OR_STRATS),
+                              ("--aggregations", AGGREGATION_STRATS),
+                              ("--implications", IMPLICATIONS)):
+        parser.add_argument(arg_name,
+                            type=lambda str_, names=names: parse_name_list(
+                                str_, list(names)),
+                            default=list(names),
+                            help="comma separated names, default all")
+    parser.add_argument("--mode",
+                        choices=(DEBUG_MODE, FAST_MODE),
+                        default=DEBUG_MODE)
+    parser.add_argument("--per-sample-limit",
+                        type=int,
+                        default=200,
+                        help="max num samples timed one at a time")
+    parser.add_argument("--repeats",
+                        type=int,
+                        default=3,
+                        help="best of this many runs is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="output JSON path")
+    parser.add_argument("--baseline", help="baseline JSON path to compare to")
+    parser.add_argument("--tolerance",
+                        type=float,
+                        default=0.2,
+                        help="allowed fractional slowdown vs baseline")
+    return parser.parse_args()
+
+
+def best_time(func, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def classify_all(system, input_mat):
+    for input_vec in input_mat:
+        try:
+            system.classify(input_vec)
+        except UndefinedMappingError:
+            pass
+
+
+def bench_config(config, repeats, per_sample_limit, seed):
+    rng = np.random.default_rng(seed)
+    ling_vars = synthetic.make_ling_vars(config["num_features"],
+                                         config["num_mfs"], rng)
+    class_labels = synthetic.make_class_labels(config["num_classes"])
+    rule_base = synthetic.make_rule_base(config["rule_base_kind"], ling_vars,
+                                         config["num_rules"], class_labels,
+                                         rng)
+    input_mat = synthetic.make_input_mat(config["num_samples"],
+                                         config["num_features"], rng)
+    inference_engine = InferenceEngine(
+        class_labels,
+        LOGICAL_AND_STRATS[config["logical_and"]],
+        LOGICAL_OR_STRATS[config["logical_or"]],
+        AGGREGATION_STRATS[config["aggregation"]](
+            IMPLICATIONS[config["implication"]]),
+        mode=config["mode"])
+    system = FuzzyRuleBasedSystem(inference_engine, ling_vars, rule_base)
+    # warm up (compiles rule base + builds activation index)
+    system.score(input_mat[0])
+    system.score_batch(input_mat[:1])
+
+    per_sample_input_mat = input_mat[:per_sample_limit]
+    num_per_sample = len(per_sample_input_mat)
+    score_time = best_time(
+        lambda: [system.score(input_vec) for input_vec in per_sample_input_mat],
+        repeats)
+    classify_time = best_time(
+        lambda: classify_all(system, per_sample_input_mat), repeats)
+    score_batch_time = best_time(lambda: system.score_batch(input_mat),
+                                 repeats)
+    classify_batch_time = best_time(lambda: system.classify_batch(input_mat),
+                                    repeats)
+    return dict(config,
+                score_per_sample_s=score_time / num_per_sample,
+                classify_per_sample_s=classify_time / num_per_sample,
+                score_batch_s=score_batch_time,
+                classify_batch_s=classify_batch_time)
+
+
+def make_configs(args):
+    kinds = args.kinds.split(",")
+    for (kind, num_features, num_mfs, num_rules, num_classes, num_samples,
+         logical_and, logical_or, aggregation_name,
+         implication) in itertools.product(kinds, args.features, args.mfs,
+                                           args.rules, args.classes,
+                                           args.samples, args.logical_ands,
+                                           args.logical_ors, args.aggregations,
+                                           args.implications):
+        yield {
+            "rule_base_kind": kind,
+            "num_features": num_features,
+            "num_mfs": num_mfs,
+            "num_rules": num_rules,
+            "num_classes": num_classes,
+            "num_samples": num_samples,
+            "logical_and": logical_and,
+            "logical_or": logical_or,
+            "aggregation": aggregation_name,
+            "implication": implication,
+            "mode": args.mode
+        }
+
+
+def config_key(result):
+    return tuple([
+        result.get(key, CONFIG_KEY_DEFAULTS.get(key)) for key in CONFIG_KEYS
+    ])
+
+
+def compare_to_baseline(results, baseline_results, tolerance):
+    """Prints per-timing ratios new/baseline, returns list of regressions."""
+    baseline_by_key = {
+        config_key(result): result
+        for result in baseline_results
+    }
+    regressions = []
+    for result in results:
+        baseline = baseline_by_key.get(config_key(result))
+        if baseline is None:
+            continue
+        for timing_key in TIMING_KEYS:
+            ratio = result[timing_key] / baseline[timing_key]
+            if ratio > (1 + tolerance):
+                regressions.append((config_key(result), timing_key, ratio))
+    return regressions
+
+
+def main():
+    args = parse_args()
+    results = []
+    for config in make_configs(args):
+        result = bench_config(config, args.repeats, args.per_sample_limit,
+                              args.seed)
+        results.append(result)
+        print(" ".join([f"{key}={result[key]}" for key in CONFIG_KEYS]) +
+              " | " + " ".join(
+                  [f"{key}={result[key]:.3e}" for key in TIMING_KEYS]),
+              flush=True)
+
+    output = {
+        "meta": {
+            "python": sys.version,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeats": args.repeats
+        },
+        "results": results
+    }
+    with open(args.out, "w") as fp:
+        json.dump(output, fp, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline, "r") as fp:
+            baseline_results = json.load(fp)["results"]
+        regressions = compare_to_baseline(results, baseline_results,
+                                          args.tolerance)
+        for (key, timing_key, ratio) in regressions:
+            print(f"REGRESSION {timing_key} x{ratio:.2f}: "
+                  f"{dict(zip(CONFIG_KEYS, key))}")
+        if len(regressions) > 0:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
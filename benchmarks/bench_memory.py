@@ -0,0 +1,100 @@
+"""Measures memory per rule of synthetic rule bases, as built (dict
+consequents, one antecedent object per rule) and after
+FuzzyRuleBase.compact(), using tracemalloc. Ling vars are not counted.
+
+Usage (from repo root):
+    PYTHONPATH=. python benchmarks/bench_memory.py
+    PYTHONPATH=. python benchmarks/bench_memory.py --rules 100000 --mfs 5,9
+"""
+import argparse
+import gc
+import itertools
+import json
+import tracemalloc
+
+import numpy as np
+
+import synthetic
+from bench_inference import parse_int_list
+
+RULE_BASE_KINDS = ("cnf", "conjunctive")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--features", type=parse_int_list, default=[10])
+    parser.add_argument("--mfs", type=parse_int_list, default=[5])
+    parser.add_argument("--rules", type=parse_int_list, default=[10000])
+    parser.add_argument("--classes", type=parse_int_list, default=[3])
+    parser.add_argument("--kinds",
+                        default=",".join(RULE_BASE_KINDS),
+                        help="comma separated rule base kinds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="optional output JSON path")
+    return parser.parse_args()
+
+
+def measure_retained_bytes(build):
+    """Returns (result of build(), bytes allocated by build() that are still
+    alive once it returns)."""
+    gc.collect()
+    tracemalloc.start()
+    start_bytes = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    retained_bytes = tracemalloc.get_traced_memory()[0] - start_bytes
+    tracemalloc.stop()
+    return (result, retained_bytes)
+
+
+def bench_config(kind, num_features, num_mfs, num_rules, num_classes, seed):
+    ling_vars = synthetic.make_ling_vars(num_features, num_mfs,
+                                         np.random.default_rng(seed))
+    class_labels = synthetic.make_class_labels(num_classes)
+
+    def build_rule_base():
+        return synthetic.make_rule_base(kind, ling_vars, num_rules,
+                                        class_labels,
+                                        np.random.default_rng(seed))
+
+    (rule_base, plain_bytes) = measure_retained_bytes(build_rule_base)
+    del rule_base
+    # built and compacted in one go so shared objects are counted
+    (compact_rule_base, compact_bytes) = measure_retained_bytes(
+        lambda: build_rule_base().compact(class_labels))
+    return {
+        "rule_base_kind": kind,
+        "num_features": num_features,
+        "num_mfs": num_mfs,
+        "num_rules": num_rules,
+        "num_classes": num_classes,
+        "num_distinct_antecedents":
+        len({rule.antecedent
+             for rule in compact_rule_base}),
+        "plain_bytes_per_rule": plain_bytes / num_rules,
+        "compact_bytes_per_rule": compact_bytes / num_rules
+    }
+
+
+def main():
+    args = parse_args()
+    results = []
+    for (kind, num_features, num_mfs, num_rules,
+         num_classes) in itertools.product(args.kinds.split(","),
+                                           args.features, args.mfs,
+                                           args.rules, args.classes):
+        result = bench_config(kind, num_features, num_mfs, num_rules,
+                              num_classes, args.seed)
+        results.append(result)
+        print(" ".join([f"{key}={val}" for (key, val) in result.items()
+                        if not key.endswith("_per_rule")]) +
+              f" | plain={result['plain_bytes_per_rule']:.0f} B/rule"
+              f" compact={result['compact_bytes_per_rule']:.0f} B/rule",
+              flush=True)
+    if args.out is not None:
+        with open(args.out, "w") as fp:
+            json.dump({"results": results}, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Measures startup cost as seen by a fresh process per job: time to import
+zadeh, to import the classes needed for inference, to build a synthetic
+system and to classify one input, each in a new interpreter and repeated.
+
+Usage (from repo root):
+    PYTHONPATH=. python benchmarks/bench_startup.py
+    PYTHONPATH=. python benchmarks/bench_startup.py --repeats 20 --rules 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# run by each child interpreter, timing starts before anything is imported
+_CHILD_CODE = """
+import time
+start = time.perf_counter()
+import zadeh
+imported_zadeh = time.perf_counter()
+from zadeh import FAST_MODE, FuzzyRuleBasedSystem, InferenceEngine
+from zadeh import MaximumAggregation, logical_and_min, logical_or_max
+imported_api = time.perf_counter()
+import numpy as np
+import synthetic
+rng = np.random.default_rng({seed})
+ling_vars = synthetic.make_ling_vars({num_features}, {num_mfs}, rng)
+class_labels = synthetic.make_class_labels({num_classes})
+rule_base = synthetic.make_rule_base("cnf", ling_vars, {num_rules},
+                                     class_labels, rng)
+system = FuzzyRuleBasedSystem(
+    InferenceEngine(class_labels, logical_and_min, logical_or_max,
+                    MaximumAggregation(), mode=FAST_MODE), ling_vars,
+    rule_base)
+built = time.perf_counter()
+try:
+    system.classify(rng.random({num_features}))
+except zadeh.UndefinedMappingError:
+    pass
+classified = time.perf_counter()
+print(json.dumps({{
+    "import_zadeh_s": imported_zadeh - start,
+    "import_api_s": imported_api - imported_zadeh,
+    "build_system_s": built - imported_api,
+    "first_classify_s": classified - built,
+    "total_s": classified - start
+}}))
+"""
+TIMING_KEYS = ("import_zadeh_s", "import_api_s", "build_system_s",
+               "first_classify_s", "total_s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--features", type=int, default=4)
+    parser.add_argument("--mfs", type=int, default=5)
+    parser.add_argument("--rules", type=int, default=100)
+    parser.add_argument("--classes", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="optional output JSON path")
+    return parser.parse_args()
+
+
+def run_child(args):
+    code = "import json\n" + _CHILD_CODE.format(seed=args.seed,
+                                                  num_features=args.features,
+                                                  num_mfs=args.mfs,
+                                                  num_rules=args.rules,
+                                                  num_classes=args.classes)
+    env = dict(os.environ)
+    benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+    repo_dir = os.path.dirname(benchmarks_dir)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [repo_dir, benchmarks_dir] +
+        ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+    output = subprocess.run([sys.executable, "-c", code],
+                            env=env,
+                            check=True,
+                            stdout=subprocess.PIPE,
+                            universal_newlines=True).stdout
+    return json.loads(output)
+
+
+def main():
+    args = parse_args()
+    runs = [run_child(args) for _ in range(args.repeats)]
+    result = {
+        "num_features": args.features,
+        "num_mfs": args.mfs,
+        "num_rules": args.rules,
+        "num_classes": args.classes,
+        "repeats": args.repeats
+    }
+    for key in TIMING_KEYS:
+        result[key] = statistics.median([run[key] for run in runs])
+    print(" ".join([
+        f"{key}={result[key] * 1e3:.1f}ms" for key in TIMING_KEYS
+    ]) + f" (median of {args.repeats})")
+    if args.out is not None:
+        with open(args.out, "w") as fp:
+            json.dump({"result": result, "runs": runs}, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
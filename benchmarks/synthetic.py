@@ -0,0 +1,133 @@
+"""Synthetic ling vars, rule bases and datasets for benchmarking, plus the
+named logical ops / aggregation strats / implications benchmarked."""
+import numpy as np
+
+from zadeh import aggregation, logical_ops
+from zadeh.antecedent import UNSPECIFIED, CNFAntecedent, ConjunctiveAntecedent
+from zadeh.domain import Domain
+from zadeh.linguistic_var import LinguisticVar
+from zadeh.membership_func import (make_trapezoidal_membership_func,
+                                   make_triangular_membership_func)
+from zadeh.rule import FuzzyRule
+from zadeh.rule_base import FuzzyRuleBase
+
+DOMAIN = Domain(0.0, 1.0)
+
+LOGICAL_AND_STRATS = {
+    "min": logical_ops.logical_and_min,
+    "prod": logical_ops.logical_and_prod,
+    "lukasiewicz": logical_ops.logical_and_lukasiewicz,
+    "hamacher": logical_ops.logical_and_hamacher,
+    "drastic": logical_ops.logical_and_drastic
+}
+LOGICAL_OR_STRATS = {
+    "max": logical_ops.logical_or_max,
+    "probor": logical_ops.logical_or_probor,
+    "lukasiewicz": logical_ops.logical_or_lukasiewicz,
+    "hamacher": logical_ops.logical_or_hamacher,
+    "drastic": logical_ops.logical_or_drastic
+}
+AGGREGATION_STRATS = {
+    "max": aggregation.MaximumAggregation,
+    "bounded_sum": aggregation.BoundedSumAggregation,
+    "avg": aggregation.AvgAggregation,
+    "biased_avg": aggregation.BiasedAvgAggregation,
+    "weighted_avg": aggregation.WeightedAvgAggregation
+}
+IMPLICATIONS = {
+    "prod": aggregation.implication_prod,
+    "min": aggregation.implication_min,
+    "lukasiewicz": aggregation.implication_lukasiewicz
+}
+
+
+def make_ling_vars(num_features, num_mfs, rng, trapezoidal_frac=0.25):
+    """Uniform fuzzy partition of DOMAIN per feature; inner membership funcs
+    are trapezoidal with prob trapezoidal_frac, else triangular."""
+    assert num_mfs >= 2
+    apexes = np.linspace(DOMAIN.min, DOMAIN.max, num_mfs)
+    ling_vars = []
+    for feature_idx in range(num_features):
+        membership_funcs = []
+        for mf_idx in range(num_mfs):
+            lhs = apexes[max(mf_idx - 1, 0)]
+            apex = apexes[mf_idx]
+            rhs = apexes[min(mf_idx + 1, num_mfs - 1)]
+            name = f"x{feature_idx}_mf{mf_idx}"
+            is_inner = (0 < mf_idx < num_mfs - 1)
+            if is_inner and rng.random() < trapezoidal_frac:
+                membership_funcs.append(
+                    make_trapezoidal_membership_func(DOMAIN, lhs,
+                                                     (lhs + apex) / 2,
+                                                     (apex + rhs) / 2, rhs,
+                                                     name))
+            else:
+                membership_funcs.append(
+                    make_triangular_membership_func(DOMAIN, lhs, apex, rhs,
+                                                    name))
+        ling_vars.append(LinguisticVar(membership_funcs, f"x{feature_idx}"))
+    return ling_vars
+
+
+def make_class_labels(num_classes):
+    return tuple(range(num_classes))
+
+
+def make_consequent(class_labels, rng):
+    """Mostly one class, with small support for the others."""
+    main_class_label = class_labels[rng.integers(len(class_labels))]
+    return {
+        class_label:
+        (1.0 if class_label == main_class_label else float(rng.random() / 4))
+        for class_label in class_labels
+    }
+
+
+def make_cnf_rule_base(ling_vars, num_rules, class_labels, rng,
+                       max_active_mfs=2):
+    """Each feature uses between 1 and max_active_mfs membership funcs."""
+    rules = []
+    for _ in range(num_rules):
+        membership_func_usages = []
+        for ling_var in ling_vars:
+            num_mfs = ling_var.num_membership_funcs
+            num_active = rng.integers(1, min(max_active_mfs, num_mfs) + 1)
+            active_idxs = rng.choice(num_mfs, size=num_active, replace=False)
+            membership_func_usages.append(
+                tuple([int(idx in active_idxs) for idx in range(num_mfs)]))
+        rules.append(
+            FuzzyRule(CNFAntecedent(membership_func_usages),
+                      make_consequent(class_labels, rng)))
+    return FuzzyRuleBase(rules)
+
+
+def make_conjunctive_rule_base(ling_vars, num_rules, class_labels, rng,
+                               unspecified_prob=0.3):
+    rules = []
+    for _ in range(num_rules):
+        membership_func_idxs = [
+            (UNSPECIFIED if rng.random() < unspecified_prob else int(
+                rng.integers(ling_var.num_membership_funcs)))
+            for ling_var in ling_vars
+        ]
+        if all([idx == UNSPECIFIED for idx in membership_func_idxs]):
+            membership_func_idxs[0] = 0
+        rules.append(
+            FuzzyRule(ConjunctiveAntecedent(membership_func_idxs),
+                      make_consequent(class_labels, rng)))
+    return FuzzyRuleBase(rules)
+
+
+def make_rule_base(kind, ling_vars, num_rules, class_labels, rng):
+    if kind == "cnf":
+        return make_cnf_rule_base(ling_vars, num_rules, class_labels, rng)
+    elif kind == "conjunctive":
+        return make_conjunctive_rule_base(ling_vars, num_rules, class_labels,
+                                          rng)
+    else:
+        raise ValueError(f"Unknown rule base kind: {kind}")
+
+
+def make_input_mat(num_samples, num_features, rng):
+    return rng.uniform(DOMAIN.min, DOMAIN.max, size=(num_samples,
+                                                     num_features))
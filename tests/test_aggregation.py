@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from zadeh.aggregation import MaximumAggregation
+from zadeh.error import UndefinedMappingError
+from zadeh.inference_engine import DEBUG_MODE, FAST_MODE
+
+from .util import (AGGREGATION_STRATS, make_input_mat, make_system,
+                   param_id, parametrize_aggregation,
+                   parametrize_logical_ops)
+
+
+def _assert_score_matches_score_batch(system, input_mat):
+    score_mat = system.score_batch(input_mat)
+    assert score_mat.shape == (len(input_mat),
+                               len(system.inference_engine.class_labels))
+    for (input_vec, score_vec) in zip(input_mat, score_mat):
+        score_array = system.score(input_vec)
+        assert tuple(score_array) == system.inference_engine.class_labels
+        assert list(score_array.values()) == pytest.approx(
+            score_vec.tolist(), abs=1e-12)
+
+
+@parametrize_aggregation
+@pytest.mark.parametrize("mode", (DEBUG_MODE, FAST_MODE))
+@pytest.mark.parametrize("use_rule_activation_index", (True, False))
+def test_score_matches_score_batch(kind, aggregation_strat, implication,
+                                   mode, use_rule_activation_index):
+    system = make_system(kind,
+                         aggregation_strat=aggregation_strat(implication),
+                         mode=mode,
+                         use_rule_activation_index=use_rule_activation_index)
+    _assert_score_matches_score_batch(system, make_input_mat(60, 3))
+
+
+@parametrize_logical_ops
+@pytest.mark.parametrize("aggregation_strat",
+                         AGGREGATION_STRATS,
+                         ids=param_id)
+def test_score_matches_score_batch_per_logical_op(logical_and_strat,
+                                                  logical_or_strat,
+                                                  aggregation_strat):
+    system = make_system(logical_and_strat=logical_and_strat,
+                         logical_or_strat=logical_or_strat,
+                         aggregation_strat=aggregation_strat())
+    _assert_score_matches_score_batch(system, make_input_mat(40, 3))
+
+
+@pytest.mark.parametrize("aggregation_strat",
+                         AGGREGATION_STRATS,
+                         ids=param_id)
+def test_aggregate_vec_matches_mat(aggregation_strat):
+    rng = np.random.default_rng(0)
+    matching_degree_mat = rng.choice([0.0, 1.0, rng.random()], size=(20, 50))
+    consequent_mat = rng.choice([0.0, 1.0, rng.random()], size=(50, 3))
+    aggregation_strat = aggregation_strat()
+    score_mat = aggregation_strat.aggregate(matching_degree_mat,
+                                            consequent_mat)
+    for (matching_degree_vec, score_vec) in zip(matching_degree_mat,
+                                                score_mat):
+        assert aggregation_strat.aggregate(
+            matching_degree_vec,
+            consequent_mat).tolist() == pytest.approx(score_vec.tolist(),
+                                                      abs=1e-12)
+    assert np.all((0.0 <= score_mat) & (score_mat <= 1.0))
+
+
+def test_classify_batch_matches_classify():
+    system = make_system(aggregation_strat=MaximumAggregation(), num_rules=10)
+    input_mat = make_input_mat(100, 3)
+    labels = system.classify_batch(input_mat)
+    assert np.any(labels.mask)
+    for (input_vec, label) in zip(input_mat, labels):
+        if label is np.ma.masked:
+            with pytest.raises(UndefinedMappingError):
+                system.classify(input_vec)
+        else:
+            assert system.classify(input_vec) == label
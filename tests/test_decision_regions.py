@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from zadeh.aggregation import IMPLICATIONS, MaximumAggregation
+from zadeh.error import UndefinedMappingError
+
+from .util import (AGGREGATION_STRATS, RULE_BASE_KINDS, make_input_mat,
+                   make_system, param_id, parametrize_logical_ops)
+
+
+def _classify_or_none(classifier, input_vec):
+    try:
+        return classifier.classify(input_vec)
+    except UndefinedMappingError:
+        return None
+
+
+def _assert_matches_engine(system, input_mat):
+    index = system.build_decision_region_index()
+    score_mat = system.score_batch(input_mat)
+    np.testing.assert_array_equal(index.score_batch(input_mat), score_mat)
+    for input_vec in input_mat[:20]:
+        assert index.score(input_vec) == system.score(input_vec)
+        assert _classify_or_none(index, input_vec) == \
+            _classify_or_none(system, input_vec)
+
+
+@pytest.mark.parametrize("kind", RULE_BASE_KINDS)
+@pytest.mark.parametrize("implication", IMPLICATIONS, ids=param_id)
+def test_matches_engine_per_implication(kind, implication):
+    system = make_system(kind,
+                         aggregation_strat=MaximumAggregation(implication),
+                         num_rules=60)
+    _assert_matches_engine(system, make_input_mat(200, 3))
+
+
+@pytest.mark.parametrize("aggregation_strat", [
+    aggregation_strat for aggregation_strat in AGGREGATION_STRATS
+    if aggregation_strat is not MaximumAggregation
+], ids=param_id)
+def test_sum_based_aggregation_raises(aggregation_strat):
+    system = make_system(aggregation_strat=aggregation_strat())
+    with pytest.raises(ValueError):
+        system.build_decision_region_index()
+
+
+@parametrize_logical_ops
+def test_matches_engine_per_logical_op(logical_and_strat, logical_or_strat):
+    system = make_system(logical_and_strat=logical_and_strat,
+                         logical_or_strat=logical_or_strat,
+                         num_rules=60)
+    _assert_matches_engine(system, make_input_mat(200, 3))
+
+
+def test_cell_cache_is_bounded():
+    system = make_system(num_rules=60)
+    input_mat = make_input_mat(200, 3)
+    score_mat = system.score_batch(input_mat)
+    # room for a few cells' rule idxs only
+    index = system.build_decision_region_index(max_cell_cache_bytes=3 * 60 *
+                                               np.dtype(np.intp).itemsize)
+    for _ in range(2):
+        np.testing.assert_array_equal(index.score_batch(input_mat),
+                                      score_mat)
+    stats = index.cell_cache_stats
+    assert stats.num_bytes <= stats.max_bytes
+    assert stats.num_evictions > 0
+    assert index.num_cached_cells == stats.num_entries
@@ -0,0 +1,51 @@
+import pytest
+
+from zadeh.aggregation import MaximumAggregation
+from zadeh.error import UndefinedMappingError
+from zadeh.inference_engine import DEBUG_MODE, FAST_MODE
+
+from .util import (CLASS_LABELS, RULE_BASE_KINDS, make_input_mat,
+                   make_system, parametrize_logical_ops)
+
+
+def _calc_top_k(score_array, k):
+    # highest first, ties in class_labels order
+    return sorted(score_array.items(), key=lambda item: -item[1])[:k]
+
+
+def _classify_or_none(system, input_vec):
+    try:
+        return system.classify(input_vec)
+    except UndefinedMappingError:
+        return None
+
+
+@pytest.mark.parametrize("kind", RULE_BASE_KINDS)
+@parametrize_logical_ops
+@pytest.mark.parametrize("mode", (DEBUG_MODE, FAST_MODE))
+def test_matches_full_scoring(kind, logical_and_strat, logical_or_strat,
+                              mode):
+    system = make_system(kind,
+                         logical_and_strat=logical_and_strat,
+                         logical_or_strat=logical_or_strat,
+                         aggregation_strat=MaximumAggregation(),
+                         num_rules=60,
+                         mode=mode)
+    # scores every rule
+    full_system = make_system(kind,
+                              logical_and_strat=logical_and_strat,
+                              logical_or_strat=logical_or_strat,
+                              aggregation_strat=MaximumAggregation(),
+                              num_rules=60,
+                              mode=mode,
+                              use_rule_activation_index=False)
+    for input_vec in make_input_mat(60, 3):
+        score_array = full_system.score(input_vec)
+        for k in range(1, len(CLASS_LABELS) + 2):
+            assert list(system.score_top_k(input_vec, k).items()) == \
+                _calc_top_k(score_array, k)
+        if all([score == 0.0 for score in score_array.values()]):
+            assert _classify_or_none(system, input_vec) is None
+        else:
+            assert system.classify(input_vec) == max(score_array,
+                                                     key=score_array.get)
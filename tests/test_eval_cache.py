@@ -0,0 +1,168 @@
+import numpy as np
+import pytest
+
+from zadeh.eval_cache import CachedScorer, LRUCache
+from zadeh.rule import FuzzyRule
+from zadeh.rule_base import FuzzyRuleBase
+
+from .util import (AGGREGATION_STRATS, RULE_BASE_KINDS, make_input_mat,
+                   make_rule, make_system, param_id)
+
+
+def _make_value(val, num_elems=1):
+    # 8 bytes per elem
+    return np.full(num_elems, float(val))
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=24)
+    for key in ("a", "b", "c"):
+        cache.put(key, _make_value(0))
+    # "b" is now least recently used
+    assert cache.get("a") is not None
+    cache.put("d", _make_value(0))
+    assert cache.get("b") is None
+    assert all([cache.get(key) is not None for key in ("a", "c", "d")])
+    # then "a"
+    cache.put("e", _make_value(0, num_elems=2))
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    assert len(cache) == 2
+    stats = cache.stats
+    assert stats.num_evictions == 3
+    assert stats.num_entries == 2
+    assert stats.num_bytes == 24
+    assert stats.max_bytes == 24
+
+
+def test_lru_cache_hit_miss_stats():
+    cache = LRUCache(max_bytes=64)
+    assert cache.stats.hit_rate == 0.0
+    cache.put("a", _make_value(1))
+    assert cache.get("a")[0] == 1.0
+    assert cache.get("a")[0] == 1.0
+    assert cache.get("b") is None
+    stats = cache.stats
+    assert (stats.num_hits, stats.num_misses) == (2, 1)
+    assert stats.hit_rate == pytest.approx(2 / 3)
+
+
+def test_lru_cache_replace_and_oversized():
+    cache = LRUCache(max_bytes=16)
+    cache.put("a", _make_value(1))
+    cache.put("a", _make_value(2, num_elems=2))
+    assert cache.get("a").tolist() == [2.0, 2.0]
+    assert cache.stats.num_bytes == 16
+    # bigger than max_bytes, never stored and evicts nothing
+    cache.put("b", _make_value(3, num_elems=3))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats.num_evictions == 0
+
+
+def test_lru_cache_values_read_only():
+    cache = LRUCache(max_bytes=64)
+    value = _make_value(1)
+    cache.put("a", value)
+    with pytest.raises(ValueError):
+        cache.get("a")[0] = 2.0
+
+
+def test_lru_cache_clear():
+    cache = LRUCache(max_bytes=64)
+    cache.put("a", _make_value(1))
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats.num_bytes == 0
+    assert cache.get("a") is None
+
+
+def _assert_matches_fresh(cached_scorer, system, rule_base, input_mat):
+    expected = system.inference_engine.score_batch(system.ling_vars,
+                                                   FuzzyRuleBase(rule_base),
+                                                   input_mat)
+    np.testing.assert_allclose(cached_scorer.score_batch(rule_base),
+                               expected,
+                               rtol=0,
+                               atol=1e-12)
+    expected_labels = system.inference_engine.classify_score_mat(expected)
+    labels = cached_scorer.classify_batch(rule_base)
+    np.testing.assert_array_equal(np.ma.getmaskarray(labels),
+                                  np.ma.getmaskarray(expected_labels))
+    np.testing.assert_array_equal(labels.compressed(),
+                                  expected_labels.compressed())
+
+
+@pytest.mark.parametrize("kind", RULE_BASE_KINDS)
+@pytest.mark.parametrize("aggregation_strat",
+                         AGGREGATION_STRATS,
+                         ids=param_id)
+@pytest.mark.parametrize("max_matching_degree_bytes", (2**28, 2**12))
+def test_matches_fresh_scoring_as_rule_base_changes(
+        kind, aggregation_strat, max_matching_degree_bytes):
+    system = make_system(kind, aggregation_strat=aggregation_strat())
+    input_mat = make_input_mat(100, 3)
+    cached_scorer = CachedScorer(system.inference_engine, system.ling_vars,
+                                 input_mat, max_matching_degree_bytes)
+    rng = np.random.default_rng(1)
+    rules = list(system.rule_base)
+    _assert_matches_fresh(cached_scorer, system, rules, input_mat)
+    for _ in range(10):
+        # replace, add, remove rules, change a consequent only
+        rules[int(rng.integers(len(rules)))] = make_rule(
+            kind, system.ling_vars, rng)
+        rules.append(make_rule(kind, system.ling_vars, rng))
+        del rules[int(rng.integers(len(rules)))]
+        rule_idx = int(rng.integers(len(rules)))
+        rules[rule_idx] = FuzzyRule(
+            rules[rule_idx].antecedent,
+            make_rule(kind, system.ling_vars, rng).consequent)
+        _assert_matches_fresh(cached_scorer, system, rules, input_mat)
+
+
+def test_cache_stats():
+    system = make_system(num_rules=20)
+    input_mat = make_input_mat(50, 3)
+    cached_scorer = CachedScorer(system.inference_engine, system.ling_vars,
+                                 input_mat)
+    rules = list(system.rule_base)
+    num_antecedents = len({rule.antecedent for rule in rules})
+
+    score_mat = cached_scorer.score_batch(rules)
+    stats = cached_scorer.matching_degree_cache_stats
+    assert (stats.num_hits, stats.num_misses) == (0, len(rules))
+    assert stats.num_entries == num_antecedents
+    assert stats.num_bytes == num_antecedents * 50 * 8
+    assert (cached_scorer.score_cache_stats.num_hits,
+            cached_scorer.score_cache_stats.num_misses) == (0, 1)
+
+    # same rules: score matrix is a cache hit
+    assert cached_scorer.score_batch(FuzzyRuleBase(rules)) is score_mat
+    assert not score_mat.flags.writeable
+    assert cached_scorer.score_cache_stats.num_hits == 1
+    assert cached_scorer.matching_degree_cache_stats.num_misses == len(rules)
+
+    # one new rule: only its antecedent is evaluated
+    new_rule = make_rule("cnf", system.ling_vars, np.random.default_rng(1))
+    assert new_rule.antecedent not in {rule.antecedent for rule in rules}
+    cached_scorer.score_batch(rules[1:] + [new_rule])
+    stats = cached_scorer.matching_degree_cache_stats
+    assert stats.num_hits == len(rules) - 1
+    assert stats.num_misses == len(rules) + 1
+    assert cached_scorer.score_cache_stats.num_misses == 2
+
+    cached_scorer.clear()
+    assert cached_scorer.matching_degree_cache_stats.num_entries == 0
+    assert cached_scorer.score_cache_stats.num_entries == 0
+
+
+def test_equal_antecedents_evaluated_once():
+    system = make_system(num_rules=5)
+    input_mat = make_input_mat(50, 3)
+    cached_scorer = CachedScorer(system.inference_engine, system.ling_vars,
+                                 input_mat)
+    rules = list(system.rule_base)
+    rules += [FuzzyRule(rule.antecedent, rules[0].consequent)
+              for rule in rules]
+    _assert_matches_fresh(cached_scorer, system, rules, input_mat)
+    assert cached_scorer.matching_degree_cache_stats.num_entries == 5
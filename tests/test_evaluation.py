@@ -0,0 +1,130 @@
+import math
+
+import numpy as np
+import pytest
+
+from zadeh.evaluation import Evaluator, evaluate, evaluate_score_mat
+from zadeh.system import FuzzyRuleBasedSystem
+
+from .util import (AGGREGATION_STRATS, CLASS_LABELS, RULE_BASE_KINDS,
+                   make_input_mat, make_system, param_id)
+
+
+def _make_labels(num_samples, seed=0):
+    rng = np.random.default_rng(seed)
+    return [CLASS_LABELS[idx] for idx in rng.integers(len(CLASS_LABELS),
+                                                       size=num_samples)]
+
+
+def test_evaluate_score_mat():
+    score_mat = [
+        [0.9, 0.1, 0.0],  # a, correct
+        [0.2, 0.7, 0.0],  # a, classified as b
+        [0.0, 0.0, 0.0],  # c, undefined
+        [0.3, 0.3, 0.6]  # c, correct
+    ]
+    report = evaluate_score_mat(score_mat, ["a", "a", "c", "c"], CLASS_LABELS)
+    assert report.num_samples == 4
+    assert report.accuracy == 0.5
+    assert report.undefined_rate == 0.25
+    np.testing.assert_array_equal(report.confusion_mat,
+                                  [[1, 1, 0, 0], [0, 0, 0, 0], [0, 0, 1, 1]])
+    margins = [0.8, -0.5, 0.0, 0.3]
+    assert report.margin_stats.mean == pytest.approx(np.mean(margins))
+    assert report.margin_stats.std == pytest.approx(np.std(margins))
+    assert report.margin_stats.min == pytest.approx(-0.5)
+    assert report.margin_stats.max == pytest.approx(0.8)
+    assert report.complexity is None
+
+
+def test_evaluate_score_mat_no_samples():
+    report = evaluate_score_mat(np.empty((0, len(CLASS_LABELS))), [],
+                                CLASS_LABELS)
+    assert report.num_samples == 0
+    assert math.isnan(report.accuracy)
+    assert math.isnan(report.undefined_rate)
+    assert math.isnan(report.margin_stats.mean)
+    np.testing.assert_array_equal(
+        report.confusion_mat,
+        np.zeros((len(CLASS_LABELS), len(CLASS_LABELS) + 1)))
+
+
+def test_unknown_label_raises():
+    with pytest.raises(ValueError):
+        evaluate_score_mat([[0.5, 0.2, 0.1]], ["d"], CLASS_LABELS)
+
+
+@pytest.mark.parametrize("kind", RULE_BASE_KINDS)
+@pytest.mark.parametrize("aggregation_strat",
+                         AGGREGATION_STRATS,
+                         ids=param_id)
+def test_matches_classify_batch(kind, aggregation_strat):
+    # few rules, so some samples have undefined mappings
+    system = make_system(kind,
+                         aggregation_strat=aggregation_strat(),
+                         num_rules=10)
+    input_mat = make_input_mat(300, 3)
+    labels = _make_labels(300)
+    report = system.evaluate(input_mat, labels)
+
+    predicted = system.classify_batch(input_mat)
+    is_undefined = np.ma.getmaskarray(predicted)
+    is_correct = ~is_undefined & (predicted.data == np.array(labels))
+    assert report.num_samples == 300
+    assert report.accuracy == pytest.approx(np.mean(is_correct))
+    assert report.undefined_rate == pytest.approx(np.mean(is_undefined))
+    assert 0 < report.undefined_rate < 1
+    for (true_idx, true_label) in enumerate(CLASS_LABELS):
+        is_true = (np.array(labels) == true_label)
+        for (predicted_idx, predicted_label) in enumerate(CLASS_LABELS):
+            assert report.confusion_mat[true_idx, predicted_idx] == \
+                np.count_nonzero(is_true & ~is_undefined
+                                 & (predicted.data == predicted_label))
+        assert report.confusion_mat[true_idx, -1] == \
+            np.count_nonzero(is_true & is_undefined)
+
+    # margins from score_batch()
+    score_mat = system.score_batch(input_mat)
+    label_idxs = [CLASS_LABELS.index(label) for label in labels]
+    margins = [
+        scores[label_idx] - max(
+            [score for (idx, score) in enumerate(scores) if idx != label_idx])
+        for (scores, label_idx) in zip(score_mat.tolist(), label_idxs)
+    ]
+    assert report.margin_stats.mean == pytest.approx(np.mean(margins))
+    assert report.margin_stats.std == pytest.approx(np.std(margins))
+    assert report.margin_stats.min == pytest.approx(np.min(margins))
+    assert report.margin_stats.max == pytest.approx(np.max(margins))
+
+
+@pytest.mark.parametrize("kind", RULE_BASE_KINDS)
+def test_complexity(kind):
+    system = make_system(kind)
+    report = system.evaluate(make_input_mat(50, 3), _make_labels(50))
+    if kind == "cnf":
+        assert report.complexity == system.calc_complexity()
+    else:
+        assert report.complexity is None
+
+
+def test_evaluator_reuse_matches_evaluate():
+    systems = [make_system(seed=seed) for seed in range(3)]
+    input_mat = make_input_mat(200, 3)
+    labels = _make_labels(200)
+    evaluator = Evaluator(systems[0].inference_engine, systems[0].ling_vars,
+                          input_mat, labels)
+    for system in systems:
+        # same ling vars for every system, only rule bases differ
+        system = FuzzyRuleBasedSystem(system.inference_engine,
+                                      systems[0].ling_vars, system.rule_base)
+        expected = evaluate(system, input_mat, labels)
+        compiled_rule_base = system.rule_base.compile(system.ling_vars,
+                                                      CLASS_LABELS)
+        for rule_base in (system.rule_base, compiled_rule_base):
+            report = evaluator.evaluate(rule_base)
+            assert report.accuracy == expected.accuracy
+            assert report.undefined_rate == expected.undefined_rate
+            np.testing.assert_array_equal(report.confusion_mat,
+                                          expected.confusion_mat)
+            assert report.margin_stats == expected.margin_stats
+            assert report.complexity == expected.complexity
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from zadeh.aggregation import MaximumAggregation
+from zadeh.incremental import IncrementalScorer
+from zadeh.rule_base import FuzzyRuleBase
+
+from .util import (make_input_mat, make_rule, make_system,
+                   parametrize_aggregation)
+
+
+def _score_fresh(system, rules, input_mat):
+    return system.inference_engine.score_batch(system.ling_vars,
+                                               FuzzyRuleBase(rules),
+                                               input_mat)
+
+
+@parametrize_aggregation
+def test_matches_fresh_score(kind, aggregation_strat, implication):
+    system = make_system(kind,
+                         aggregation_strat=aggregation_strat(implication),
+                         num_rules=20)
+    input_mat = make_input_mat(100, 3)
+    rng = np.random.default_rng(1)
+    rules = list(system.rule_base)
+    incremental_scorer = IncrementalScorer(system.inference_engine,
+                                           system.ling_vars, rules[:10],
+                                           input_mat)
+    expected_rules = rules[:10]
+    for step in range(40):
+        op = step % 4
+        if op == 0 or len(expected_rules) == 0:
+            rule = make_rule(kind, system.ling_vars, rng)
+            assert incremental_scorer.add_rule(rule) == len(expected_rules)
+            expected_rules.append(rule)
+        elif op == 1:
+            rule_idx = int(rng.integers(len(expected_rules)))
+            assert incremental_scorer.remove_rule(rule_idx) is \
+                expected_rules.pop(rule_idx)
+        else:
+            rule_idx = int(rng.integers(len(expected_rules)))
+            rule = rules[int(rng.integers(len(rules)))]
+            assert incremental_scorer.replace_rule(rule_idx, rule) is \
+                expected_rules[rule_idx]
+            expected_rules[rule_idx] = rule
+        assert list(incremental_scorer.rules) == expected_rules
+        expected_score_mat = _score_fresh(system, expected_rules, input_mat)
+        score_mat = incremental_scorer.scores
+        if type(system.inference_engine.aggregation_strat) is \
+                MaximumAggregation:
+            assert np.array_equal(score_mat, expected_score_mat)
+        else:
+            assert score_mat == pytest.approx(expected_score_mat, abs=1e-12)
+        # never defined where a fresh score is undefined, or vice versa
+        assert np.array_equal(np.all(score_mat == 0.0, axis=1),
+                              np.all(expected_score_mat == 0.0, axis=1))
+    incremental_scorer.recompute()
+    assert np.array_equal(incremental_scorer.scores,
+                          _score_fresh(system, expected_rules, input_mat))
+    assert incremental_scorer.classify().tolist() == \
+        system.inference_engine.classify_batch(
+            system.ling_vars, FuzzyRuleBase(expected_rules),
+            input_mat).tolist()
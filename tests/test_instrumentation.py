@@ -0,0 +1,178 @@
+import numpy as np
+import pytest
+
+from zadeh.error import UndefinedMappingError
+from zadeh.instrumentation import (AGGREGATE_STAGE, COMPILE_STAGE,
+                                   EVAL_ANTECEDENTS_STAGE, FUZZIFY_STAGE,
+                                   STAGES, InferenceStats)
+
+from .util import CLASS_LABELS, make_input_mat, make_system
+
+
+def test_counts_and_histogram_of_known_matching_degrees():
+    calls = []
+    stats = InferenceStats(num_matching_degree_bins=4,
+                           per_rule=True,
+                           callback=calls.append)
+    rule_base = object()
+    stats.record_score("score", rule_base, np.array([0.0, 0.1, 0.25, 1.0]),
+                       {COMPILE_STAGE: 0.5, EVAL_ANTECEDENTS_STAGE: 1.0})
+    stats.record_score(
+        "score_batch", rule_base,
+        np.array([[0.0, 0.0, 0.5, 0.75], [0.3, 0.0, 0.99, 0.0]]), {
+            COMPILE_STAGE: 0.25,
+            FUZZIFY_STAGE: 2.0,
+            EVAL_ANTECEDENTS_STAGE: 1.0,
+            AGGREGATE_STAGE: 4.0
+        })
+    stats.record_classify("classify_batch", 5, 2)
+
+    snapshot = stats.snapshot()
+    assert snapshot["num_score_calls"] == 1
+    assert snapshot["num_score_batch_calls"] == 1
+    assert snapshot["num_samples_scored"] == 3
+    assert snapshot["num_classified"] == 5
+    assert snapshot["num_undefined"] == 2
+    assert snapshot["undefined_rate"] == 0.4
+    assert snapshot["stage_times_s"] == {
+        COMPILE_STAGE: 0.75,
+        FUZZIFY_STAGE: 2.0,
+        EVAL_ANTECEDENTS_STAGE: 2.0,
+        AGGREGATE_STAGE: 4.0
+    }
+    # bins (0, 0.25), [0.25, 0.5), [0.5, 0.75), [0.75, 1], lower edge
+    # inclusive
+    assert snapshot["matching_degree_hist"] == {
+        "bin_edges": [0.0, 0.25, 0.5, 0.75, 1.0],
+        "counts": [1, 2, 1, 3],
+        "num_zero": 5
+    }
+    assert snapshot["rule_firing_counts"] == [1, 1, 3, 2]
+    assert snapshot["rule_matching_degree_sums"] == pytest.approx(
+        [0.3, 0.1, 1.74, 1.75])
+    assert stats.dead_rule_idxs().tolist() == []
+    assert stats.hot_rule_idxs(2).tolist() == [2, 3]
+
+    assert calls == [{
+        "call": "score",
+        "num_samples": 1,
+        "num_rules": 4,
+        "num_firing": 3,
+        "stage_times_s": {
+            COMPILE_STAGE: 0.5,
+            EVAL_ANTECEDENTS_STAGE: 1.0
+        }
+    }, {
+        "call": "score_batch",
+        "num_samples": 2,
+        "num_rules": 4,
+        "num_firing": 4,
+        "stage_times_s": {
+            COMPILE_STAGE: 0.25,
+            FUZZIFY_STAGE: 2.0,
+            EVAL_ANTECEDENTS_STAGE: 1.0,
+            AGGREGATE_STAGE: 4.0
+        }
+    }, {
+        "call": "classify_batch",
+        "num_samples": 5,
+        "num_undefined": 2
+    }]
+
+
+def test_per_rule_stats_start_over_for_other_rule_base():
+    stats = InferenceStats(per_rule=True)
+    stats.record_score("score", object(), np.array([0.5, 0.0, 0.2]), {})
+    stats.record_score("score", object(), np.array([0.0, 0.4]), {})
+    assert stats.snapshot()["rule_firing_counts"] == [0, 1]
+    assert stats.dead_rule_idxs().tolist() == [0]
+    # but not the other counts
+    assert stats.snapshot()["num_score_calls"] == 2
+
+
+def test_reset():
+    stats = InferenceStats(per_rule=True)
+    assert stats.dead_rule_idxs().tolist() == []
+    stats.record_score("score", object(), np.array([0.5, 0.0]),
+                       {COMPILE_STAGE: 1.0})
+    stats.record_classify("classify", 1, 1)
+    stats.reset()
+    snapshot = stats.snapshot()
+    assert snapshot["num_score_calls"] == 0
+    assert snapshot["num_classified"] == 0
+    assert snapshot["undefined_rate"] == 0.0
+    assert snapshot["stage_times_s"] == dict.fromkeys(STAGES, 0.0)
+    assert snapshot["matching_degree_hist"]["counts"] == [0] * 10
+    assert snapshot["rule_firing_counts"] is None
+
+
+def _classify_or_none(system, input_vec):
+    try:
+        return system.classify(input_vec)
+    except UndefinedMappingError:
+        return None
+
+
+@pytest.mark.parametrize("kind", ("cnf", "conjunctive"))
+def test_engine_records_calls(kind):
+    # few rules, so some samples have undefined mappings
+    system = make_system(kind, num_rules=10)
+    input_mat = make_input_mat(100, 3)
+    stats = system.enable_instrumentation(InferenceStats(per_rule=True))
+    assert system.inference_engine.stats is stats
+
+    score_mat = system.score_batch(input_mat)
+    labels = system.classify_batch(input_mat)
+    scalar_input_mat = input_mat[:20]
+    undefined_mask = np.ma.getmaskarray(labels)
+    for (row_idx, input_vec) in enumerate(scalar_input_mat):
+        assert list(system.score(input_vec).values()) == pytest.approx(
+            score_mat[row_idx].tolist(), rel=0, abs=1e-12)
+        assert _classify_or_none(system, input_vec) == \
+            (None if undefined_mask[row_idx] else labels.data[row_idx])
+
+    engine = system.inference_engine
+    compiled_rule_base = system.rule_base.compile(system.ling_vars,
+                                                  CLASS_LABELS)
+    batch_matching_degree_mat = engine.compute_matching_degree_mat(
+        compiled_rule_base,
+        engine.fuzzify_batch(system.ling_vars, input_mat))
+    scalar_matching_degree_mat = engine.compute_matching_degree_mat(
+        compiled_rule_base,
+        engine.fuzzify_batch(system.ling_vars, scalar_input_mat))
+    # score_batch(), classify_batch(), then score() and classify() per sample
+    matching_degrees = np.concatenate([
+        batch_matching_degree_mat.ravel(),
+        batch_matching_degree_mat.ravel(),
+        scalar_matching_degree_mat.ravel(),
+        scalar_matching_degree_mat.ravel()
+    ])
+
+    snapshot = stats.snapshot()
+    assert snapshot["num_score_calls"] == 2 * len(scalar_input_mat)
+    assert snapshot["num_score_batch_calls"] == 2
+    assert snapshot["num_samples_scored"] == \
+        2 * len(input_mat) + 2 * len(scalar_input_mat)
+    num_undefined = int(np.count_nonzero(undefined_mask))
+    assert 0 < num_undefined < len(input_mat)
+    assert snapshot["num_classified"] == \
+        len(input_mat) + len(scalar_input_mat)
+    assert snapshot["num_undefined"] == num_undefined + int(
+        np.count_nonzero(undefined_mask[:len(scalar_input_mat)]))
+
+    hist = snapshot["matching_degree_hist"]
+    assert hist["num_zero"] == int(np.count_nonzero(matching_degrees == 0))
+    non_zero = matching_degrees[matching_degrees != 0]
+    assert hist["counts"] == np.bincount(
+        np.minimum((non_zero * 10).astype(int), 9), minlength=10).tolist()
+    assert snapshot["rule_firing_counts"] == (
+        2 * np.count_nonzero(batch_matching_degree_mat, axis=0) +
+        2 * np.count_nonzero(scalar_matching_degree_mat, axis=0)).tolist()
+
+    stage_times = snapshot["stage_times_s"]
+    assert set(stage_times) == set(STAGES)
+    assert all([stage_time > 0 for stage_time in stage_times.values()])
+
+    system.disable_instrumentation()
+    system.score_batch(input_mat)
+    assert stats.snapshot() == snapshot
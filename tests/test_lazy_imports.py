@@ -0,0 +1,113 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from zadeh.domain import Domain
+from zadeh.linguistic_var import StrongFuzzyPartition
+from zadeh.membership_func import PiecewiseLinearMembershipFunc, Point
+
+# builds a small system with only the zadeh API (no NumPy), runs all scalar
+# inference calls, then reports whether NumPy got imported
+_SCALAR_INFERENCE_CODE = """
+import sys
+import zadeh
+
+domain = zadeh.Domain(0.0, 1.0)
+ling_vars = [
+    zadeh.StrongFuzzyPartition(domain, 4, "x0"),
+    zadeh.LinguisticVar([
+        zadeh.make_triangular_membership_func(domain, 0.0, 0.0, 0.6, "lo"),
+        zadeh.make_triangular_membership_func(domain, 0.4, 1.0, 1.0, "hi")
+    ], "x1")
+]
+cnf_rule_base = zadeh.FuzzyRuleBase([
+    zadeh.FuzzyRule(zadeh.CNFAntecedent([(1, 1, 0, 0), (1, 1)]),
+                    {"a": 0.9, "b": 0.2}),
+    zadeh.FuzzyRule(zadeh.CNFAntecedent([(0, 0, 1, 1), (0, 1)]),
+                    {"a": 0.1, "b": 0.7})
+])
+conjunctive_rule_base = zadeh.FuzzyRuleBase([
+    zadeh.FuzzyRule(zadeh.ConjunctiveAntecedent([1, zadeh.UNSPECIFIED]),
+                    {"a": 0.4, "b": 0.6}),
+    zadeh.FuzzyRule(zadeh.ConjunctiveAntecedent([3, 0]),
+                    {"a": 0.8, "b": 0.3})
+])
+for (rule_base, logical_or_strat) in ((cnf_rule_base, zadeh.logical_or_max),
+                                      (conjunctive_rule_base, None)):
+    for aggregation_strat in (zadeh.MaximumAggregation,
+                              zadeh.BoundedSumAggregation,
+                              zadeh.AvgAggregation,
+                              zadeh.BiasedAvgAggregation,
+                              zadeh.WeightedAvgAggregation):
+        for mode in (zadeh.DEBUG_MODE, zadeh.FAST_MODE):
+            engine = zadeh.InferenceEngine(
+                ("a", "b"), zadeh.logical_and_min, logical_or_strat,
+                aggregation_strat(zadeh.implication_min), mode=mode)
+            system = zadeh.FuzzyRuleBasedSystem(engine, ling_vars, rule_base)
+            for input_vec in ([0.1, 0.2], [0.8, 0.9], [0.5, 0.5]):
+                system.score(input_vec)
+                engine.score_top_k(ling_vars, rule_base, input_vec, 1)
+                try:
+                    system.classify(input_vec)
+                except zadeh.UndefinedMappingError:
+                    pass
+print("numpy" in sys.modules)
+"""
+
+
+def _run(code):
+    env = dict(os.environ)
+    repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        [repo_dir] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+    return subprocess.run([sys.executable, "-c", code],
+                          env=env,
+                          check=True,
+                          stdout=subprocess.PIPE,
+                          universal_newlines=True).stdout.strip()
+
+
+def test_import_does_not_load_numpy():
+    assert _run("import sys, zadeh; zadeh.FuzzyRuleBasedSystem; "
+                "print('numpy' in sys.modules)") == "False"
+
+
+def test_scalar_inference_does_not_load_numpy():
+    assert _run(_SCALAR_INFERENCE_CODE) == "False"
+
+
+@pytest.mark.parametrize(
+    "points",
+    [
+        # first / last point not at min
+        [Point(0.0, 0.5), Point(0.5, 1.0), Point(1.0, 0.0)],
+        [Point(0.0, 0.0), Point(0.5, 1.0), Point(1.0, 0.5)],
+        # non min sections not contiguous
+        [
+            Point(0.0, 0.0),
+            Point(0.2, 1.0),
+            Point(0.4, 0.0),
+            Point(0.6, 0.0),
+            Point(0.8, 1.0),
+            Point(1.0, 0.0)
+        ],
+        # all min
+        [Point(0.0, 0.0), Point(1.0, 0.0)]
+    ])
+def test_piecewise_linear_points_checked_at_construction(points):
+    with pytest.raises(AssertionError):
+        PiecewiseLinearMembershipFunc(Domain(0.0, 1.0), points, "mf")
+
+
+@pytest.mark.parametrize("domain,num_membership_funcs",
+                         [((0.0, 1.0), 2), ((0.1, 0.7), 7), ((-3, 11), 13),
+                          ((1e-3, 3.3), 97)])
+def test_strong_fuzzy_partition_apexes_match_linspace(domain,
+                                                      num_membership_funcs):
+    partition = StrongFuzzyPartition(Domain(*domain), num_membership_funcs,
+                                     "x")
+    assert partition.apex_xs == tuple(
+        np.linspace(*domain, num_membership_funcs).tolist())
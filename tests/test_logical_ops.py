@@ -0,0 +1,131 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from zadeh import logical_ops
+from zadeh.inference_engine import DEBUG_MODE, FAST_MODE
+from zadeh.logical_ops import (T_CONORMS, T_NORMS, get_array_logical_op,
+                               get_unchecked_logical_op, is_t_conorm,
+                               is_t_norm)
+
+from .util import (make_input_mat, make_system, param_id,
+                   parametrize_logical_ops)
+
+LOGICAL_OPS = T_NORMS + T_CONORMS
+
+
+@pytest.mark.parametrize("logical_op", LOGICAL_OPS, ids=param_id)
+def test_kernels_agree(logical_op):
+    rng = np.random.default_rng(0)
+    array_op = get_array_logical_op(logical_op)
+    unchecked_op = get_unchecked_logical_op(logical_op)
+    for _ in range(200):
+        num_vals = rng.integers(1, 6)
+        membership_vals = rng.choice([0.0, 0.5, 1.0, rng.random()],
+                                     size=(4, num_vals))
+        where = rng.random((4, num_vals)) < 0.7
+        where[:, 0] = True
+        array_result = array_op(membership_vals, axis=-1, where=where)
+        for (vals, mask, array_val) in zip(membership_vals, where,
+                                           array_result):
+            vals = vals[mask].tolist()
+            scalar_val = logical_op(vals)
+            assert unchecked_op(vals) == pytest.approx(scalar_val, abs=1e-15)
+            assert array_val == pytest.approx(scalar_val, abs=1e-12)
+
+
+@pytest.mark.parametrize("logical_op", LOGICAL_OPS, ids=param_id)
+def test_array_op_identity(logical_op):
+    # reductions over no vals give the identity
+    result = get_array_logical_op(logical_op)(np.zeros((2, 3)),
+                                              axis=-1,
+                                              where=False)
+    identity = 1.0 if is_t_norm(logical_op) else 0.0
+    assert np.all(result == identity)
+
+
+def test_kinds():
+    assert all([is_t_norm(logical_op) for logical_op in T_NORMS])
+    assert all([is_t_conorm(logical_op) for logical_op in T_CONORMS])
+    assert not any([is_t_conorm(logical_op) for logical_op in T_NORMS])
+    assert not is_t_norm(sum)
+
+
+def test_probor():
+    assert logical_ops.logical_or_probor([0.5, 0.5, 0.5]) == 0.875
+
+
+@pytest.mark.parametrize("logical_op", LOGICAL_OPS, ids=param_id)
+def test_kernels_are_picklable(logical_op):
+    for kernel in (logical_op, get_unchecked_logical_op(logical_op),
+                   get_array_logical_op(logical_op)):
+        pickle.loads(pickle.dumps(kernel))
+
+
+@pytest.mark.parametrize("mode", (DEBUG_MODE, FAST_MODE))
+@parametrize_logical_ops
+def test_system_pickle_round_trip(logical_and_strat, logical_or_strat, mode):
+    system = make_system(logical_and_strat=logical_and_strat,
+                         logical_or_strat=logical_or_strat,
+                         mode=mode)
+    input_mat = make_input_mat(40, 3)
+    loaded_system = pickle.loads(pickle.dumps(system))
+    assert np.array_equal(loaded_system.score_batch(input_mat),
+                          system.score_batch(input_mat))
+    assert loaded_system.score(input_mat[0]) == system.score(input_mat[0])
+
+
+def _logical_and_geometric_mean(membership_vals):
+    return float(np.prod(membership_vals))**(1 / len(membership_vals))
+
+
+def _logical_or_overshooting(membership_vals):
+    # not a valid logical op, result out of range
+    return sum(membership_vals) + 0.5
+
+
+@pytest.mark.parametrize("identity", (0.0, 1.0))
+def test_fallback_array_op(identity):
+    array_op = get_array_logical_op(_logical_and_geometric_mean, identity)
+    membership_vals = np.array([[0.25, 1.0, 0.5], [0.5, 0.0, 1.0]])
+    where = np.array([[True, True, False], [False, False, False]])
+    for validate in (True, False):
+        result = array_op(membership_vals,
+                          axis=-1,
+                          where=where,
+                          validate=validate)
+        assert result.tolist() == [0.5, identity]
+    # along another axis
+    assert array_op(membership_vals, axis=0).tolist() == pytest.approx(
+        [_logical_and_geometric_mean(vals) for vals in membership_vals.T])
+    pickle.loads(pickle.dumps(array_op))
+
+
+def test_fallback_array_op_without_identity_raises():
+    array_op = get_array_logical_op(_logical_and_geometric_mean)
+    assert array_op([[0.25, 1.0]]).tolist() == [0.5]
+    with pytest.raises(ValueError):
+        array_op([[0.25, 1.0]], where=False)
+
+
+def test_fallback_array_op_validate():
+    array_op = get_array_logical_op(_logical_or_overshooting, 0.0)
+    with pytest.raises(AssertionError):
+        array_op([[0.25, 0.5]])
+    with pytest.raises(AssertionError):
+        array_op(np.empty((2, 0)))
+    # clipped into range instead
+    assert array_op([[0.25, 0.5]], validate=False).tolist() == [1.0]
+
+
+@pytest.mark.parametrize("mode", (DEBUG_MODE, FAST_MODE))
+def test_system_with_unknown_logical_op(mode):
+    system = make_system(logical_and_strat=_logical_and_geometric_mean,
+                         mode=mode)
+    input_mat = make_input_mat(40, 3)
+    score_mat = system.score_batch(input_mat)
+    assert not np.any(np.isnan(score_mat))
+    for (input_vec, score_vec) in zip(input_mat, score_mat):
+        assert list(system.score(input_vec).values()) == pytest.approx(
+            score_vec.tolist(), abs=1e-12)
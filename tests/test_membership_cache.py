@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from zadeh.antecedent import CNFAntecedent
+from zadeh.linguistic_var import StrongFuzzyPartition
+from zadeh.logical_ops import logical_and_min, logical_or_max
+from zadeh.membership_cache import MembershipCache, MembershipCacheStats
+
+from .util import DOMAIN, RULE_BASE_KINDS, make_input_mat, make_system
+
+
+def _count_lookups(rule_base, num_features, max_num_membership_funcs):
+    """Returns (total, distinct) num of (feature, membership func) lookups
+    needed to evaluate every rule once."""
+    usage_mats = [
+        rule.antecedent.membership_func_usage_mask(max_num_membership_funcs)
+        for rule in rule_base
+    ]
+    union_mat = np.zeros((num_features, max_num_membership_funcs),
+                         dtype=bool)
+    for usage_mat in usage_mats:
+        union_mat |= usage_mat
+    return (int(sum([usage_mat.sum() for usage_mat in usage_mats])),
+            int(union_mat.sum()))
+
+
+def test_lookup_hits_and_misses():
+    ling_vars = [
+        StrongFuzzyPartition(DOMAIN, 3, f"x{idx}") for idx in range(2)
+    ]
+    input_vec = [0.2, 0.9]
+    membership_cache = MembershipCache(ling_vars, input_vec)
+    assert membership_cache.stats == MembershipCacheStats(0, 0)
+    for _ in range(3):
+        assert membership_cache.lookup(0, 1) == \
+            ling_vars[0].eval_membership_func(1, 0.2)
+    assert membership_cache.lookup(1, 2) == \
+        ling_vars[1].eval_membership_func(2, 0.9)
+    # zero vals are cached too
+    assert membership_cache.lookup(1, 0) == 0.0
+    assert membership_cache.lookup(1, 0) == 0.0
+    assert membership_cache.stats == MembershipCacheStats(num_hits=3,
+                                                          num_misses=3)
+
+
+def test_shared_between_antecedents():
+    ling_vars = [
+        StrongFuzzyPartition(DOMAIN, 3, f"x{idx}") for idx in range(2)
+    ]
+    input_vec = [0.2, 0.9]
+    membership_cache = MembershipCache(ling_vars, input_vec)
+    antecedents = [
+        CNFAntecedent([(1, 1, 0), (0, 0, 1)]),
+        CNFAntecedent([(0, 1, 0), (0, 1, 1)])
+    ]
+    for antecedent in antecedents:
+        assert antecedent.eval(ling_vars, input_vec, logical_and_min,
+                               logical_or_max, membership_cache) == \
+            antecedent.eval(ling_vars, input_vec, logical_and_min,
+                            logical_or_max)
+    # 3 lookups each; (0, 1) and (1, 2) are looked up by both
+    assert membership_cache.stats == MembershipCacheStats(num_hits=2,
+                                                          num_misses=4)
+
+
+@pytest.mark.parametrize("kind", RULE_BASE_KINDS)
+def test_engine_stats(kind):
+    system = make_system(kind, use_rule_activation_index=False)
+    engine = system.inference_engine
+    assert engine.membership_cache_stats == MembershipCacheStats(0, 0)
+    input_mat = make_input_mat(10, 3)
+    (num_lookups, num_distinct_lookups) = _count_lookups(
+        system.rule_base, 3, 4)
+    for input_vec in input_mat:
+        system.score(input_vec)
+    # every rule is evaluated, each membership val computed once per input
+    assert engine.membership_cache_stats == MembershipCacheStats(
+        num_hits=len(input_mat) * (num_lookups - num_distinct_lookups),
+        num_misses=len(input_mat) * num_distinct_lookups)
+    assert engine.membership_cache_stats.num_hits > 0
+
+    engine.reset_membership_cache_stats()
+    assert engine.membership_cache_stats == MembershipCacheStats(0, 0)
+    # batch inference does not use the cache
+    system.score_batch(input_mat)
+    assert engine.membership_cache_stats == MembershipCacheStats(0, 0)
+
+
+def test_engine_stats_with_rule_activation_index():
+    system = make_system(num_rules=60)
+    engine = system.inference_engine
+    input_mat = make_input_mat(10, 3)
+    (num_lookups, num_distinct_lookups) = _count_lookups(
+        system.rule_base, 3, 4)
+    for input_vec in input_mat:
+        system.score(input_vec)
+    stats = engine.membership_cache_stats
+    # skipped rules are never looked up
+    assert 0 < stats.num_hits + stats.num_misses < \
+        len(input_mat) * num_lookups
+    assert stats.num_misses <= len(input_mat) * num_distinct_lookups
@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+import pytest
+
+from zadeh.domain import Domain
+from zadeh.linguistic_var import LinguisticVar, StrongFuzzyPartition
+from zadeh.membership_func import (GaussianMembershipFunc,
+                                   GeneralizedBellMembershipFunc,
+                                   SigmoidMembershipFunc,
+                                   TrapezoidalMembershipFunc,
+                                   TriangularMembershipFunc,
+                                   make_trapezoidal_membership_func,
+                                   make_triangular_membership_func)
+
+from .util import DOMAIN
+
+_DOMAIN = Domain(-1.0, 3.0)
+
+# (membership func, [(input, expected val), ...])
+_SHAPE_CASES = [
+    (TriangularMembershipFunc(_DOMAIN, 0.0, 1.0, 2.0, "tri"),
+     [(-1.0, 0.0), (0.0, 0.0), (0.25, 0.25), (1.0, 1.0), (1.5, 0.5),
+      (2.0, 0.0), (3.0, 0.0)]),
+    # left shoulder
+    (TriangularMembershipFunc(_DOMAIN, -1.0, -1.0, 1.0, "shoulder"),
+     [(-1.0, 1.0), (0.0, 0.5), (1.0, 0.0), (2.0, 0.0)]),
+    (TrapezoidalMembershipFunc(_DOMAIN, 0.0, 1.0, 2.0, 2.5, "trap"),
+     [(-0.5, 0.0), (0.5, 0.5), (1.0, 1.0), (1.7, 1.0), (2.0, 1.0),
+      (2.25, 0.5), (2.5, 0.0), (3.0, 0.0)]),
+    (GaussianMembershipFunc(_DOMAIN, 1.0, 0.5, "gauss"),
+     [(1.0, 1.0), (1.5, math.exp(-0.5)), (0.0, math.exp(-2.0)),
+      (3.0, math.exp(-8.0))]),
+    (GeneralizedBellMembershipFunc(_DOMAIN, 0.5, 2.0, 1.0, "bell"),
+     [(1.0, 1.0), (1.5, 0.5), (0.5, 0.5), (2.0, 1 / 17)]),
+    (SigmoidMembershipFunc(_DOMAIN, 4.0, 1.0, "sigmoid"),
+     [(1.0, 0.5), (1.5, 1 / (1 + math.exp(-2.0))),
+      (-1.0, 1 / (1 + math.exp(8.0)))]),
+    # falling, and steep enough for exp() to overflow
+    (SigmoidMembershipFunc(_DOMAIN, -1000.0, 0.0, "steep"),
+     [(-1.0, 1.0), (0.0, 0.5), (3.0, 0.0)])
+]
+
+
+def _case_id(case):
+    return case[0].name
+
+
+@pytest.mark.parametrize("case", _SHAPE_CASES, ids=_case_id)
+def test_shape_vals(case):
+    (membership_func, expected_vals) = case
+    for (input_scalar, expected_val) in expected_vals:
+        assert membership_func.fuzzify(input_scalar) == \
+            pytest.approx(expected_val, rel=1e-12, abs=1e-300)
+
+
+@pytest.mark.parametrize("case", _SHAPE_CASES, ids=_case_id)
+def test_fuzzify_array_matches_fuzzify(case):
+    membership_func = case[0]
+    input_arr = np.concatenate([
+        np.linspace(_DOMAIN.min, _DOMAIN.max, 401),
+        [input_scalar for (input_scalar, _) in case[1]]
+    ])
+    result = membership_func.fuzzify_array(input_arr)
+    np.testing.assert_allclose(
+        result, [membership_func.fuzzify(x) for x in input_arr.tolist()],
+        rtol=1e-12,
+        atol=0)
+    assert np.all((0.0 <= result) & (result <= 1.0))
+    with pytest.raises(AssertionError):
+        membership_func.fuzzify_array([_DOMAIN.max + 1.0])
+    with pytest.raises(AssertionError):
+        membership_func.fuzzify(_DOMAIN.min - 1.0)
+
+
+@pytest.mark.parametrize("params", [(0.0, 1.0, 2.0), (-1.0, -1.0, 1.0),
+                                    (1.0, 3.0, 3.0)])
+def test_triangular_matches_piecewise_linear(params):
+    input_arr = np.linspace(_DOMAIN.min, _DOMAIN.max, 401)
+    np.testing.assert_allclose(
+        TriangularMembershipFunc(_DOMAIN, *params,
+                                 "mf").fuzzify_array(input_arr),
+        make_triangular_membership_func(_DOMAIN, *params,
+                                        "mf").fuzzify_array(input_arr),
+        rtol=0,
+        atol=1e-12)
+
+
+@pytest.mark.parametrize("params", [(0.0, 1.0, 2.0, 2.5),
+                                    (-1.0, -1.0, 0.0, 1.0),
+                                    (1.0, 2.0, 3.0, 3.0)])
+def test_trapezoidal_matches_piecewise_linear(params):
+    input_arr = np.linspace(_DOMAIN.min, _DOMAIN.max, 401)
+    np.testing.assert_allclose(
+        TrapezoidalMembershipFunc(_DOMAIN, *params,
+                                  "mf").fuzzify_array(input_arr),
+        make_trapezoidal_membership_func(_DOMAIN, *params,
+                                         "mf").fuzzify_array(input_arr),
+        rtol=0,
+        atol=1e-12)
+
+
+def test_non_min_matching_domain():
+    membership_func = TrapezoidalMembershipFunc(_DOMAIN, 0.0, 1.0, 2.0, 2.5,
+                                                "trap")
+    assert membership_func.non_min_matching_domain == Domain(0.0, 2.5)
+    input_arr = np.linspace(_DOMAIN.min, _DOMAIN.max, 401)
+    outside = (input_arr < 0.0) | (input_arr > 2.5)
+    assert np.all(membership_func.fuzzify_array(input_arr)[outside] == 0.0)
+
+
+@pytest.mark.parametrize("domain,num_membership_funcs",
+                         [(DOMAIN, 2), (DOMAIN, 5), (Domain(-3.0, 11.0), 13)])
+def test_strong_fuzzy_partition(domain, num_membership_funcs):
+    partition = StrongFuzzyPartition(domain, num_membership_funcs, "x")
+    # same membership funcs, evaluated one by one
+    ling_var = LinguisticVar(partition.membership_funcs, "x")
+    input_arr = np.concatenate(
+        [np.linspace(domain.min, domain.max, 997), partition.apex_xs])
+    result = partition.eval_all_membership_funcs_array(input_arr)
+    np.testing.assert_allclose(
+        result,
+        ling_var.eval_all_membership_funcs_array(input_arr),
+        rtol=0,
+        atol=1e-12)
+    np.testing.assert_allclose(result.sum(axis=1), 1.0, rtol=0, atol=1e-12)
+    assert np.all(np.count_nonzero(result, axis=1) <= 2)
+    for (row_idx, input_scalar) in enumerate(input_arr.tolist()):
+        assert partition.eval_all_membership_funcs(input_scalar) == \
+            tuple(result[row_idx].tolist())
+        (lower_idx, lower_val, upper_val) = \
+            partition.eval_non_zero(input_scalar)
+        assert (lower_val, upper_val) == (result[row_idx, lower_idx],
+                                          result[row_idx, lower_idx + 1])
+    # one at own apex, zero at all others
+    for (apex_idx, apex_x) in enumerate(partition.apex_xs):
+        assert partition.eval_all_membership_funcs(apex_x) == pytest.approx(
+            [float(idx == apex_idx) for idx in range(num_membership_funcs)],
+            rel=0,
+            abs=1e-12)
@@ -0,0 +1,174 @@
+import math
+
+import numpy as np
+import pytest
+
+from zadeh.domain import Domain
+from zadeh.linguistic_var import LinguisticVar
+from zadeh.membership_func import (GaussianMembershipFunc,
+                                   make_trapezoidal_membership_func,
+                                   make_triangular_membership_func)
+from zadeh.membership_lookup import MembershipLookupTable
+
+from .util import make_input_mat, make_system
+
+_DOMAIN = Domain(0.0, 1.0)
+_RESOLUTIONS = (11, 101, 1001)
+
+
+def _make_piecewise_linear_membership_funcs():
+    # points off the grids, steepest slope 1 / 0.13
+    return [
+        make_triangular_membership_func(_DOMAIN, 0.0, 0.0, 0.37, "lo"),
+        make_trapezoidal_membership_func(_DOMAIN, 0.13, 0.26, 0.53, 0.77,
+                                         "mid"),
+        make_triangular_membership_func(_DOMAIN, 0.61, 1.0, 1.0, "hi")
+    ], 1 / 0.13
+
+
+def _make_gaussian_membership_funcs(sigma=0.1):
+    # max |f'| = exp(-1 / 2) / sigma, max |f''| = 1 / sigma^2
+    return [
+        GaussianMembershipFunc(_DOMAIN, mean, sigma, f"mf{idx}")
+        for (idx, mean) in enumerate((0.0, 0.33, 0.71, 1.0))
+    ], (math.exp(-0.5) / sigma, 1 / sigma**2)
+
+
+def _calc_error(lookup_table, membership_funcs, input_arr):
+    exact = np.stack([
+        membership_func.fuzzify_array(input_arr)
+        for membership_func in membership_funcs
+    ],
+                     axis=1)
+    return np.max(np.abs(lookup_table.eval_all_array(input_arr) - exact))
+
+
+def _make_dense_input_arr():
+    return np.random.default_rng(0).uniform(_DOMAIN.min, _DOMAIN.max, 20000)
+
+
+@pytest.mark.parametrize("resolution", _RESOLUTIONS)
+@pytest.mark.parametrize("interpolate", (True, False))
+def test_error_bound_piecewise_linear(resolution, interpolate):
+    (membership_funcs, max_slope) = _make_piecewise_linear_membership_funcs()
+    lookup_table = MembershipLookupTable(membership_funcs, resolution,
+                                         interpolate)
+    step = (_DOMAIN.max - _DOMAIN.min) / (resolution - 1)
+    # both are off by at most half a step along the steepest line
+    bound = max_slope * step / 2 + 1e-12
+    max_approx_error = lookup_table.calc_max_approx_error()
+    assert max_approx_error <= bound
+    assert _calc_error(lookup_table, membership_funcs,
+                       _make_dense_input_arr()) <= bound
+    # checked on a finer grid plus the points' x coords
+    point_xs = [
+        point.x for membership_func in membership_funcs
+        for point in membership_func.points
+    ]
+    assert max_approx_error == _calc_error(
+        lookup_table, membership_funcs,
+        np.concatenate([
+            np.linspace(_DOMAIN.min, _DOMAIN.max, (resolution - 1) * 8 + 1),
+            point_xs
+        ]))
+
+
+@pytest.mark.parametrize("resolution", _RESOLUTIONS)
+@pytest.mark.parametrize("interpolate", (True, False))
+def test_error_bound_smooth(resolution, interpolate):
+    (membership_funcs,
+     (max_slope, max_curvature)) = _make_gaussian_membership_funcs()
+    lookup_table = MembershipLookupTable(membership_funcs, resolution,
+                                         interpolate)
+    step = (_DOMAIN.max - _DOMAIN.min) / (resolution - 1)
+    if interpolate:
+        bound = max_curvature * step**2 / 8 + 1e-12
+    else:
+        bound = max_slope * step / 2 + 1e-12
+    assert lookup_table.calc_max_approx_error() <= bound
+    assert _calc_error(lookup_table, membership_funcs,
+                       _make_dense_input_arr()) <= bound
+
+
+def test_interpolation_beats_nearest():
+    (membership_funcs, _) = _make_gaussian_membership_funcs()
+    errors = {
+        interpolate: [
+            MembershipLookupTable(membership_funcs, resolution,
+                                  interpolate).calc_max_approx_error()
+            for resolution in _RESOLUTIONS
+        ]
+        for interpolate in (True, False)
+    }
+    for (interpolated_error, nearest_error) in zip(errors[True],
+                                                   errors[False]):
+        assert interpolated_error < nearest_error
+    # error shrinks as step (linear) or step squared (interpolated)
+    for (coarse_error, fine_error) in zip(errors[False], errors[False][1:]):
+        assert fine_error < coarse_error / 5
+    for (coarse_error, fine_error) in zip(errors[True], errors[True][1:]):
+        assert fine_error < coarse_error / 50
+
+
+@pytest.mark.parametrize("interpolate", (True, False))
+def test_exact_on_grid(interpolate):
+    # all points on the grid of resolution 101
+    membership_funcs = [
+        make_triangular_membership_func(_DOMAIN, 0.0, 0.0, 0.4, "lo"),
+        make_trapezoidal_membership_func(_DOMAIN, 0.2, 0.3, 0.55, 0.8, "mid"),
+        make_triangular_membership_func(_DOMAIN, 0.6, 1.0, 1.0, "hi")
+    ]
+    lookup_table = MembershipLookupTable(membership_funcs, 101, interpolate)
+    grid_input_arr = np.linspace(_DOMAIN.min, _DOMAIN.max, 101)
+    assert _calc_error(lookup_table, membership_funcs,
+                       grid_input_arr) <= 1e-12
+    if interpolate:
+        assert lookup_table.calc_max_approx_error() <= 1e-12
+
+
+@pytest.mark.parametrize("interpolate", (True, False))
+def test_scalar_matches_array_and_keeps_zeros(interpolate):
+    (membership_funcs, _) = _make_piecewise_linear_membership_funcs()
+    lookup_table = MembershipLookupTable(membership_funcs, 11, interpolate)
+    input_arr = _make_dense_input_arr()[:500]
+    result = lookup_table.eval_all_array(input_arr)
+    for (row_idx, input_scalar) in enumerate(input_arr.tolist()):
+        assert [
+            lookup_table.eval(mf_idx, input_scalar)
+            for mf_idx in range(len(membership_funcs))
+        ] == pytest.approx(result[row_idx].tolist(), rel=0, abs=1e-12)
+    # zero outside the non min matching domains, as with exact fuzzify()
+    for (mf_idx, membership_func) in enumerate(membership_funcs):
+        non_min_domain = membership_func.non_min_matching_domain
+        outside = (input_arr < non_min_domain.min) | \
+            (input_arr > non_min_domain.max)
+        assert np.all(result[outside, mf_idx] == 0.0)
+
+
+def test_ling_var_lookup_table():
+    (membership_funcs, max_slope) = _make_piecewise_linear_membership_funcs()
+    ling_var = LinguisticVar(membership_funcs, "x")
+    max_approx_error = ling_var.enable_lookup_table(101)
+    assert 0 < max_approx_error <= max_slope * 0.01 / 2
+    assert ling_var.lookup_table.resolution == 101
+    input_arr = _make_dense_input_arr()
+    np.testing.assert_array_equal(
+        ling_var.eval_all_membership_funcs_array(input_arr),
+        ling_var.lookup_table.eval_all_array(input_arr))
+    ling_var.disable_lookup_table()
+    assert ling_var.lookup_table is None
+    assert ling_var.eval_all_membership_funcs(0.3) == tuple(
+        [membership_func.fuzzify(0.3) for membership_func in membership_funcs])
+
+
+def test_system_scores_within_tolerance():
+    system = make_system()
+    input_mat = make_input_mat(200, 3)
+    exact_score_mat = system.score_batch(input_mat)
+    # apexes of util's ling vars are on the grid
+    for ling_var in system.ling_vars:
+        assert ling_var.enable_lookup_table(301) <= 1e-12
+    np.testing.assert_allclose(system.score_batch(input_mat),
+                               exact_score_mat,
+                               rtol=0,
+                               atol=1e-12)
@@ -0,0 +1,92 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from zadeh.error import UndefinedMappingError
+from zadeh.logical_ops import logical_and_hamacher, logical_or_lukasiewicz
+from zadeh.micro_batching import MicroBatcher
+
+from .util import make_input_mat, make_system
+
+
+async def _classify_or_none(classifier, input_vec):
+    try:
+        return await classifier.classify(input_vec)
+    except UndefinedMappingError:
+        return None
+
+
+def _run_requests(micro_batcher, input_mat):
+    async def run():
+        async with micro_batcher:
+            return await asyncio.gather(
+                *[micro_batcher.score(input_vec) for input_vec in input_mat],
+                *[
+                    _classify_or_none(micro_batcher, input_vec)
+                    for input_vec in input_mat
+                ])
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("use_processes", (False, True))
+def test_matches_score_batch(use_processes):
+    # ops from logical_ops' registry, must reach worker processes pickled
+    system = make_system(logical_and_strat=logical_and_hamacher,
+                         logical_or_strat=logical_or_lukasiewicz)
+    input_mat = make_input_mat(50, 3)
+    results = _run_requests(
+        MicroBatcher(system, max_batch_size=16, use_processes=use_processes),
+        input_mat)
+    score_mat = system.score_batch(input_mat)
+    assert np.array_equal(
+        [list(score_array.values()) for score_array in results[:50]],
+        score_mat)
+    labels = system.classify_batch(input_mat)
+    assert results[50:] == [
+        None if label is np.ma.masked else label for label in labels
+    ]
+
+
+@pytest.mark.parametrize("bad_input_vec",
+                         ([0.5, 0.5], [0.5, 0.5, 0.5, 0.5], [0.5, 1.5, 0.5],
+                          [0.5, np.nan, 0.5]))
+def test_bad_input_fails_only_its_request(bad_input_vec):
+    system = make_system()
+    input_mat = make_input_mat(10, 3)
+
+    async def run():
+        async with MicroBatcher(system, max_batch_size=4) as micro_batcher:
+            return await asyncio.gather(*[
+                micro_batcher.score(input_vec)
+                for input_vec in [bad_input_vec] + list(input_mat)
+            ],
+                                        return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert isinstance(results[0], ValueError)
+    assert np.array_equal(
+        [list(score_array.values()) for score_array in results[1:]],
+        system.score_batch(input_mat))
+
+
+def test_aclose_finishes_pending_requests():
+    system = make_system()
+    input_mat = make_input_mat(5, 3)
+
+    async def run():
+        micro_batcher = MicroBatcher(system, max_latency_s=60.0)
+        tasks = [
+            asyncio.ensure_future(micro_batcher.score(input_vec))
+            for input_vec in input_mat
+        ]
+        # let the requests be submitted
+        await asyncio.sleep(0)
+        await micro_batcher.aclose()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(run())
+    assert np.array_equal(
+        [list(score_array.values()) for score_array in results],
+        system.score_batch(input_mat))
@@ -0,0 +1,78 @@
+import numpy as np
+
+from zadeh.aggregation import IMPLICATIONS
+from zadeh.logical_ops import T_CONORMS, T_NORMS
+from zadeh.parallel_eval import ParallelSystemEvaluator, evaluate_systems
+
+from .util import (AGGREGATION_STRATS, CLASS_LABELS, make_input_mat,
+                   make_system)
+
+
+def _make_systems():
+    # every op, aggregation strat and implication, all pickled to the workers
+    systems = []
+    for (and_idx, logical_and_strat) in enumerate(T_NORMS):
+        for (aggregation_idx, aggregation_strat) in \
+                enumerate(AGGREGATION_STRATS):
+            implication = IMPLICATIONS[aggregation_idx % len(IMPLICATIONS)]
+            systems.append(
+                make_system(
+                    logical_and_strat=logical_and_strat,
+                    logical_or_strat=T_CONORMS[and_idx % len(T_CONORMS)],
+                    aggregation_strat=aggregation_strat(implication),
+                    seed=len(systems)))
+    return systems
+
+
+def _assert_evaluations_equal(evaluations, expected_evaluations):
+    assert len(evaluations) == len(expected_evaluations)
+    for (evaluation, expected_evaluation) in zip(evaluations,
+                                                 expected_evaluations):
+        assert np.array_equal(evaluation.score_mat,
+                              expected_evaluation.score_mat)
+        assert evaluation.accuracy == expected_evaluation.accuracy
+        assert evaluation.complexity == expected_evaluation.complexity
+
+
+def test_matches_serial_evaluation():
+    systems = _make_systems()
+    input_mat = make_input_mat(50, 3)
+    true_labels = np.random.default_rng(0).choice(CLASS_LABELS, size=50)
+    expected_evaluations = evaluate_systems(systems,
+                                            input_mat,
+                                            true_labels,
+                                            num_workers=1)
+    assert np.array_equal(expected_evaluations[0].score_mat,
+                          systems[0].score_batch(input_mat))
+    with ParallelSystemEvaluator(input_mat, true_labels,
+                                 num_workers=2) as evaluator:
+        # pool and shared dataset are reused between calls
+        for _ in range(2):
+            _assert_evaluations_equal(evaluator.evaluate(systems),
+                                      expected_evaluations)
+
+
+def test_conjunctive_systems():
+    # no complexity for conjunctive antecedents, must not fail the batch
+    systems = [make_system("cnf"), make_system("conjunctive", seed=1)]
+    input_mat = make_input_mat(30, 3)
+    true_labels = np.random.default_rng(0).choice(CLASS_LABELS, size=30)
+    for num_workers in (1, 2):
+        (cnf_evaluation, conjunctive_evaluation) = evaluate_systems(
+            systems, input_mat, true_labels, num_workers=num_workers)
+        assert cnf_evaluation.complexity == systems[0].calc_complexity()
+        assert conjunctive_evaluation.complexity is None
+        assert conjunctive_evaluation.accuracy == systems[1].evaluate(
+            input_mat, true_labels).accuracy
+
+
+def test_micro_batching_system_can_be_evaluated():
+    system = make_system()
+    system.enable_micro_batching()
+    input_mat = make_input_mat(20, 3)
+    try:
+        (evaluation, ) = evaluate_systems([system], input_mat, num_workers=2)
+    finally:
+        system.disable_micro_batching()
+    assert np.array_equal(evaluation.score_mat, system.score_batch(input_mat))
+    assert evaluation.accuracy is None
@@ -0,0 +1,216 @@
+import numpy as np
+import pytest
+
+from zadeh.aggregation import MaximumAggregation, WeightedAvgAggregation
+from zadeh.antecedent import CNFAntecedent
+from zadeh.inference_engine import InferenceEngine
+from zadeh.linguistic_var import StrongFuzzyPartition
+from zadeh.logical_ops import logical_and_min, logical_or_max
+from zadeh.pruning import prune_rule_base
+from zadeh.rule import FuzzyRule
+from zadeh.rule_base import FuzzyRuleBase
+
+from .util import (CLASS_LABELS, DOMAIN, RULE_BASE_KINDS, make_input_mat,
+                   make_system)
+
+_A = {"a": 1.0, "b": 0.0, "c": 0.0}
+_B = {"a": 0.0, "b": 1.0, "c": 0.0}
+
+
+def _make_ling_vars():
+    # apexes at 0, 0.5, 1
+    return [
+        StrongFuzzyPartition(DOMAIN, 3, f"x{feature_idx}")
+        for feature_idx in range(2)
+    ]
+
+
+def _make_rule(membership_func_usages, consequent):
+    return FuzzyRule(CNFAntecedent(membership_func_usages), dict(consequent))
+
+
+def _make_engine(aggregation_strat=None):
+    return InferenceEngine(
+        CLASS_LABELS, logical_and_min, logical_or_max,
+        aggregation_strat
+        if aggregation_strat is not None else MaximumAggregation())
+
+
+def _make_grid(x0_max=1.0):
+    return np.array([(x0, x1) for x0 in np.linspace(DOMAIN.min, x0_max, 11)
+                     for x1 in np.linspace(DOMAIN.min, DOMAIN.max, 11)])
+
+
+def _assert_same_labels(inference_engine, ling_vars, rule_base,
+                        other_rule_base, input_mat):
+    labels = inference_engine.classify_batch(ling_vars, rule_base, input_mat)
+    other_labels = inference_engine.classify_batch(ling_vars,
+                                                   other_rule_base, input_mat)
+    np.testing.assert_array_equal(np.ma.getmaskarray(labels),
+                                  np.ma.getmaskarray(other_labels))
+    np.testing.assert_array_equal(labels.compressed(),
+                                  other_labels.compressed())
+
+
+def test_removes_dead_rules():
+    ling_vars = _make_ling_vars()
+    rules = [
+        _make_rule([(1, 0, 0), (1, 1, 1)], _A),
+        # only fires for x0 > 0.5
+        _make_rule([(0, 0, 1), (1, 1, 1)], _B),
+        _make_rule([(0, 1, 0), (1, 1, 1)], _B)
+    ]
+    report = prune_rule_base(_make_engine(),
+                             ling_vars,
+                             FuzzyRuleBase(rules),
+                             _make_grid(x0_max=0.45),
+                             remove_dominated=False,
+                             merge=False,
+                             num_timing_repeats=1)
+    assert report.removed_rule_idxs == [1]
+    assert report.merged_rule_idxs == []
+    assert list(report.rule_base) == [rules[0], rules[2]]
+
+
+def test_removes_dominated_rules():
+    ling_vars = _make_ling_vars()
+    rules = [
+        _make_rule([(1, 0, 0), (0, 1, 0)], _A),
+        # superset of rule 0
+        _make_rule([(1, 1, 0), (0, 1, 0)], _A),
+        # equal to rule 1, so dominated by it
+        _make_rule([(1, 1, 0), (0, 1, 0)], _A),
+        # superset of rule 0 with other consequent, dominates nothing
+        _make_rule([(1, 1, 1), (1, 1, 1)], _B)
+    ]
+    inference_engine = _make_engine()
+    input_mat = _make_grid()
+    report = prune_rule_base(inference_engine,
+                             ling_vars,
+                             FuzzyRuleBase(rules),
+                             input_mat,
+                             merge=False,
+                             num_timing_repeats=1)
+    assert report.removed_rule_idxs == [0, 2]
+    assert list(report.rule_base) == [rules[1], rules[3]]
+    # max aggregated scores do not change anywhere
+    np.testing.assert_array_equal(
+        inference_engine.score_batch(ling_vars, report.rule_base, input_mat),
+        inference_engine.score_batch(ling_vars, FuzzyRuleBase(rules),
+                                     input_mat))
+
+
+def test_merges_rules_differing_in_one_feature():
+    ling_vars = _make_ling_vars()
+    rules = [
+        _make_rule([(1, 0, 0), (0, 1, 0)], _A),
+        _make_rule([(0, 0, 1), (1, 0, 0)], _B),
+        _make_rule([(0, 1, 0), (0, 1, 0)], _A)
+    ]
+    inference_engine = _make_engine()
+    input_mat = _make_grid()
+    report = prune_rule_base(inference_engine,
+                             ling_vars,
+                             FuzzyRuleBase(rules),
+                             input_mat,
+                             num_timing_repeats=1)
+    assert report.removed_rule_idxs == []
+    assert report.merged_rule_idxs == [(0, 2)]
+    assert list(report.rule_base) == [
+        _make_rule([(1, 1, 0), (0, 1, 0)], _A), rules[1]
+    ]
+    np.testing.assert_array_equal(
+        inference_engine.score_batch(ling_vars, report.rule_base, input_mat),
+        inference_engine.score_batch(ling_vars, FuzzyRuleBase(rules),
+                                     input_mat))
+
+
+def test_only_removes_dead_rules_without_max_aggregation():
+    ling_vars = _make_ling_vars()
+    rules = [
+        _make_rule([(1, 0, 0), (0, 1, 0)], _A),
+        _make_rule([(1, 1, 0), (0, 1, 0)], _A),
+        _make_rule([(0, 1, 0), (0, 1, 0)], _A),
+        _make_rule([(0, 0, 1), (1, 0, 0)], _B)
+    ]
+    report = prune_rule_base(_make_engine(WeightedAvgAggregation()),
+                             ling_vars,
+                             FuzzyRuleBase(rules),
+                             _make_grid(),
+                             num_timing_repeats=1)
+    assert report.removed_rule_idxs == []
+    assert report.merged_rule_idxs == []
+    assert list(report.rule_base) == rules
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_keeps_labels_on_held_out_inputs(seed):
+    system = make_system(num_rules=80, seed=seed)
+    (inference_engine, ling_vars, rule_base) = (system.inference_engine,
+                                                system.ling_vars,
+                                                system.rule_base)
+    input_mat = make_input_mat(100, 3, seed=seed)
+    held_out_input_mat = make_input_mat(500, 3, seed=seed + 100)
+    report = prune_rule_base(inference_engine,
+                             ling_vars,
+                             rule_base,
+                             input_mat,
+                             num_timing_repeats=1)
+    _assert_same_labels(inference_engine, ling_vars, rule_base,
+                        report.rule_base, input_mat)
+
+    # dead rules are only dead on input_mat, but removing dominated rules
+    # and merging keep max aggregated scores identical everywhere
+    rules = list(rule_base)
+    compiled_rule_base = rule_base.compile(ling_vars, CLASS_LABELS)
+    matching_degree_mat = inference_engine.compute_matching_degree_mat(
+        compiled_rule_base,
+        inference_engine.fuzzify_batch(ling_vars, input_mat))
+    live_rule_base = FuzzyRuleBase([
+        rule for (rule, is_live) in zip(
+            rules, np.any(matching_degree_mat != 0, axis=0)) if is_live
+    ])
+    np.testing.assert_array_equal(
+        inference_engine.score_batch(ling_vars, report.rule_base,
+                                     held_out_input_mat),
+        inference_engine.score_batch(ling_vars, live_rule_base,
+                                     held_out_input_mat))
+
+
+@pytest.mark.parametrize("kind", RULE_BASE_KINDS)
+def test_report_fields(kind):
+    system = make_system(kind, num_rules=60)
+    rule_base = system.rule_base
+    report = prune_rule_base(system.inference_engine,
+                             system.ling_vars,
+                             rule_base,
+                             make_input_mat(100, 3),
+                             num_timing_repeats=2)
+    assert report.num_rules_before == len(rule_base)
+    assert report.num_rules_after == len(report.rule_base)
+
+    # every original rule is either removed, merged or kept as is
+    assert report.removed_rule_idxs == sorted(report.removed_rule_idxs)
+    merged_rule_idxs = [
+        rule_idx for rule_idxs in report.merged_rule_idxs
+        for rule_idx in rule_idxs
+    ]
+    assert set(report.removed_rule_idxs).isdisjoint(merged_rule_idxs)
+    num_kept = len(rule_base) - len(report.removed_rule_idxs) - \
+        len(merged_rule_idxs)
+    assert report.num_rules_after == num_kept + len(report.merged_rule_idxs)
+
+    if kind == "cnf":
+        assert report.num_rules_after < report.num_rules_before
+        assert report.complexity_before == \
+            rule_base.calc_num_spec_fuzzy_decision_regions()
+        assert report.complexity_after == \
+            report.rule_base.calc_num_spec_fuzzy_decision_regions()
+        assert report.complexity_after <= report.complexity_before
+    else:
+        assert report.complexity_before is None
+        assert report.complexity_after is None
+    assert report.classify_time_before_s > 0
+    assert report.classify_time_after_s > 0
+    assert report.speedup == pytest.approx(report.classify_time_before_s /
+                                           report.classify_time_after_s)
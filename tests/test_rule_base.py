@@ -0,0 +1,98 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from zadeh import antecedent
+from zadeh.antecedent import CNFAntecedent
+from zadeh.consequent import ConsequentRow
+from zadeh.rule import FuzzyRule
+from zadeh.rule_base import FuzzyRuleBase
+
+from .util import (CLASS_LABELS, RULE_BASE_KINDS, make_input_mat,
+                   make_system)
+
+
+def _make_duplicated_rule_base(rule_base):
+    """Rule base with every antecedent used twice, as distinct (equal)
+    objects."""
+    rules = list(rule_base)
+    return FuzzyRuleBase(rules + [
+        FuzzyRule(pickle.loads(pickle.dumps(rule.antecedent)),
+                  dict(rules[0].consequent)) for rule in rules
+    ])
+
+
+@pytest.mark.parametrize("kind", RULE_BASE_KINDS)
+def test_compact_keeps_rules_and_scores(kind):
+    system = make_system(kind)
+    rule_base = _make_duplicated_rule_base(system.rule_base)
+    compact_rule_base = rule_base.compact()
+    assert compact_rule_base == rule_base
+    assert len(compact_rule_base) == len(rule_base)
+
+    engine = system.inference_engine
+    input_mat = make_input_mat(100, 3)
+    np.testing.assert_array_equal(
+        engine.score_batch(system.ling_vars, compact_rule_base, input_mat),
+        engine.score_batch(system.ling_vars, rule_base, input_mat))
+    for input_vec in input_mat[:20].tolist():
+        assert engine.score(system.ling_vars, compact_rule_base,
+                            input_vec) == engine.score(
+                                system.ling_vars, rule_base, input_vec)
+
+
+@pytest.mark.parametrize("kind", RULE_BASE_KINDS)
+def test_compact_shares_antecedents_and_consequent_table(kind):
+    rule_base = _make_duplicated_rule_base(make_system(kind).rule_base)
+    compact_rules = list(rule_base.compact())
+    antecedent_objs = {}
+    for rule in compact_rules:
+        assert antecedent_objs.setdefault(rule.antecedent,
+                                          rule.antecedent) is rule.antecedent
+    assert len({id(rule.antecedent) for rule in compact_rules}) == \
+        len({rule.antecedent for rule in rule_base})
+
+    assert all([isinstance(rule.consequent, ConsequentRow)
+                for rule in compact_rules])
+    table = compact_rules[0].consequent.table
+    assert all([rule.consequent.table is table for rule in compact_rules])
+    assert [rule.consequent.row_idx for rule in compact_rules] == \
+        list(range(len(compact_rules)))
+    assert not table.consequent_mat.flags.writeable
+
+
+def test_compact_class_labels():
+    rule_base = make_system().rule_base
+    class_labels = ("c", "a")
+    compact_rule_base = rule_base.compact(class_labels)
+    for (rule, compact_rule) in zip(rule_base, compact_rule_base):
+        assert tuple(compact_rule.consequent.keys()) == class_labels
+        assert dict(compact_rule.consequent) == {
+            class_label: rule.consequent[class_label]
+            for class_label in class_labels
+        }
+    # defaults to the consequent keys of the first rule
+    assert tuple(next(iter(
+        rule_base.compact())).consequent.keys()) == CLASS_LABELS
+
+
+def test_compact_rule_base_pickles():
+    rule_base = make_system().rule_base.compact()
+    assert pickle.loads(pickle.dumps(rule_base)) == rule_base
+
+
+def test_antecedent_caches_are_bounded():
+    for num_mfs in range(2, 600):
+        CNFAntecedent([(1, ) + (0, ) * (num_mfs - 1)])
+    for packed_usage in range(1, 5000):
+        CNFAntecedent([[(packed_usage >> mf_idx) & 1 for mf_idx in range(13)]
+                       ]).calc_num_spec_fuzzy_decision_regions()
+    assert antecedent._share_num_membership_funcs.cache_info().currsize <= \
+        antecedent._share_num_membership_funcs.cache_info().maxsize
+    assert antecedent._get_active_mf_idxs.cache_info().currsize <= \
+        antecedent._get_active_mf_idxs.cache_info().maxsize
+    # equal layouts still share one tuple
+    (first, second) = (CNFAntecedent([(1, 0), (0, 1, 1)]),
+                       CNFAntecedent([(0, 1), (1, 1, 1)]))
+    assert first._num_membership_funcs is second._num_membership_funcs
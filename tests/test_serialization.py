@@ -0,0 +1,147 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from zadeh.domain import Domain
+from zadeh.inference_engine import DEBUG_MODE, FAST_MODE
+from zadeh.linguistic_var import LinguisticVar, StrongFuzzyPartition
+from zadeh.membership_func import (GaussianMembershipFunc,
+                                   GeneralizedBellMembershipFunc,
+                                   SigmoidMembershipFunc,
+                                   TrapezoidalMembershipFunc,
+                                   TriangularMembershipFunc,
+                                   make_triangular_membership_func)
+from zadeh.serialization import load_system, save_system
+from zadeh.system import FuzzyRuleBasedSystem
+
+from .util import (make_input_mat, make_system, parametrize_aggregation,
+                   parametrize_logical_ops)
+
+
+def _assert_same_scores(system, loaded_system, input_mat):
+    assert np.array_equal(loaded_system.score_batch(input_mat),
+                          system.score_batch(input_mat))
+    for input_vec in input_mat[:10]:
+        assert loaded_system.score(input_vec) == system.score(input_vec)
+
+
+def _save_and_load(system, tmp_path, mmap=True):
+    path = tmp_path / "system.zfrb"
+    save_system(system, path)
+    return load_system(path, mmap=mmap)
+
+
+@parametrize_aggregation
+@pytest.mark.parametrize("mmap", (True, False))
+def test_round_trip(tmp_path, kind, aggregation_strat, implication, mmap):
+    system = make_system(kind,
+                         aggregation_strat=aggregation_strat(implication))
+    loaded_system = _save_and_load(system, tmp_path, mmap)
+    loaded_engine = loaded_system.inference_engine
+    assert loaded_engine.class_labels == system.inference_engine.class_labels
+    assert type(loaded_engine.aggregation_strat) is aggregation_strat
+    assert loaded_engine.aggregation_strat.implication is implication
+    assert [ling_var.name for ling_var in loaded_system.ling_vars] == \
+        [ling_var.name for ling_var in system.ling_vars]
+    assert len(loaded_system.rule_base) == len(system.rule_base)
+    _assert_same_scores(system, loaded_system, make_input_mat(60, 3))
+
+
+@parametrize_logical_ops
+@pytest.mark.parametrize("mode", (DEBUG_MODE, FAST_MODE))
+def test_round_trip_engine_config(tmp_path, logical_and_strat,
+                                  logical_or_strat, mode):
+    system = make_system(logical_and_strat=logical_and_strat,
+                         logical_or_strat=logical_or_strat,
+                         mode=mode,
+                         use_rule_activation_index=False)
+    loaded_system = _save_and_load(system, tmp_path)
+    loaded_engine = loaded_system.inference_engine
+    assert loaded_engine.logical_and_strat is logical_and_strat
+    assert loaded_engine.logical_or_strat is logical_or_strat
+    assert loaded_engine.mode == mode
+    assert not loaded_engine.use_rule_activation_index
+    _assert_same_scores(system, loaded_system, make_input_mat(40, 3))
+
+
+def test_loaded_system_can_be_pickled(tmp_path):
+    system = make_system()
+    loaded_system = pickle.loads(
+        pickle.dumps(_save_and_load(system, tmp_path)))
+    _assert_same_scores(system, loaded_system, make_input_mat(40, 3))
+
+
+def test_not_a_system_file(tmp_path):
+    path = tmp_path / "system.zfrb"
+    path.write_bytes(b"not a zadeh system file")
+    with pytest.raises(ValueError):
+        load_system(path)
+
+
+def _make_closed_form_ling_vars():
+    domain = Domain(0.0, 1.0)
+    return [
+        StrongFuzzyPartition(domain, 4, "x0",
+                             ["lo", "mid_lo", "mid_hi", "hi"]),
+        LinguisticVar([
+            TriangularMembershipFunc(domain, 0.0, 0.0, 0.5, "lo"),
+            TrapezoidalMembershipFunc(domain, 0.1, 0.3, 0.6, 0.8, "mid_lo"),
+            GaussianMembershipFunc(domain, 0.6, 0.15, "mid_hi"),
+            SigmoidMembershipFunc(domain, 12.0, 0.75, "hi")
+        ], "x1"),
+        LinguisticVar([
+            GeneralizedBellMembershipFunc(domain, 0.2, 2.0, center,
+                                          f"mf{idx}")
+            for (idx, center) in enumerate(np.linspace(0.0, 1.0, 3))
+        ] + [make_triangular_membership_func(domain, 0.5, 1.0, 1.0, "mf3")],
+                      "x2")
+    ]
+
+
+@pytest.mark.parametrize("mmap", (True, False))
+def test_round_trip_closed_form_membership_funcs(tmp_path, mmap):
+    system = make_system()
+    ling_vars = _make_closed_form_ling_vars()
+    system = FuzzyRuleBasedSystem(system.inference_engine, ling_vars,
+                                  system.rule_base)
+    loaded_system = _save_and_load(system, tmp_path, mmap)
+    for (ling_var, loaded_ling_var) in zip(ling_vars,
+                                           loaded_system.ling_vars):
+        assert type(loaded_ling_var) is type(ling_var)
+        assert loaded_ling_var.name == ling_var.name
+        for (membership_func, loaded_membership_func) in zip(
+                ling_var.membership_funcs, loaded_ling_var.membership_funcs):
+            assert type(loaded_membership_func) is type(membership_func)
+            assert loaded_membership_func.name == membership_func.name
+            assert loaded_membership_func.domain == membership_func.domain
+            assert str(loaded_membership_func) == str(membership_func)
+    assert loaded_system.ling_vars[0].apex_xs == ling_vars[0].apex_xs
+    _assert_same_scores(system, loaded_system, make_input_mat(60, 3))
+
+
+class _CustomMembershipFunc(GaussianMembershipFunc):
+    pass
+
+
+def test_unsupported_membership_func(tmp_path):
+    system = make_system()
+    ling_vars = list(system.ling_vars)
+    ling_vars[0] = LinguisticVar([
+        _CustomMembershipFunc(Domain(0.0, 1.0), mean, 0.2, f"mf{idx}")
+        for (idx, mean) in enumerate(np.linspace(0.0, 1.0, 4))
+    ], "x0")
+    with pytest.raises(ValueError):
+        save_system(
+            FuzzyRuleBasedSystem(system.inference_engine, ling_vars,
+                                 system.rule_base), tmp_path / "system.zfrb")
+
+
+def _logical_and_custom(membership_vals):
+    return min(membership_vals)
+
+
+def test_unsupported_logical_op(tmp_path):
+    system = make_system(logical_and_strat=_logical_and_custom)
+    with pytest.raises(ValueError):
+        save_system(system, tmp_path / "system.zfrb")
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from zadeh import aggregation
+from zadeh.aggregation import IMPLICATIONS, AggregationStrategyABC
+from zadeh.logical_ops import logical_and_drastic, logical_or_hamacher
+from zadeh.sharding import ShardedScorer
+
+from .util import AGGREGATION_STRATS, make_input_mat, make_system, param_id
+
+NUM_RULES = 100
+
+
+class _SumOfSquaresAggregation(AggregationStrategyABC):
+    """Not chunked, so aggregated in the parent process."""
+    def aggregate(self, matching_degrees, consequent_mat):
+        return np.minimum((matching_degrees**2) @ consequent_mat, 1.0)
+
+
+@pytest.fixture(autouse=True)
+def small_rule_chunks(monkeypatch):
+    # many chunks per shard, and a partial last chunk
+    monkeypatch.setattr(aggregation, "RULE_CHUNK_SIZE", 16)
+
+
+def _assert_sharded_matches_unsharded(system, num_shards):
+    input_mat = make_input_mat(80, 3)
+    with system.build_sharded_scorer(num_shards) as sharded_scorer:
+        assert sharded_scorer.num_shards == min(num_shards,
+                                                -(-NUM_RULES // 16))
+        assert np.array_equal(sharded_scorer.score_batch(input_mat),
+                              system.score_batch(input_mat))
+        assert sharded_scorer.classify_batch(input_mat).tolist() == \
+            system.classify_batch(input_mat).tolist()
+
+
+@pytest.mark.parametrize("aggregation_strat",
+                         AGGREGATION_STRATS + (_SumOfSquaresAggregation, ),
+                         ids=param_id)
+@pytest.mark.parametrize("implication", IMPLICATIONS, ids=param_id)
+def test_matches_unsharded(aggregation_strat, implication):
+    system = make_system(aggregation_strat=aggregation_strat(implication),
+                         num_rules=NUM_RULES)
+    _assert_sharded_matches_unsharded(system, 3)
+
+
+def test_matches_unsharded_with_registered_ops():
+    system = make_system(logical_and_strat=logical_and_drastic,
+                         logical_or_strat=logical_or_hamacher,
+                         aggregation_strat=aggregation.AvgAggregation(),
+                         num_rules=NUM_RULES)
+    _assert_sharded_matches_unsharded(system, 2)
+
+
+@pytest.mark.parametrize("num_shards", (1, 4, 7, 50))
+def test_shard_bounds(num_shards):
+    system = make_system(num_rules=NUM_RULES)
+    with ShardedScorer(system.inference_engine, system.ling_vars,
+                       system.rule_base, num_shards) as sharded_scorer:
+        shard_bounds = sharded_scorer.shard_bounds
+        assert shard_bounds[0][0] == 0
+        assert shard_bounds[-1][1] == NUM_RULES
+        for ((_, stop), (start, _)) in zip(shard_bounds, shard_bounds[1:]):
+            assert stop == start
+            assert start % 16 == 0
+        assert len(shard_bounds) == min(num_shards, -(-NUM_RULES // 16))
@@ -0,0 +1,152 @@
+import csv
+
+import numpy as np
+import pytest
+
+from zadeh.inference_engine import DEBUG_MODE, FAST_MODE
+from zadeh.streaming import (classify_csv, classify_npy, iter_csv_chunks,
+                             iter_npy_chunks)
+
+from .util import CLASS_LABELS, make_input_mat, make_system
+
+_NUM_SAMPLES = 50
+
+
+def _read_out_csv(out_path):
+    with open(out_path, "r", newline="") as fp:
+        rows = list(csv.reader(fp))
+    assert rows[0] == ["row", "label", "undefined", "invalid"] + \
+        [f"score_{class_label}" for class_label in CLASS_LABELS]
+    return rows[1:]
+
+
+def _assert_matches_classify_batch(system, input_mat, out_rows):
+    labels = system.classify_batch(input_mat)
+    score_mat = system.score_batch(input_mat)
+    assert len(out_rows) == len(input_mat)
+    for (row_idx, out_row) in enumerate(out_rows):
+        assert int(out_row[0]) == row_idx
+        assert out_row[3] == "0"
+        is_undefined = bool(np.ma.getmaskarray(labels)[row_idx])
+        assert out_row[2] == str(int(is_undefined))
+        assert out_row[1] == ("" if is_undefined else labels.data[row_idx])
+        # written with repr(), so exact
+        assert [float(val) for val in out_row[4:]] == \
+            score_mat[row_idx].tolist()
+
+
+def _write_csv(csv_path, rows, header=None):
+    with open(csv_path, "w", newline="") as fp:
+        writer = csv.writer(fp)
+        if header is not None:
+            writer.writerow(header)
+        writer.writerows(rows)
+
+
+@pytest.mark.parametrize("chunk_size", (1, 7, _NUM_SAMPLES, 1000))
+@pytest.mark.parametrize("mode", (DEBUG_MODE, FAST_MODE))
+def test_csv_matches_classify_batch(tmp_path, chunk_size, mode):
+    system = make_system(num_rules=10, mode=mode)
+    input_mat = make_input_mat(_NUM_SAMPLES, 3)
+    in_path = tmp_path / "in.csv"
+    _write_csv(in_path, [[repr(val) for val in input_vec]
+                         for input_vec in input_mat.tolist()])
+    counts = classify_csv(system, in_path, tmp_path / "out.csv", chunk_size)
+    _assert_matches_classify_batch(system, input_mat,
+                                   _read_out_csv(tmp_path / "out.csv"))
+    assert counts.num_rows == _NUM_SAMPLES
+    assert counts.num_undefined == \
+        np.count_nonzero(np.ma.getmaskarray(system.classify_batch(input_mat)))
+    assert counts.num_undefined > 0
+    assert counts.num_invalid == 0
+
+
+@pytest.mark.parametrize("chunk_size", (1, 7, _NUM_SAMPLES, 1000))
+def test_npy_matches_classify_batch(tmp_path, chunk_size):
+    system = make_system(num_rules=10)
+    input_mat = make_input_mat(_NUM_SAMPLES, 3)
+    np.save(tmp_path / "in.npy", input_mat)
+    counts = classify_npy(system, tmp_path / "in.npy", tmp_path / "out.csv",
+                          chunk_size)
+    _assert_matches_classify_batch(system, input_mat,
+                                   _read_out_csv(tmp_path / "out.csv"))
+    assert counts.num_rows == _NUM_SAMPLES
+    assert [len(chunk) for chunk in iter_npy_chunks(
+        tmp_path / "in.npy", chunk_size)][0] == min(chunk_size, _NUM_SAMPLES)
+
+
+def test_csv_header_and_usecols(tmp_path):
+    system = make_system()
+    input_mat = make_input_mat(20, 3)
+    in_path = tmp_path / "in.csv"
+    # features in reverse order, plus an id column
+    _write_csv(in_path,
+               [[str(row_idx)] + [repr(val) for val in input_vec[::-1]]
+                for (row_idx, input_vec) in enumerate(input_mat.tolist())],
+               header=["id", "x2", "x1", "x0"])
+    classify_csv(system,
+                 in_path,
+                 tmp_path / "out.csv",
+                 chunk_size=6,
+                 has_header=True,
+                 usecols=[3, 2, 1])
+    _assert_matches_classify_batch(system, input_mat,
+                                   _read_out_csv(tmp_path / "out.csv"))
+
+
+@pytest.mark.parametrize("chunk_size", (1, 3, 100))
+@pytest.mark.parametrize("mode", (DEBUG_MODE, FAST_MODE))
+def test_bad_rows_reported_in_band(tmp_path, chunk_size, mode):
+    system = make_system(mode=mode)
+    input_mat = make_input_mat(5, 3)
+    in_rows = [[repr(val) for val in input_vec]
+               for input_vec in input_mat.tolist()]
+    bad_rows = [
+        [],  # blank
+        ["0.1", "abc", "0.3"],
+        ["0.1", "0.2"],
+        ["0.1", "0.2", "0.3", "0.4"],
+        ["0.1", "nan", "0.3"],
+        ["0.1", "inf", "0.3"],
+        # outside DOMAIN
+        ["0.1", "1.5", "0.3"],
+        ["-0.1", "0.2", "0.3"]
+    ]
+    # good, bad, good, bad, ...
+    rows = [row for pair in zip(in_rows, bad_rows) for row in pair] + \
+        bad_rows[len(in_rows):]
+    _write_csv(tmp_path / "in.csv", rows)
+    counts = classify_csv(system, tmp_path / "in.csv", tmp_path / "out.csv",
+                          chunk_size)
+    assert counts.num_rows == len(rows)
+    assert counts.num_invalid == len(bad_rows)
+
+    out_rows = _read_out_csv(tmp_path / "out.csv")
+    assert [int(out_row[0]) for out_row in out_rows] == list(range(len(rows)))
+    good_out_rows = [out_rows[row_idx * 2] for row_idx in range(len(in_rows))]
+    bad_out_rows = [
+        out_row for (row_idx, out_row) in enumerate(out_rows)
+        if row_idx not in range(0, len(in_rows) * 2, 2)
+    ]
+    for out_row in bad_out_rows:
+        assert out_row[1:] == ["", "0", "1"] + [""] * len(CLASS_LABELS)
+    # good rows scored as if alone
+    _assert_matches_classify_batch(system, input_mat, [
+        [str(row_idx)] + out_row[1:]
+        for (row_idx, out_row) in enumerate(good_out_rows)
+    ])
+
+
+def test_csv_chunks_keep_row_numbering(tmp_path):
+    _write_csv(tmp_path / "in.csv", [[], [], ["0.1", "0.2"], [], ["x", "1"]])
+    chunks = list(iter_csv_chunks(tmp_path / "in.csv", chunk_size=2))
+    assert [chunk.shape for chunk in chunks] == [(2, 2), (2, 2), (1, 2)]
+    input_mat = np.concatenate(chunks)
+    assert input_mat[2].tolist() == [0.1, 0.2]
+    assert np.all(np.isnan(np.delete(input_mat, 2, axis=0)))
+
+
+def test_wrong_num_of_features_raises(tmp_path):
+    np.save(tmp_path / "in.npy", make_input_mat(5, 2))
+    with pytest.raises(ValueError):
+        classify_npy(make_system(), tmp_path / "in.npy", tmp_path / "out.csv")
@@ -0,0 +1,143 @@
+"""Small random systems and datasets shared by the tests."""
+import numpy as np
+import pytest
+
+from zadeh.aggregation import (IMPLICATIONS, AvgAggregation,
+                               BiasedAvgAggregation, BoundedSumAggregation,
+                               MaximumAggregation, WeightedAvgAggregation)
+from zadeh.antecedent import UNSPECIFIED, CNFAntecedent, ConjunctiveAntecedent
+from zadeh.domain import Domain
+from zadeh.inference_engine import InferenceEngine
+from zadeh.linguistic_var import LinguisticVar
+from zadeh.logical_ops import (T_CONORMS, T_NORMS, logical_and_min,
+                               logical_or_max)
+from zadeh.membership_func import (make_trapezoidal_membership_func,
+                                   make_triangular_membership_func)
+from zadeh.rule import FuzzyRule
+from zadeh.rule_base import FuzzyRuleBase
+from zadeh.system import FuzzyRuleBasedSystem
+
+DOMAIN = Domain(0.0, 1.0)
+CLASS_LABELS = ("a", "b", "c")
+RULE_BASE_KINDS = ("cnf", "conjunctive")
+AGGREGATION_STRATS = (MaximumAggregation, BoundedSumAggregation,
+                      AvgAggregation, BiasedAvgAggregation,
+                      WeightedAvgAggregation)
+
+
+def param_id(obj):
+    """pytest param id of a func / class."""
+    return obj.__name__
+
+
+def parametrize_aggregation(test_func):
+    """Runs test_func for every kind, aggregation_strat and implication."""
+    test_func = pytest.mark.parametrize("implication",
+                                        IMPLICATIONS,
+                                        ids=param_id)(test_func)
+    test_func = pytest.mark.parametrize("aggregation_strat",
+                                        AGGREGATION_STRATS,
+                                        ids=param_id)(test_func)
+    return pytest.mark.parametrize("kind", RULE_BASE_KINDS)(test_func)
+
+
+def parametrize_logical_ops(test_func):
+    """Runs test_func for every logical_and_strat and logical_or_strat."""
+    test_func = pytest.mark.parametrize("logical_or_strat",
+                                        T_CONORMS,
+                                        ids=param_id)(test_func)
+    return pytest.mark.parametrize("logical_and_strat", T_NORMS,
+                                   ids=param_id)(test_func)
+
+
+def make_ling_vars(num_features, num_mfs, rng):
+    """Uniform partition of DOMAIN per feature, some inner membership funcs
+    trapezoidal."""
+    apexes = np.linspace(DOMAIN.min, DOMAIN.max, num_mfs)
+    ling_vars = []
+    for feature_idx in range(num_features):
+        membership_funcs = []
+        for mf_idx in range(num_mfs):
+            lhs = apexes[max(mf_idx - 1, 0)]
+            apex = apexes[mf_idx]
+            rhs = apexes[min(mf_idx + 1, num_mfs - 1)]
+            if 0 < mf_idx < num_mfs - 1 and rng.random() < 0.3:
+                membership_funcs.append(
+                    make_trapezoidal_membership_func(DOMAIN, lhs,
+                                                     (lhs + apex) / 2,
+                                                     (apex + rhs) / 2, rhs,
+                                                     f"mf{mf_idx}"))
+            else:
+                membership_funcs.append(
+                    make_triangular_membership_func(DOMAIN, lhs, apex, rhs,
+                                                    f"mf{mf_idx}"))
+        ling_vars.append(LinguisticVar(membership_funcs, f"x{feature_idx}"))
+    return ling_vars
+
+
+def make_rule(kind, ling_vars, rng):
+    if kind == "cnf":
+        membership_func_usages = []
+        for ling_var in ling_vars:
+            num_mfs = ling_var.num_membership_funcs
+            if rng.random() < 0.2:
+                # all membership funcs, i.e. feature effectively unused
+                usage = [1] * num_mfs
+            else:
+                active_idxs = rng.choice(num_mfs,
+                                         size=rng.integers(1, 3),
+                                         replace=False)
+                usage = [int(idx in active_idxs) for idx in range(num_mfs)]
+            membership_func_usages.append(tuple(usage))
+        antecedent = CNFAntecedent(membership_func_usages)
+    else:
+        membership_func_idxs = [
+            int(rng.integers(ling_var.num_membership_funcs))
+            if rng.random() < 0.7 else UNSPECIFIED for ling_var in ling_vars
+        ]
+        if all([idx == UNSPECIFIED for idx in membership_func_idxs]):
+            membership_func_idxs[0] = 0
+        antecedent = ConjunctiveAntecedent(membership_func_idxs)
+    consequent = {
+        class_label: float(rng.choice([0.0, 1.0, rng.random()]))
+        for class_label in CLASS_LABELS
+    }
+    return FuzzyRule(antecedent, consequent)
+
+
+def make_rule_base(kind, ling_vars, num_rules, rng):
+    return FuzzyRuleBase(
+        [make_rule(kind, ling_vars, rng) for _ in range(num_rules)])
+
+
+def make_system(kind="cnf",
+                logical_and_strat=logical_and_min,
+                logical_or_strat=logical_or_max,
+                aggregation_strat=None,
+                num_features=3,
+                num_mfs=4,
+                num_rules=30,
+                seed=0,
+                **inference_engine_kwargs):
+    rng = np.random.default_rng(seed)
+    ling_vars = make_ling_vars(num_features, num_mfs, rng)
+    rule_base = make_rule_base(kind, ling_vars, num_rules, rng)
+    inference_engine = InferenceEngine(
+        CLASS_LABELS, logical_and_strat, logical_or_strat,
+        aggregation_strat
+        if aggregation_strat is not None else MaximumAggregation(),
+        **inference_engine_kwargs)
+    return FuzzyRuleBasedSystem(inference_engine, ling_vars, rule_base)
+
+
+def make_input_mat(num_samples, num_features, num_mfs=4, seed=0):
+    """Uniform random inputs, a quarter of them on membership func apexes /
+    midpoints between them (where ties and exact zeros / ones happen)."""
+    rng = np.random.default_rng(seed)
+    input_mat = rng.random((num_samples, num_features))
+    apexes = np.linspace(DOMAIN.min, DOMAIN.max, num_mfs)
+    grid = np.concatenate([apexes, (apexes[:-1] + apexes[1:]) / 2])
+    input_mat[:num_samples // 4] = rng.choice(grid,
+                                              size=(num_samples // 4,
+                                                    num_features))
+    return input_mat
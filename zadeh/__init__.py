@@ -0,0 +1,85 @@
+"""Fuzzy rule-based classification.
+
+The main classes and funcs are available from the top level package, e.g.
+zadeh.InferenceEngine; each is only imported (with its submodule) on first
+access (module __getattr__), so `import zadeh` itself does not load NumPy
+or any submodule. Scalar inference (see InferenceEngine) does not load NumPy
+either; batched inference and the tooling around it do."""
+import importlib
+
+# public name -> submodule it is defined in
+_LAZY_ATTRS = {
+    "Domain": "domain",
+    "Point": "membership_func",
+    "PiecewiseLinearMembershipFunc": "membership_func",
+    "TriangularMembershipFunc": "membership_func",
+    "TrapezoidalMembershipFunc": "membership_func",
+    "GaussianMembershipFunc": "membership_func",
+    "GeneralizedBellMembershipFunc": "membership_func",
+    "SigmoidMembershipFunc": "membership_func",
+    "make_triangular_membership_func": "membership_func",
+    "make_trapezoidal_membership_func": "membership_func",
+    "LinguisticVar": "linguistic_var",
+    "StrongFuzzyPartition": "linguistic_var",
+    "UNSPECIFIED": "antecedent",
+    "CNFAntecedent": "antecedent",
+    "ConjunctiveAntecedent": "antecedent",
+    "FuzzyRule": "rule",
+    "FuzzyRuleBase": "rule_base",
+    "CompiledRuleBase": "compiled_rule_base",
+    "InferenceEngine": "inference_engine",
+    "DEBUG_MODE": "inference_engine",
+    "FAST_MODE": "inference_engine",
+    "FuzzyRuleBasedSystem": "system",
+    "UndefinedMappingError": "error",
+    "MaximumAggregation": "aggregation",
+    "BoundedSumAggregation": "aggregation",
+    "AvgAggregation": "aggregation",
+    "BiasedAvgAggregation": "aggregation",
+    "WeightedAvgAggregation": "aggregation",
+    "implication_prod": "aggregation",
+    "implication_min": "aggregation",
+    "implication_lukasiewicz": "aggregation",
+    "logical_and_min": "logical_ops",
+    "logical_and_prod": "logical_ops",
+    "logical_and_lukasiewicz": "logical_ops",
+    "logical_and_hamacher": "logical_ops",
+    "logical_and_drastic": "logical_ops",
+    "logical_or_max": "logical_ops",
+    "logical_or_probor": "logical_ops",
+    "logical_or_lukasiewicz": "logical_ops",
+    "logical_or_hamacher": "logical_ops",
+    "logical_or_drastic": "logical_ops",
+    "register_logical_op": "logical_ops",
+    "save_system": "serialization",
+    "load_system": "serialization",
+    "evaluate": "evaluation",
+    "Evaluator": "evaluation",
+    "IncrementalScorer": "incremental",
+    "DecisionRegionIndex": "decision_regions",
+    "ShardedScorer": "sharding",
+    "prune_rule_base": "pruning",
+    "classify_csv": "streaming",
+    "classify_npy": "streaming",
+    "evaluate_systems": "parallel_eval",
+    "ParallelSystemEvaluator": "parallel_eval"
+}
+
+__all__ = sorted(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    try:
+        submodule_name = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError(
+            f"module {__name__!r} has no attribute {name!r}") from None
+    val = getattr(importlib.import_module(f".{submodule_name}", __name__),
+                  name)
+    # later lookups skip __getattr__
+    globals()[name] = val
+    return val
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS))
@@ -1,108 +1,330 @@
 import abc
 from collections import OrderedDict
 
-from .constants import CONSEQUENT_MAX, CONSEQUENT_MIN, SCORE_MAX, SCORE_MIN
+from .constants import (CONSEQUENT_MAX, CONSEQUENT_MIN, MATCHING_MAX,
+                        MATCHING_MIN, SCORE_MAX, SCORE_MIN)
+from .util import lazy_numpy as np
 
 
-def _init_score_array(class_labels):
-    return OrderedDict(
-        {class_label: SCORE_MIN
-         for class_label in class_labels})
+# aggregation over rules is done in chunks of this many rules, see
+# ChunkedAggregationStrategyABC
+RULE_CHUNK_SIZE = 4096
 
+# implications take matching degree(s) and consequent val(s), as floats or
+# broadcastable arrays, and give the rule's support for the class; all are
+# at most both of their args
 
-def _implication(matching_record, class_label):
-    """Product implication."""
-    consequent_for_class = \
-        matching_record.rule.consequent[class_label]
-    assert CONSEQUENT_MIN <= consequent_for_class <= CONSEQUENT_MAX
-    return matching_record.matching_degree * consequent_for_class
+
+def implication_prod(matching_degrees, consequent_vals):
+    """Larsen (product) implication, the default."""
+    return matching_degrees * consequent_vals
+
+
+def implication_min(matching_degrees, consequent_vals):
+    """Mamdani (min) implication."""
+    return np.minimum(matching_degrees, consequent_vals)
+
+
+def implication_lukasiewicz(matching_degrees, consequent_vals):
+    return np.maximum(MATCHING_MIN,
+                      matching_degrees + consequent_vals - MATCHING_MAX)
+
+
+IMPLICATIONS = (implication_prod, implication_min, implication_lukasiewicz)
+
+
+def _scalar_implication_min(matching_degree, consequent_val):
+    return min(matching_degree, consequent_val)
+
+
+def _scalar_implication_lukasiewicz(matching_degree, consequent_val):
+    return max(MATCHING_MIN, matching_degree + consequent_val - MATCHING_MAX)
+
+
+# plain Python (float only) versions of IMPLICATIONS, see aggregate_fired()
+_SCALAR_IMPLICATIONS = {
+    implication_prod: implication_prod,
+    implication_min: _scalar_implication_min,
+    implication_lukasiewicz: _scalar_implication_lukasiewicz
+}
+
+
+def calc_implications(matching_degrees,
+                      consequent_mat,
+                      implication=implication_prod):
+    """Implication for all (..., rule, class) combinations, as
+    (..., num_rules, num_classes) array."""
+    return implication(matching_degrees[..., :, np.newaxis], consequent_mat)
+
+
+def get_rule_chunks(num_rules):
+    """Slices of consecutive RULE_CHUNK_SIZE rules covering num_rules rules
+    (one, empty, slice if there are none)."""
+    return [
+        slice(chunk_start, chunk_start + RULE_CHUNK_SIZE)
+        for chunk_start in range(0, max(num_rules, 1), RULE_CHUNK_SIZE)
+    ]
+
+
+def sum_over_rule_chunks(func, matching_degrees, consequent_mat):
+    """Sum of func(matching degrees, consequent mat) of each rule chunk, in
+    rule order, as ChunkedAggregationStrategyABC sums."""
+    sum_ = None
+    for rule_chunk in get_rule_chunks(consequent_mat.shape[0]):
+        chunk_sum = func(matching_degrees[..., rule_chunk],
+                         consequent_mat[rule_chunk])
+        sum_ = chunk_sum if sum_ is None else sum_ + chunk_sum
+    return sum_
+
+
+def _make_consequent_mat(matching_records, class_labels):
+    consequent_mat = np.array(
+        [[
+            matching_record.rule.consequent[class_label]
+            for class_label in class_labels
+        ] for matching_record in matching_records],
+        dtype=float).reshape((len(matching_records), len(class_labels)))
+    assert np.all((CONSEQUENT_MIN <= consequent_mat)
+                  & (consequent_mat <= CONSEQUENT_MAX))
+    return consequent_mat
 
 
 class AggregationStrategyABC(metaclass=abc.ABCMeta):
-    @abc.abstractmethod
-    def __call__(self, matching_records, class_labels):
-        raise NotImplementedError
+    """implication is one of IMPLICATIONS, or any func with the same
+    signature. Product implication keeps the sum based strats on a single
+    matmul (per rule chunk, see ChunkedAggregationStrategyABC); others
+    materialise the (..., num_rules, num_classes) implications."""
+    def __init__(self, implication=implication_prod):
+        self._implication = implication
+        self._scalar_implication = _SCALAR_IMPLICATIONS.get(implication)
 
+    @property
+    def implication(self):
+        return self._implication
 
-class MaximumAggregation(AggregationStrategyABC):
     def __call__(self, matching_records, class_labels):
-        score_array = _init_score_array(class_labels)
+        """Compatibility wrapper around aggregate() for a list of
+        MatchingRecords: returns OrderedDict mapping class label to score."""
+        matching_degree_vec = np.fromiter(
+            (matching_record.matching_degree
+             for matching_record in matching_records),
+            dtype=float,
+            count=len(matching_records))
+        consequent_mat = _make_consequent_mat(matching_records, class_labels)
+        score_vec = self.aggregate(matching_degree_vec, consequent_mat)
+        return OrderedDict(zip(class_labels, score_vec.tolist()))
+
+    @abc.abstractmethod
+    def aggregate(self, matching_degrees, consequent_mat):
+        """matching_degrees is either a (num_rules, ) vector for a single input
+        or a (num_samples, num_rules) matrix for a batch of inputs;
+        consequent_mat is (num_rules, num_classes). Returns (num_classes, )
+        score vector or (num_samples, num_classes) score matrix resp."""
+        raise NotImplementedError
+
+    def aggregate_fired(self, matching_degrees, consequent_rows, num_rules,
+                        num_classes):
+        """Plain Python aggregate() for a single input, given only the rules
+        that fired: matching_degrees are their (non-zero) matching degrees,
+        consequent_rows their consequent vals as lists in class order; the
+        other num_rules - len(matching_degrees) rules have matching degree
+        zero. Returns list of num_classes scores. Only implemented by the
+        strats in AGGREGATION_STRATS, with one of IMPLICATIONS (see
+        InferenceEngine.score())."""
+        raise NotImplementedError
 
-        for class_label in class_labels:
-            implication_vals = [
-                _implication(matching_record, class_label)
-                for matching_record in matching_records
+    def _sum_fired_implications(self, matching_degrees, consequent_rows,
+                                num_classes):
+        implication = self._scalar_implication
+        sums = [SCORE_MIN] * num_classes
+        for (matching_degree, consequent_row) in zip(matching_degrees,
+                                                     consequent_rows):
+            sums = [
+                sum_ + implication(matching_degree, consequent_val)
+                for (sum_, consequent_val) in zip(sums, consequent_row)
             ]
-            score_array[class_label] = max(implication_vals)
+        return sums
 
-        return score_array
+    def _sum_implications(self, matching_degrees, consequent_mat):
+        if self._implication is implication_prod:
+            return matching_degrees @ consequent_mat
+        return np.sum(calc_implications(matching_degrees, consequent_mat,
+                                        self._implication),
+                      axis=-2)
 
+    def _count_non_zero_implications(self, matching_degrees,
+                                     consequent_mat):
+        if self._implication is implication_prod:
+            # implication is non-zero iff both its factors are non-zero
+            return ((matching_degrees != SCORE_MIN).astype(float)
+                    @ (consequent_mat != SCORE_MIN).astype(float))
+        implications = calc_implications(matching_degrees, consequent_mat,
+                                         self._implication)
+        return np.count_nonzero(implications, axis=-2).astype(float)
 
-class BoundedSumAggregation(AggregationStrategyABC):
-    def __call__(self, matching_records, class_labels):
-        score_array = _init_score_array(class_labels)
 
-        for class_label in class_labels:
-            sum_ = sum([
-                _implication(matching_record, class_label)
-                for matching_record in matching_records
-            ])
-            bounded_sum = min(sum_, SCORE_MAX)
-            score_array[class_label] = bounded_sum
+class ChunkedAggregationStrategyABC(AggregationStrategyABC):
+    """Aggregation strats that reduce over rules in consecutive chunks of
+    RULE_CHUNK_SIZE rules: each chunk gives a partial state (a tuple of
+    arrays), partial states are merged in rule order, and scores are
+    calculated from the merged state. aggregate() does exactly this, so
+    merging partial states computed elsewhere (e.g. by ShardedScorer, over
+    slices of a rule base starting at chunk boundaries) gives bit for bit
+    the same scores."""
+    def aggregate(self, matching_degrees, consequent_mat):
+        return self.merge_partial_states(
+            self.calc_partial_states(matching_degrees, consequent_mat),
+            consequent_mat.shape[0])
 
-        return score_array
+    def calc_partial_states(self, matching_degrees, consequent_mat):
+        """Returns list of partial states, one per rule chunk."""
+        return [
+            self._calc_partial_state(matching_degrees[..., rule_chunk],
+                                     consequent_mat[rule_chunk])
+            for rule_chunk in get_rule_chunks(consequent_mat.shape[0])
+        ]
 
+    def merge_partial_states(self, partial_states, num_rules):
+        """Takes partial states of all rule chunks in rule order and the total
+        num rules, returns scores as aggregate() does."""
+        partial_states = iter(partial_states)
+        state = next(partial_states)
+        for partial_state in partial_states:
+            state = self._merge_partial_state(state, partial_state)
+        return self._calc_scores(state, num_rules)
 
-class AvgAggregation(AggregationStrategyABC):
-    """Average over all supports for given class."""
-    def __call__(self, matching_records, class_labels):
-        score_array = _init_score_array(class_labels)
+    @abc.abstractmethod
+    def _calc_partial_state(self, matching_degrees, consequent_mat):
+        raise NotImplementedError
+
+    def _merge_partial_state(self, state, partial_state):
+        return tuple([val + partial_val
+                      for (val, partial_val) in zip(state, partial_state)])
 
-        for class_label in class_labels:
-            implication_vals = [
-                _implication(matching_record, class_label)
-                for matching_record in matching_records
+    @abc.abstractmethod
+    def _calc_scores(self, state, num_rules):
+        raise NotImplementedError
+
+
+class MaximumAggregation(ChunkedAggregationStrategyABC):
+    def _calc_partial_state(self, matching_degrees, consequent_mat):
+        return (np.max(calc_implications(matching_degrees, consequent_mat,
+                                         self._implication),
+                       axis=-2), )
+
+    def _merge_partial_state(self, state, partial_state):
+        return (np.maximum(state[0], partial_state[0]), )
+
+    def _calc_scores(self, state, num_rules):
+        return state[0]
+
+    def aggregate_fired(self, matching_degrees, consequent_rows, num_rules,
+                        num_classes):
+        implication = self._scalar_implication
+        scores = [SCORE_MIN] * num_classes
+        for (matching_degree, consequent_row) in zip(matching_degrees,
+                                                     consequent_rows):
+            scores = [
+                max(score, implication(matching_degree, consequent_val))
+                for (score, consequent_val) in zip(scores, consequent_row)
             ]
-            score_array[class_label] = \
-                sum(implication_vals)/len(implication_vals)
+        return scores
+
+
+class BoundedSumAggregation(ChunkedAggregationStrategyABC):
+    def _calc_partial_state(self, matching_degrees, consequent_mat):
+        return (self._sum_implications(matching_degrees, consequent_mat), )
 
-        return score_array
+    def _calc_scores(self, state, num_rules):
+        return np.minimum(state[0], SCORE_MAX)
 
+    def aggregate_fired(self, matching_degrees, consequent_rows, num_rules,
+                        num_classes):
+        return [
+            min(sum_, SCORE_MAX) for sum_ in self._sum_fired_implications(
+                matching_degrees, consequent_rows, num_classes)
+        ]
 
-class BiasedAvgAggregation(AggregationStrategyABC):
+
+class AvgAggregation(ChunkedAggregationStrategyABC):
+    """Average over all supports for given class."""
+    def _calc_partial_state(self, matching_degrees, consequent_mat):
+        return (self._sum_implications(matching_degrees, consequent_mat), )
+
+    def _calc_scores(self, state, num_rules):
+        return state[0] / num_rules
+
+    def aggregate_fired(self, matching_degrees, consequent_rows, num_rules,
+                        num_classes):
+        return [
+            sum_ / num_rules for sum_ in self._sum_fired_implications(
+                matching_degrees, consequent_rows, num_classes)
+        ]
+
+
+class BiasedAvgAggregation(ChunkedAggregationStrategyABC):
     """Average over non-zero supports for given class."""
-    def __call__(self, matching_records, class_labels):
-        score_array = _init_score_array(class_labels)
+    def _calc_partial_state(self, matching_degrees, consequent_mat):
+        return (self._sum_implications(matching_degrees, consequent_mat),
+                self._count_non_zero_implications(matching_degrees,
+                                                  consequent_mat))
 
-        for class_label in class_labels:
-            implication_vals = [
-                _implication(matching_record, class_label)
-                for matching_record in matching_records
-            ]
-            valid_implication_vals = [
-                val for val in implication_vals if val != SCORE_MIN
-            ]
-            if len(valid_implication_vals) != 0:
-                score_array[class_label] = \
-                    sum(valid_implication_vals)/len(valid_implication_vals)
+    def _calc_scores(self, state, num_rules):
+        (sum_, num_valid) = state
+        scores = np.full(sum_.shape, SCORE_MIN)
+        np.divide(sum_, num_valid, out=scores, where=(num_valid != 0))
+        return scores
 
-        return score_array
+    def aggregate_fired(self, matching_degrees, consequent_rows, num_rules,
+                        num_classes):
+        sums = self._sum_fired_implications(matching_degrees,
+                                            consequent_rows, num_classes)
+        nums_valid = [0] * num_classes
+        for (matching_degree, consequent_row) in zip(matching_degrees,
+                                                     consequent_rows):
+            for (class_idx, consequent_val) in enumerate(consequent_row):
+                # as _count_non_zero_implications(): for product implication
+                # the factors are tested, so underflow to zero still counts
+                if self._implication is implication_prod:
+                    is_valid = (consequent_val != SCORE_MIN)
+                else:
+                    is_valid = (self._scalar_implication(
+                        matching_degree, consequent_val) != SCORE_MIN)
+                nums_valid[class_idx] += is_valid
+        return [(sum_ / num_valid) if num_valid != 0 else SCORE_MIN
+                for (sum_, num_valid) in zip(sums, nums_valid)]
 
 
-class WeightedAvgAggregation(AggregationStrategyABC):
-    def __call__(self, matching_records, class_labels):
-        score_array = _init_score_array(class_labels)
-
-        denominator = sum([
-            matching_record.matching_degree
-            for matching_record in matching_records
-        ])
-        if denominator != 0.0:
-            for class_label in class_labels:
-                numerator = sum([
-                    _implication(matching_record, class_label)
-                    for matching_record in matching_records
-                ])
-                score_array[class_label] = (numerator / denominator)
-
-        return score_array
+class WeightedAvgAggregation(ChunkedAggregationStrategyABC):
+    def _calc_partial_state(self, matching_degrees, consequent_mat):
+        return (self._sum_implications(matching_degrees, consequent_mat),
+                np.sum(matching_degrees, axis=-1))
+
+    def _calc_scores(self, state, num_rules):
+        (numerator, matching_degree_sum) = state
+        denominator = matching_degree_sum[..., np.newaxis]
+        scores = np.full(numerator.shape, SCORE_MIN)
+        np.divide(numerator,
+                  denominator,
+                  out=scores,
+                  where=(denominator != 0.0))
+        # numerator and denominator are summed in different orders, so can be
+        # an ulp over max
+        return np.minimum(scores, SCORE_MAX, out=scores)
+
+    def aggregate_fired(self, matching_degrees, consequent_rows, num_rules,
+                        num_classes):
+        denominator = sum(matching_degrees)
+        if denominator == 0.0:
+            return [SCORE_MIN] * num_classes
+        return [
+            min(numerator / denominator, SCORE_MAX)
+            for numerator in self._sum_fired_implications(
+                matching_degrees, consequent_rows, num_classes)
+        ]
+
+
+# strats implementing aggregate_fired()
+AGGREGATION_STRATS = (MaximumAggregation, BoundedSumAggregation,
+                      AvgAggregation, BiasedAvgAggregation,
+                      WeightedAvgAggregation)
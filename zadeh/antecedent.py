@@ -1,6 +1,9 @@
 import abc
+import functools
+import math
 
-import numpy as np
+from .membership_cache import MembershipCache
+from .util import lazy_numpy as np
 
 UNSPECIFIED = -1
 
@@ -8,18 +11,49 @@ UNSPECIFIED = -1
 class AntecedentABC(metaclass=abc.ABCMeta):
     """Antecedent stores a mapping between input features and linguistic values
     selected for those features."""
+    __slots__ = ()
+
     @abc.abstractmethod
     def eval(self,
              ling_vars,
              input_vec,
              logical_and_strat,
-             logical_or_strat=None):
+             logical_or_strat=None,
+             membership_cache=None):
+        """membership_cache is an optional MembershipCache for input_vec,
+        shared between antecedents; a fresh one is made if not given."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def membership_func_usage_mask(self, max_num_membership_funcs):
+        """Returns (num_features, max_num_membership_funcs) bool array marking
+        the membership funcs used for each feature."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def membership_func_usage_bits(self):
+        """Returns tuple with an int per feature, with bit i set if membership
+        func i is used for that feature (0 if the feature is unused)."""
         raise NotImplementedError
 
     @abc.abstractmethod
     def calc_num_spec_fuzzy_decision_regions(self):
         raise NotImplementedError
 
+    @property
+    @abc.abstractmethod
+    def canonical_key(self):
+        """Hashable representation of the antecedent; antecedents of same
+        type with equal keys are equal (and give equal matching degrees)."""
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        return (type(self) is type(other)
+                and self.canonical_key == other.canonical_key)
+
+    def __hash__(self):
+        return hash((type(self).__name__, self.canonical_key))
+
     @abc.abstractmethod
     def __str__(self):
         raise NotImplementedError
@@ -29,24 +63,46 @@ class AntecedentABC(metaclass=abc.ABCMeta):
 
 
 class ConjunctiveAntecedent(AntecedentABC):
+    __slots__ = ("_membership_func_idxs", )
+
     def __init__(self, membership_func_idxs):
         self._membership_func_idxs = tuple(membership_func_idxs)
 
+    @property
+    def canonical_key(self):
+        return self._membership_func_idxs
+
     def eval(self,
              ling_vars,
              input_vec,
              logical_and_strat,
-             logical_or_strat=None):
+             logical_or_strat=None,
+             membership_cache=None):
+        if membership_cache is None:
+            membership_cache = MembershipCache(ling_vars, input_vec)
         membership_vals = []
-        for (membership_func_idx, ling_var,
-             input_scalar) in zip(self._membership_func_idxs, ling_vars,
-                                  input_vec):
+        for (feature_idx, membership_func_idx) in \
+                enumerate(self._membership_func_idxs):
             if membership_func_idx != UNSPECIFIED:
                 membership_vals.append(
-                    ling_var.eval_membership_func(membership_func_idx,
-                                                  input_scalar))
+                    membership_cache.lookup(feature_idx, membership_func_idx))
         return logical_and_strat(membership_vals)
 
+    def membership_func_usage_mask(self, max_num_membership_funcs):
+        mask = np.zeros(
+            (len(self._membership_func_idxs), max_num_membership_funcs),
+            dtype=bool)
+        for (feature_idx, membership_func_idx) in \
+                enumerate(self._membership_func_idxs):
+            if membership_func_idx != UNSPECIFIED:
+                mask[feature_idx, membership_func_idx] = True
+        return mask
+
+    def membership_func_usage_bits(self):
+        return tuple([(1 << membership_func_idx)
+                      if membership_func_idx != UNSPECIFIED else 0
+                      for membership_func_idx in self._membership_func_idxs])
+
     def calc_num_spec_fuzzy_decision_regions(self):
         raise NotImplementedError
 
@@ -55,51 +111,102 @@ class ConjunctiveAntecedent(AntecedentABC):
 
 
 class CNFAntecedent(AntecedentABC):
+    """Usage bits are stored packed, one int per feature with bit i set if
+    membership func i is used; equal tuples of num membership funcs per
+    feature are shared between antecedents (via a bounded cache)."""
+    __slots__ = ("_num_membership_funcs", "_packed_usages")
     _ACTIVE = 1
     _INACTIVE = 0
 
     def __init__(self, membership_func_usages):
+        num_membership_funcs = []
+        packed_usages = []
         for mf_usage_bits in membership_func_usages:
-            for bit in mf_usage_bits:
-                assert bit == self._ACTIVE or bit == self._INACTIVE
-            at_least_one_active_bit = mf_usage_bits.count(self._ACTIVE) > 0
+            assert set(mf_usage_bits) <= {self._ACTIVE, self._INACTIVE}
+            at_least_one_active_bit = self._ACTIVE in mf_usage_bits
             assert at_least_one_active_bit
-        self._membership_func_usages = tuple(membership_func_usages)
+            num_membership_funcs.append(len(mf_usage_bits))
+            packed_usages.append(
+                sum([(1 << mf_idx) for (mf_idx, bit) in enumerate(mf_usage_bits)
+                     if bit == self._ACTIVE]))
+        self._num_membership_funcs = _share_num_membership_funcs(
+            tuple(num_membership_funcs))
+        self._packed_usages = tuple(packed_usages)
+
+    @property
+    def membership_func_usages(self):
+        """Unpacked usage bits, as given to __init__()."""
+        return tuple([
+            tuple([(packed_usage >> mf_idx) & 1 for mf_idx in range(num_mfs)])
+            for (packed_usage, num_mfs) in zip(self._packed_usages,
+                                               self._num_membership_funcs)
+        ])
+
+    @property
+    def canonical_key(self):
+        return (self._num_membership_funcs, self._packed_usages)
 
-    def eval(self, ling_vars, input_vec, logical_and_strat, logical_or_strat):
+    def eval(self,
+             ling_vars,
+             input_vec,
+             logical_and_strat,
+             logical_or_strat,
+             membership_cache=None):
+        if membership_cache is None:
+            membership_cache = MembershipCache(ling_vars, input_vec)
         vals_to_and = []
-        for (mf_usage_bits, ling_var, input_scalar) in \
-                zip(self._membership_func_usages, ling_vars, input_vec):
+        for (feature_idx, packed_usage) in enumerate(self._packed_usages):
             vals_to_and.append(
-                self._eval_disjunction(mf_usage_bits, ling_var,
-                                       input_scalar, logical_or_strat))
-        #  result = logical_and_strat(vals_to_and)
-        #  print(f"Conjunction: {vals_to_and} -> {result}")
+                self._eval_disjunction(feature_idx, packed_usage,
+                                       membership_cache, logical_or_strat))
         return logical_and_strat(vals_to_and)
 
-    def _eval_disjunction(self, mf_usage_bits, ling_var, input_scalar,
+    def _eval_disjunction(self, feature_idx, packed_usage, membership_cache,
                           logical_or_strat):
         vals_to_or = []
-        for (mf_idx, bit) in enumerate(mf_usage_bits):
-            if bit == self._ACTIVE:
-                vals_to_or.append(
-                    ling_var.eval_membership_func(mf_idx, input_scalar))
-        #  result = logical_or_strat(vals_to_or)
-        #  print(f"Disjunction: {mf_usage_bits} -> {vals_to_or} -> {result}")
+        for mf_idx in _get_active_mf_idxs(packed_usage):
+            vals_to_or.append(membership_cache.lookup(feature_idx, mf_idx))
         return logical_or_strat(vals_to_or)
 
+    def membership_func_usage_mask(self, max_num_membership_funcs):
+        mask = np.zeros(
+            (len(self._packed_usages), max_num_membership_funcs), dtype=bool)
+        for (feature_idx, packed_usage) in enumerate(self._packed_usages):
+            mask[feature_idx, list(_get_active_mf_idxs(packed_usage))] = True
+        return mask
+
+    def membership_func_usage_bits(self):
+        return self._packed_usages
+
     def calc_num_spec_fuzzy_decision_regions(self):
-        active_bits_per_ling_var = [
-            mf_usage_bits.count(self._ACTIVE)
-            for mf_usage_bits in self._membership_func_usages
-        ]
-        return np.prod(active_bits_per_ling_var)
+        # not np.prod, which is slow on short lists
+        return math.prod([
+            len(_get_active_mf_idxs(packed_usage))
+            for packed_usage in self._packed_usages
+        ])
 
     def __str__(self):
         str_ = ""
-        for mf_usage_bits in self._membership_func_usages:
+        for mf_usage_bits in self.membership_func_usages:
             substr = ""
             for bit in mf_usage_bits:
                 substr += str(bit)
             str_ += f"|{substr}|"
         return str_
+
+
+# both caches below are bounded; their keys are few in practice (one per
+# ling var layout / per usage bit pattern)
+@functools.lru_cache(maxsize=256)
+def _share_num_membership_funcs(num_membership_funcs):
+    """Returns the cached tuple equal to num_membership_funcs, if any, so
+    CNFAntecedents share it."""
+    return num_membership_funcs
+
+
+@functools.lru_cache(maxsize=4096)
+def _get_active_mf_idxs(packed_usage):
+    return tuple([
+        mf_idx for mf_idx in range(packed_usage.bit_length())
+        if (packed_usage >> mf_idx) & 1
+    ])
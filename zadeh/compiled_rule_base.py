@@ -0,0 +1,235 @@
+from .antecedent import CNFAntecedent
+from .consequent import ConsequentRow
+from .constants import CONSEQUENT_MAX, CONSEQUENT_MIN
+from .lazy_rules import LazyRuleSequence
+from .logical_ops import logical_or_max_array
+from .scalar_rule_base import ScalarRuleBase
+from .util import lazy_numpy as np
+
+# max num elems of (samples, rules, features, membership funcs) tensor
+# materialised at once when computing matching degrees
+_MAX_MEMBERSHIP_TENSOR_SIZE = 2**22
+
+
+class CompiledRuleBase:
+    """Dense array form of a rule base, used for batched inference.
+
+    antecedent_masks is a (num_rules, num_features, max_num_membership_funcs)
+    bool array marking the membership funcs each rule uses for each feature;
+    consequent_mat is a (num_rules, num_classes) array with columns in
+    class_labels order.
+
+    rules can be a LazyRuleSequence (e.g. for loaded rule bases, see
+    serialization), in which case rule objects are only built when needed
+    by scalar inference."""
+    def __init__(self, rules, antecedent_masks, consequent_mat,
+                 class_labels):
+        self._rules = rules if isinstance(rules, LazyRuleSequence) \
+            else tuple(rules)
+        self._antecedent_masks = antecedent_masks
+        self._consequent_mat = consequent_mat
+        self._class_labels = tuple(class_labels)
+        # derived on first use, so loading a rule base stays cheap
+        self._feature_spec_mask = None
+        self._scalar_rule_base = None
+        self._num_spec_fuzzy_decision_regions = None
+
+    @classmethod
+    def from_rules(cls, rules, ling_vars, class_labels):
+        rules = tuple(rules)
+        max_num_membership_funcs = max(
+            [ling_var.num_membership_funcs for ling_var in ling_vars])
+        antecedent_masks = np.zeros(
+            (len(rules), len(ling_vars), max_num_membership_funcs),
+            dtype=bool)
+        consequent_mat = np.empty((len(rules), len(class_labels)))
+        for (rule_idx, rule) in enumerate(rules):
+            (antecedent_masks[rule_idx], consequent_mat[rule_idx]) = \
+                _compile_rule(rule, ling_vars, class_labels)
+        return cls(rules, antecedent_masks, consequent_mat, class_labels)
+
+    @property
+    def rules(self):
+        return self._rules
+
+    @property
+    def antecedent_masks(self):
+        return self._antecedent_masks
+
+    @property
+    def feature_spec_mask(self):
+        """(num_rules, num_features) bool array marking the features each
+        rule uses."""
+        if self._feature_spec_mask is None:
+            self._feature_spec_mask = np.any(self._antecedent_masks, axis=2)
+        return self._feature_spec_mask
+
+    @property
+    def consequent_mat(self):
+        return self._consequent_mat
+
+    @property
+    def class_labels(self):
+        return self._class_labels
+
+    @property
+    def num_features(self):
+        return self._antecedent_masks.shape[1]
+
+    @property
+    def max_num_membership_funcs(self):
+        return self._antecedent_masks.shape[2]
+
+    def __iter__(self):
+        return iter(self._rules)
+
+    def __len__(self):
+        return len(self._rules)
+
+    def calc_num_spec_fuzzy_decision_regions(self):
+        """As FuzzyRuleBase.calc_num_spec_fuzzy_decision_regions(), computed
+        from antecedent_masks when all antecedents are CNF. Cached."""
+        if self._num_spec_fuzzy_decision_regions is None:
+            if isinstance(self._rules, LazyRuleSequence):
+                self._num_spec_fuzzy_decision_regions = \
+                    self._rules.calc_num_spec_fuzzy_decision_regions()
+            elif all([
+                    isinstance(rule.antecedent, CNFAntecedent)
+                    for rule in self._rules
+            ]):
+                # CNF antecedents use at least one membership func per
+                # feature
+                self._num_spec_fuzzy_decision_regions = int(
+                    np.sum(
+                        np.prod(np.sum(self._antecedent_masks, axis=2),
+                                axis=1)))
+            else:
+                self._num_spec_fuzzy_decision_regions = sum([
+                    rule.calc_num_spec_fuzzy_decision_regions()
+                    for rule in self._rules
+                ])
+        return self._num_spec_fuzzy_decision_regions
+
+    def compile_scalar(self):
+        """Returns ScalarRuleBase of this rule base, for scalar inference.
+        Built on first use."""
+        if self._scalar_rule_base is None:
+            self._scalar_rule_base = ScalarRuleBase(
+                self._rules, _pack_usage_bits(self._antecedent_masks),
+                self._consequent_mat.tolist(), self._class_labels)
+        return self._scalar_rule_base
+
+    def replace_rule(self, rule_idx, rule, ling_vars):
+        """Returns new compiled rule base with rule at rule_idx replaced by
+        given rule: only that rule is recompiled, the rest of the arrays are
+        copied over."""
+        rules = list(self._rules)
+        rules[rule_idx] = rule
+        antecedent_masks = self._antecedent_masks.copy()
+        consequent_mat = self._consequent_mat.copy()
+        (antecedent_masks[rule_idx], consequent_mat[rule_idx]) = \
+            _compile_rule(rule, ling_vars, self._class_labels)
+        return self.__class__(rules, antecedent_masks, consequent_mat,
+                              self._class_labels)
+
+    def get_rule_slice(self, start, stop):
+        """Returns compiled rule base of rules [start, stop) only, sharing
+        this one's arrays."""
+        if isinstance(self._rules, LazyRuleSequence):
+            rules = self._rules.get_sub_sequence(start, stop)
+        else:
+            rules = self._rules[start:stop]
+        return self.__class__(rules, self._antecedent_masks[start:stop],
+                              self._consequent_mat[start:stop],
+                              self._class_labels)
+
+    def eval_matching_degree_mat(self,
+                                 membership_tensor,
+                                 logical_and_array_op,
+                                 logical_or_array_op=None,
+                                 validate=True):
+        """Takes (num_samples, num_features, max_num_membership_funcs)
+        membership tensor, returns (num_samples, num_rules) matrix of matching
+        degrees. Each rule's used membership vals are OR-ed per feature, then
+        the per-feature vals are AND-ed (features a rule does not use are left
+        out of the AND)."""
+        if logical_or_array_op is None:
+            # only ever one val per feature to OR
+            logical_or_array_op = logical_or_max_array
+        num_samples = membership_tensor.shape[0]
+        matching_degree_mat = np.empty((num_samples, len(self._rules)))
+        chunk_size = max(
+            1,
+            _MAX_MEMBERSHIP_TENSOR_SIZE // max(1, self._antecedent_masks.size))
+        for chunk_start in range(0, num_samples, chunk_size):
+            chunk = slice(chunk_start, chunk_start + chunk_size)
+            membership_chunk = membership_tensor[chunk]
+            # (samples, rules, features, membership funcs)
+            rule_membership_vals = np.broadcast_to(
+                membership_chunk[:, np.newaxis, :, :],
+                (membership_chunk.shape[0], ) + self._antecedent_masks.shape)
+            # (samples, rules, features)
+            disjunction_vals = logical_or_array_op(
+                rule_membership_vals,
+                axis=-1,
+                where=self._antecedent_masks[np.newaxis, :, :, :],
+                validate=validate)
+            matching_degree_mat[chunk] = logical_and_array_op(
+                disjunction_vals,
+                axis=-1,
+                where=self.feature_spec_mask[np.newaxis, :, :],
+                validate=validate)
+        return matching_degree_mat
+
+
+def _compile_rule(rule, ling_vars, class_labels):
+    antecedent_mask = rule.antecedent.membership_func_usage_mask(
+        max([ling_var.num_membership_funcs for ling_var in ling_vars]))
+    assert antecedent_mask.shape[0] == len(ling_vars)
+    for (ling_var, mf_mask) in zip(ling_vars, antecedent_mask):
+        assert not np.any(mf_mask[ling_var.num_membership_funcs:])
+    return (antecedent_mask, make_consequent_mat([rule], class_labels)[0])
+
+
+def _pack_usage_bits(antecedent_masks):
+    """Membership func usage bits of each rule (as ints, see
+    AntecedentABC.membership_func_usage_bits()) from antecedent masks."""
+    packed = np.packbits(antecedent_masks, axis=2, bitorder="little")
+    num_bytes = packed.shape[2]
+    if num_bytes <= 8:
+        padded = np.zeros(packed.shape[:2] + (8, ), dtype=np.uint8)
+        padded[:, :, :num_bytes] = packed
+        return padded.view("<u8")[:, :, 0].tolist()
+    return [[
+        int.from_bytes(feature_packed.tobytes(), byteorder="little")
+        for feature_packed in rule_packed
+    ] for rule_packed in packed]
+
+
+def make_consequent_mat(rules, class_labels):
+    """Returns (num_rules, num_classes) consequent matrix for given rules, with
+    columns in class_labels order."""
+    table = _get_shared_consequent_table(rules)
+    if table is not None and table.class_labels == tuple(class_labels):
+        return table.consequent_mat[[
+            rule.consequent.row_idx for rule in rules
+        ]].reshape((len(rules), len(class_labels)))
+    consequent_mat = np.array(
+        [[rule.consequent[class_label] for class_label in class_labels]
+         for rule in rules],
+        dtype=float).reshape((len(rules), len(class_labels)))
+    assert np.all((CONSEQUENT_MIN <= consequent_mat)
+                  & (consequent_mat <= CONSEQUENT_MAX))
+    return consequent_mat
+
+
+def _get_shared_consequent_table(rules):
+    """Returns ConsequentTable all rules' consequents are rows of, if any."""
+    tables = {
+        id(rule.consequent.table) if isinstance(rule.consequent,
+                                                ConsequentRow) else None
+        for rule in rules
+    }
+    if len(tables) == 1 and None not in tables:
+        return next(iter(rules)).consequent.table
+    return None
@@ -0,0 +1,69 @@
+from collections.abc import Mapping
+
+from .util import lazy_numpy as np
+
+
+class ConsequentTable:
+    """Consequents of many rules as rows of one read-only (num_rules,
+    num_classes) array, columns in class_labels order."""
+    __slots__ = ("_class_labels", "_class_label_idxs", "_consequent_mat")
+
+    def __init__(self, class_labels, consequent_mat):
+        assert consequent_mat.shape[1] == len(class_labels)
+        self._class_labels = tuple(class_labels)
+        self._class_label_idxs = {
+            class_label: idx
+            for (idx, class_label) in enumerate(self._class_labels)
+        }
+        self._consequent_mat = np.array(consequent_mat, dtype=float)
+        self._consequent_mat.setflags(write=False)
+
+    @property
+    def class_labels(self):
+        return self._class_labels
+
+    @property
+    def class_label_idxs(self):
+        """Maps class label to column idx."""
+        return self._class_label_idxs
+
+    @property
+    def consequent_mat(self):
+        return self._consequent_mat
+
+    def __len__(self):
+        return len(self._consequent_mat)
+
+
+class ConsequentRow(Mapping):
+    """Read-only class label -> consequent val mapping for one row of a
+    ConsequentTable, usable wherever a rule's consequent dict is."""
+    __slots__ = ("_table", "_row_idx")
+
+    def __init__(self, table, row_idx):
+        self._table = table
+        self._row_idx = row_idx
+
+    @property
+    def table(self):
+        return self._table
+
+    @property
+    def row_idx(self):
+        return self._row_idx
+
+    def __getitem__(self, class_label):
+        return float(self._table.consequent_mat[
+            self._row_idx, self._table.class_label_idxs[class_label]])
+
+    def __iter__(self):
+        return iter(self._table.class_labels)
+
+    def __len__(self):
+        return len(self._table.class_labels)
+
+    def __str__(self):
+        return str(dict(self))
+
+    def __repr__(self):
+        return str(self)
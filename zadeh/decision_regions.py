@@ -0,0 +1,314 @@
+"""Exact fast inference for systems whose membership funcs are all piecewise
+linear, by precomputing the cells of the input space within which every
+membership func is linear."""
+import bisect
+from collections import OrderedDict
+
+import numpy as np
+
+from .aggregation import MaximumAggregation
+from .compiled_rule_base import CompiledRuleBase
+from .constants import (MATCHING_MAX, MATCHING_MIN, RANGE_MAX, RANGE_MIN,
+                        SCORE_MAX, SCORE_MIN)
+from .error import UndefinedMappingError
+from .eval_cache import LRUCache
+from .inference_engine import DEBUG_MODE
+from .logical_ops import (get_array_logical_op, is_t_conorm, is_t_norm,
+                          logical_or_max_array)
+
+
+class DecisionRegionIndex:
+    """Per feature, the sorted breakpoints of all membership funcs split the
+    domain into cells: the breakpoints themselves and the open intervals
+    between them. Within a cell every membership func is linear, so its
+    linear params (m, x0, c, see calc_linear_params() of the membership
+    funcs) are precomputed per cell, along with which rules can have non-zero
+    matching degree there.
+
+    Inference on an input is then one bisect per feature to find its cell in
+    the grid, membership vals from the cell's linear params, and evaluation
+    of only the rules eligible in that grid cell (the AND of the per-feature
+    eligible rules, computed on first visit and cached as rule idxs in an
+    LRUCache of at most max_cell_cache_bytes). Scores are exactly those
+    inference_engine.score() / score_batch() give; ling var lookup tables are
+    not used.
+
+    Only MaximumAggregation is supported: it ignores the rules left out and
+    does not depend on how samples are grouped, whereas the sum based
+    aggregations would round differently per grid cell. Rules are only
+    filtered out if the logical ops are a known t-norm / t-conorm (see
+    RuleActivationIndex), otherwise all rules are evaluated. Raises
+    ValueError if the aggregation strat is not MaximumAggregation or a
+    membership func is not piecewise linear."""
+    def __init__(self,
+                 inference_engine,
+                 ling_vars,
+                 rule_base,
+                 max_cell_cache_bytes=2**26):
+        if type(inference_engine.aggregation_strat) is not MaximumAggregation:
+            raise ValueError("Unsupported aggregation strat: "
+                             f"{inference_engine.aggregation_strat}, only "
+                             "MaximumAggregation is exact")
+        self._inference_engine = inference_engine
+        self._ling_vars = tuple(ling_vars)
+        self._class_labels = tuple(inference_engine.class_labels)
+        if isinstance(rule_base, CompiledRuleBase):
+            self._compiled_rule_base = rule_base
+        else:
+            self._compiled_rule_base = rule_base.compile(
+                self._ling_vars, self._class_labels)
+        self._logical_and_array_op = get_array_logical_op(
+            inference_engine.logical_and_strat, MATCHING_MAX)
+        self._logical_or_array_op = get_array_logical_op(
+            inference_engine.logical_or_strat, MATCHING_MIN) \
+            if inference_engine.logical_or_strat is not None \
+            else logical_or_max_array
+        self._aggregation_strat = inference_engine.aggregation_strat
+        self._validate = (inference_engine.mode == DEBUG_MODE)
+        filter_rules = (is_t_norm(inference_engine.logical_and_strat)
+                        and (inference_engine.logical_or_strat is None or
+                             is_t_conorm(inference_engine.logical_or_strat)))
+
+        max_num_membership_funcs = \
+            self._compiled_rule_base.max_num_membership_funcs
+        self._feature_breakpoints = [
+            self._calc_breakpoints(ling_var) for ling_var in self._ling_vars
+        ]
+        max_num_cells = max([
+            _calc_num_cells(breakpoints)
+            for breakpoints in self._feature_breakpoints
+        ])
+        # (num_features, max_num_cells, max_num_membership_funcs), zero padded
+        linear_params_shape = (len(self._ling_vars), max_num_cells,
+                               max_num_membership_funcs)
+        self._cell_ms = np.zeros(linear_params_shape)
+        self._cell_x0s = np.zeros(linear_params_shape)
+        self._cell_cs = np.zeros(linear_params_shape)
+        self._feature_cell_rule_masks = []
+        for (feature_idx, (ling_var, breakpoints)) in enumerate(
+                zip(self._ling_vars, self._feature_breakpoints)):
+            for (cell_idx, cell_linear_params) in enumerate(
+                    self._calc_cell_linear_params(ling_var, breakpoints)):
+                for (mf_idx, (m, x0, c)) in enumerate(cell_linear_params):
+                    self._cell_ms[feature_idx, cell_idx, mf_idx] = m
+                    self._cell_x0s[feature_idx, cell_idx, mf_idx] = x0
+                    self._cell_cs[feature_idx, cell_idx, mf_idx] = c
+            self._feature_cell_rule_masks.append(
+                self._calc_cell_rule_mask(feature_idx, breakpoints,
+                                          filter_rules))
+        self._feature_idxs = np.arange(len(self._ling_vars))
+        self._cell_rule_idxs_cache = LRUCache(max_cell_cache_bytes)
+
+    @property
+    def compiled_rule_base(self):
+        return self._compiled_rule_base
+
+    @property
+    def feature_breakpoints(self):
+        return tuple(self._feature_breakpoints)
+
+    @property
+    def num_cells(self):
+        """Num cells of each feature; the grid has their product."""
+        return tuple([
+            _calc_num_cells(breakpoints)
+            for breakpoints in self._feature_breakpoints
+        ])
+
+    @property
+    def num_cached_cells(self):
+        return len(self._cell_rule_idxs_cache)
+
+    @property
+    def cell_cache_stats(self):
+        return self._cell_rule_idxs_cache.stats
+
+    def _calc_breakpoints(self, ling_var):
+        breakpoints = set()
+        for membership_func in ling_var.membership_funcs:
+            try:
+                breakpoints.update(membership_func.breakpoints)
+            except NotImplementedError:
+                raise ValueError(
+                    f"Membership func {membership_func!r} of ling var "
+                    f"{ling_var.name} is not piecewise linear")
+        return tuple(sorted(breakpoints))
+
+    def _calc_cell_linear_params(self, ling_var, breakpoints):
+        """Returns list of linear params of each membership func, per cell.
+        At a breakpoint, membership vals are constants computed by the
+        membership funcs themselves."""
+        cell_linear_params = []
+        for (breakpoint_idx, breakpoint) in enumerate(breakpoints):
+            cell_linear_params.append([
+                (0.0, 0.0, membership_func.fuzzify(breakpoint))
+                for membership_func in ling_var.membership_funcs
+            ])
+            if breakpoint_idx < len(breakpoints) - 1:
+                mid_x = (breakpoint + breakpoints[breakpoint_idx + 1]) / 2
+                cell_linear_params.append([
+                    membership_func.calc_linear_params(mid_x)
+                    for membership_func in ling_var.membership_funcs
+                ])
+        return cell_linear_params
+
+    def _calc_cell_rule_mask(self, feature_idx, breakpoints, filter_rules):
+        """Returns (num_cells, num_rules) bool array marking the rules that
+        can have non-zero matching degree in each of the feature's cells."""
+        num_cells = _calc_num_cells(breakpoints)
+        num_rules = len(self._compiled_rule_base)
+        if not filter_rules:
+            return np.ones((num_cells, num_rules), dtype=bool)
+        # a membership func can be non-zero in a cell if it is at the
+        # breakpoint, or anywhere in the interval (being linear, it is then
+        # non-zero at the interval's mid point)
+        cell_xs = np.array(breakpoints)
+        cell_xs = np.insert(cell_xs, np.arange(1, len(breakpoints)),
+                            (cell_xs[:-1] + cell_xs[1:]) / 2)
+        membership_mat = self._eval_cell_membership_mat(
+            feature_idx, np.arange(num_cells), cell_xs)
+        is_non_min = (membership_mat > RANGE_MIN).astype(np.int64)
+        uses_non_min_mf = (
+            self._compiled_rule_base.antecedent_masks[:, feature_idx, :].
+            astype(np.int64) @ is_non_min.T) > 0
+        uses_feature = self._compiled_rule_base.feature_spec_mask[:,
+                                                                  feature_idx]
+        return (uses_non_min_mf | ~uses_feature[:, np.newaxis]).T
+
+    def _eval_cell_membership_mat(self, feature_idx, cell_idxs, input_arr):
+        """Returns (len(input_arr), max_num_membership_funcs) membership vals
+        of inputs in given cells of feature."""
+        return np.clip(
+            self._cell_ms[feature_idx, cell_idxs] *
+            (input_arr[:, np.newaxis] - self._cell_x0s[feature_idx, cell_idxs])
+            + self._cell_cs[feature_idx, cell_idxs], RANGE_MIN, RANGE_MAX)
+
+    def find_cell(self, input_vec):
+        """Returns tuple of cell idxs, one per feature, for given input."""
+        cell = []
+        for (breakpoints, input_scalar) in zip(self._feature_breakpoints,
+                                               input_vec):
+            if self._validate:
+                assert breakpoints[0] <= input_scalar <= breakpoints[-1]
+            idx = bisect.bisect_left(breakpoints, input_scalar)
+            if idx < len(breakpoints) and breakpoints[idx] == input_scalar:
+                cell.append(2 * idx)
+            else:
+                cell.append(
+                    min(max(2 * idx - 1, 0), 2 * len(breakpoints) - 2))
+        return tuple(cell)
+
+    def find_cells(self, input_mat):
+        """Returns (num_samples, num_features) array of cell idxs."""
+        cell_mat = np.empty(input_mat.shape, dtype=np.intp)
+        for (feature_idx, breakpoints) in enumerate(self._feature_breakpoints):
+            breakpoint_arr = np.array(breakpoints)
+            input_arr = input_mat[:, feature_idx]
+            if self._validate:
+                assert np.all((breakpoint_arr[0] <= input_arr)
+                              & (input_arr <= breakpoint_arr[-1]))
+            idxs = np.searchsorted(breakpoint_arr, input_arr, side="left")
+            on_breakpoint = (breakpoint_arr[np.minimum(
+                idxs,
+                len(breakpoints) - 1)] == input_arr)
+            cell_mat[:, feature_idx] = np.clip(
+                np.where(on_breakpoint, 2 * idxs, 2 * idxs - 1), 0,
+                2 * len(breakpoints) - 2)
+        return cell_mat
+
+    def get_cell_rule_idxs(self, cell):
+        """Idxs of the rules that can have non-zero matching degree in given
+        grid cell; read-only, as shared with the cache."""
+        rule_idxs = self._cell_rule_idxs_cache.get(cell)
+        if rule_idxs is None:
+            rule_mask = np.ones(len(self._compiled_rule_base), dtype=bool)
+            for (cell_rule_mask, cell_idx) in zip(
+                    self._feature_cell_rule_masks, cell):
+                rule_mask &= cell_rule_mask[cell_idx]
+            rule_idxs = np.flatnonzero(rule_mask)
+            self._cell_rule_idxs_cache.put(cell, rule_idxs)
+        return rule_idxs
+
+    def score(self, input_vec):
+        """As inference_engine.score()."""
+        input_vec = np.asarray(input_vec, dtype=float)
+        score_vec = self._score_cell(self.find_cell(input_vec),
+                                     input_vec[np.newaxis, :])[0]
+        return OrderedDict(zip(self._class_labels, score_vec.tolist()))
+
+    def classify(self, input_vec):
+        """As inference_engine.classify()."""
+        score_array = self.score(input_vec)
+        if all([score == SCORE_MIN for score in score_array.values()]):
+            raise UndefinedMappingError
+        return max(score_array, key=score_array.get)
+
+    def score_batch(self, input_mat):
+        """As inference_engine.score_batch(); samples are grouped by grid
+        cell and each group is scored in one go."""
+        input_mat = np.asarray(input_mat, dtype=float)
+        assert input_mat.ndim == 2
+        assert input_mat.shape[1] == len(self._ling_vars)
+        score_mat = np.empty((input_mat.shape[0], len(self._class_labels)))
+        if input_mat.shape[0] == 0:
+            return score_mat
+        (cells, sample_cell_idxs) = np.unique(self.find_cells(input_mat),
+                                              axis=0,
+                                              return_inverse=True)
+        sample_cell_idxs = sample_cell_idxs.reshape(-1)
+        sample_order = np.argsort(sample_cell_idxs, kind="stable")
+        group_starts = np.searchsorted(sample_cell_idxs[sample_order],
+                                       np.arange(len(cells) + 1))
+        for (cell_idx, cell) in enumerate(cells):
+            sample_idxs = sample_order[
+                group_starts[cell_idx]:group_starts[cell_idx + 1]]
+            score_mat[sample_idxs] = self._score_cell(
+                tuple(cell.tolist()), input_mat[sample_idxs])
+        return score_mat
+
+    def classify_batch(self, input_mat):
+        """As inference_engine.classify_batch()."""
+        return self._inference_engine.classify_score_mat(
+            self.score_batch(input_mat))
+
+    def _score_cell(self, cell, input_mat):
+        """Returns (num_samples, num_classes) scores of inputs that all lie in
+        given grid cell."""
+        rule_idxs = self.get_cell_rule_idxs(cell)
+        antecedent_masks = \
+            self._compiled_rule_base.antecedent_masks[rule_idxs]
+        cell_idxs = (self._feature_idxs, cell)
+        membership_tensor = np.clip(
+            self._cell_ms[cell_idxs] *
+            (input_mat[:, :, np.newaxis] - self._cell_x0s[cell_idxs]) +
+            self._cell_cs[cell_idxs], RANGE_MIN, RANGE_MAX)
+        # (samples, eligible rules, features, membership funcs)
+        rule_membership_vals = np.broadcast_to(
+            membership_tensor[:, np.newaxis, :, :],
+            (input_mat.shape[0], ) + antecedent_masks.shape)
+        disjunction_vals = self._logical_or_array_op(
+            rule_membership_vals,
+            axis=-1,
+            where=antecedent_masks[np.newaxis, :, :, :],
+            validate=self._validate)
+        matching_degree_mat = self._logical_and_array_op(
+            disjunction_vals,
+            axis=-1,
+            where=self._compiled_rule_base.feature_spec_mask[
+                np.newaxis, rule_idxs, :],
+            validate=self._validate)
+        if len(rule_idxs) > 0:
+            # rules left out all have zero implications, cannot be the max
+            score_mat = self._aggregation_strat.aggregate(
+                matching_degree_mat,
+                self._compiled_rule_base.consequent_mat[rule_idxs])
+        else:
+            score_mat = np.full(
+                (input_mat.shape[0], len(self._class_labels)), SCORE_MIN)
+        if self._validate:
+            assert np.all((SCORE_MIN <= score_mat) & (score_mat <= SCORE_MAX))
+        return score_mat
+
+
+def _calc_num_cells(breakpoints):
+    return 2 * len(breakpoints) - 1
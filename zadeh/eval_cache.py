@@ -0,0 +1,163 @@
+"""Opt-in caching of batched inference results over a fixed dataset, for
+repeated scoring of rule bases that share rules (e.g. across GA
+generations)."""
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from .compiled_rule_base import CompiledRuleBase, make_consequent_mat
+
+CacheStats = namedtuple("CacheStats", [
+    "num_hits", "num_misses", "hit_rate", "num_evictions", "num_entries",
+    "num_bytes", "max_bytes"
+])
+
+
+class LRUCache:
+    """Mapping bounded by the total nbytes of its (ndarray) values; least
+    recently used entries are evicted first. Values bigger than max_bytes are
+    never stored."""
+    def __init__(self, max_bytes):
+        assert max_bytes >= 0
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._num_bytes = 0
+        self._num_hits = 0
+        self._num_misses = 0
+        self._num_evictions = 0
+
+    @property
+    def stats(self):
+        num_lookups = self._num_hits + self._num_misses
+        hit_rate = (self._num_hits / num_lookups) if num_lookups > 0 else 0.0
+        return CacheStats(self._num_hits, self._num_misses, hit_rate,
+                          self._num_evictions, len(self._entries),
+                          self._num_bytes, self._max_bytes)
+
+    def get(self, key):
+        """Returns cached value for key, or None if not cached."""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self._num_misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._num_hits += 1
+        return value
+
+    def put(self, key, value):
+        if value.nbytes > self._max_bytes:
+            return
+        if key in self._entries:
+            self._num_bytes -= self._entries.pop(key).nbytes
+        # cached arrays are shared with callers, so must not change
+        value.setflags(write=False)
+        self._entries[key] = value
+        self._num_bytes += value.nbytes
+        while self._num_bytes > self._max_bytes:
+            (_, evicted_value) = self._entries.popitem(last=False)
+            self._num_bytes -= evicted_value.nbytes
+            self._num_evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._num_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CachedScorer:
+    """Batched scoring of rule bases over one registered dataset (input_mat),
+    using the given inference engine and ling vars.
+
+    The dataset is fuzzified once, up front. Matching degree vectors are
+    cached per antecedent (they do not depend on consequents) and score
+    matrices per rule base, each in an LRUCache with its own byte limit. A
+    rule base that was scored before costs a lookup; one that shares rules
+    with previously scored rule bases only has its new antecedents
+    evaluated.
+
+    Returned arrays are shared with the caches and so are read-only."""
+    def __init__(self,
+                 inference_engine,
+                 ling_vars,
+                 input_mat,
+                 max_matching_degree_bytes=2**28,
+                 max_score_bytes=2**26):
+        input_mat = np.asarray(input_mat, dtype=float)
+        assert input_mat.ndim == 2
+        assert input_mat.shape[1] == len(ling_vars)
+        self._inference_engine = inference_engine
+        self._ling_vars = tuple(ling_vars)
+        self._num_samples = input_mat.shape[0]
+        self._membership_tensor = inference_engine.fuzzify_batch(
+            self._ling_vars, input_mat)
+        self._matching_degree_cache = LRUCache(max_matching_degree_bytes)
+        self._score_cache = LRUCache(max_score_bytes)
+
+    @property
+    def matching_degree_cache_stats(self):
+        return self._matching_degree_cache.stats
+
+    @property
+    def score_cache_stats(self):
+        return self._score_cache.stats
+
+    def clear(self):
+        self._matching_degree_cache.clear()
+        self._score_cache.clear()
+
+    def score_batch(self, rule_base):
+        """Returns (num_samples, num_classes) score matrix for rule_base over
+        the registered dataset, as InferenceEngine.score_batch() would."""
+        rules = tuple(rule_base)
+        score_mat = self._score_cache.get(rules)
+        if score_mat is None:
+            score_mat = self._inference_engine.aggregate_batch(
+                self.calc_matching_degree_mat(rules),
+                make_consequent_mat(rules,
+                                    self._inference_engine.class_labels))
+            self._score_cache.put(rules, score_mat)
+        return score_mat
+
+    def classify_batch(self, rule_base):
+        return self._inference_engine.classify_score_mat(
+            self.score_batch(rule_base))
+
+    def calc_matching_degree_mat(self, rules):
+        """Returns (num_samples, num_rules) matching degree matrix for given
+        rules, only evaluating antecedents that are not cached."""
+        matching_degree_mat = np.empty((self._num_samples, len(rules)))
+        uncached_rule_idxs = {}
+        for (rule_idx, rule) in enumerate(rules):
+            matching_degree_vec = \
+                self._matching_degree_cache.get(rule.antecedent)
+            if matching_degree_vec is not None:
+                matching_degree_mat[:, rule_idx] = matching_degree_vec
+            else:
+                # dedupe equal antecedents within this rule base
+                uncached_rule_idxs.setdefault(rule.antecedent,
+                                              []).append(rule_idx)
+
+        if len(uncached_rule_idxs) > 0:
+            uncached_rules = [
+                rules[rule_idxs[0]]
+                for rule_idxs in uncached_rule_idxs.values()
+            ]
+            compiled_rule_base = CompiledRuleBase.from_rules(
+                uncached_rules, self._ling_vars,
+                self._inference_engine.class_labels)
+            uncached_matching_degree_mat = \
+                self._inference_engine.compute_matching_degree_mat(
+                    compiled_rule_base, self._membership_tensor)
+            for (col_idx, (antecedent, rule_idxs)) in \
+                    enumerate(uncached_rule_idxs.items()):
+                matching_degree_vec = \
+                    uncached_matching_degree_mat[:, col_idx].copy()
+                matching_degree_mat[:, rule_idxs] = \
+                    matching_degree_vec[:, np.newaxis]
+                self._matching_degree_cache.put(antecedent,
+                                                matching_degree_vec)
+
+        return matching_degree_mat
@@ -0,0 +1,141 @@
+"""Accuracy / coverage evaluation of a system on a labelled dataset, in one
+batched pass."""
+from collections import namedtuple
+
+import numpy as np
+
+from .compiled_rule_base import CompiledRuleBase
+from .constants import SCORE_MIN
+
+MarginStats = namedtuple("MarginStats", ["mean", "std", "min", "max"])
+EvaluationReport = namedtuple("EvaluationReport", [
+    "num_samples", "accuracy", "undefined_rate", "confusion_mat",
+    "margin_stats", "complexity"
+])
+
+
+def evaluate(system, input_mat, labels):
+    """Evaluates system on input_mat (one input vector per row) with true
+    class labels, see Evaluator.evaluate()."""
+    return Evaluator(system.inference_engine, system.ling_vars, input_mat,
+                     labels).evaluate(system.rule_base)
+
+
+class Evaluator:
+    """Evaluates rule bases on a fixed labelled dataset, e.g. as the fitness
+    func of a rule base optimiser: input_mat is fuzzified and labels are
+    mapped to class idxs once, up front, so each evaluate() call only
+    compiles the rule base (cached by FuzzyRuleBase.compile()), computes
+    matching degrees and aggregates. ling_vars must not change between
+    calls."""
+    def __init__(self, inference_engine, ling_vars, input_mat, labels):
+        input_mat = np.asarray(input_mat, dtype=float)
+        assert input_mat.ndim == 2
+        assert input_mat.shape[1] == len(ling_vars)
+        assert len(labels) == input_mat.shape[0]
+        self._inference_engine = inference_engine
+        self._ling_vars = tuple(ling_vars)
+        self._class_labels = tuple(inference_engine.class_labels)
+        self._membership_tensor = inference_engine.fuzzify_batch(
+            self._ling_vars, input_mat)
+        self._label_idxs = _to_label_idxs(labels, self._class_labels)
+
+    @property
+    def num_samples(self):
+        return len(self._label_idxs)
+
+    def evaluate(self, rule_base):
+        """Returns EvaluationReport for rule_base (a FuzzyRuleBase or
+        CompiledRuleBase):
+
+        - accuracy: fraction of samples classified as their true label;
+          samples with undefined mappings (for which classify() would raise
+          UndefinedMappingError) count as misclassified,
+        - undefined_rate: fraction of samples with undefined mappings,
+        - confusion_mat: (num_classes, num_classes + 1) int array, entry
+          [i, j] is num samples of class_labels[i] classified as
+          class_labels[j]; last column counts undefined mappings,
+        - margin_stats: MarginStats of per sample margins, each the score of
+          the true class minus the highest score of any other class
+          (positive iff correctly classified, barring ties),
+        - complexity: num specified fuzzy decision regions (as
+          calc_complexity() of FuzzyRuleBasedSystem), or None if rule_base
+          has antecedents that do not support it."""
+        if isinstance(rule_base, CompiledRuleBase):
+            compiled_rule_base = rule_base
+        else:
+            compiled_rule_base = rule_base.compile(self._ling_vars,
+                                                   self._class_labels)
+        matching_degree_mat = \
+            self._inference_engine.compute_matching_degree_mat(
+                compiled_rule_base, self._membership_tensor)
+        score_mat = self._inference_engine.aggregate_batch(
+            matching_degree_mat, compiled_rule_base.consequent_mat)
+        return _make_report(score_mat, self._label_idxs,
+                            calc_complexity(compiled_rule_base))
+
+
+def evaluate_score_mat(score_mat, labels, class_labels, complexity=None):
+    """Returns EvaluationReport (see Evaluator.evaluate()) for a
+    (num_samples, num_classes) score matrix already computed, e.g. by
+    score_batch(), with columns in class_labels order."""
+    score_mat = np.asarray(score_mat, dtype=float)
+    assert score_mat.ndim == 2
+    assert score_mat.shape[1] == len(class_labels)
+    assert len(labels) == score_mat.shape[0]
+    return _make_report(score_mat, _to_label_idxs(labels, class_labels),
+                        complexity)
+
+
+def calc_complexity(rule_base):
+    """Num specified fuzzy decision regions of rule_base, or None if it has
+    antecedents that do not support it."""
+    try:
+        return int(rule_base.calc_num_spec_fuzzy_decision_regions())
+    except NotImplementedError:
+        return None
+
+
+def _make_report(score_mat, label_idxs, complexity):
+    (num_samples, num_classes) = score_mat.shape
+    is_undefined = np.all(score_mat == SCORE_MIN, axis=1)
+    predicted_idxs = np.where(is_undefined, num_classes,
+                              np.argmax(score_mat, axis=1))
+    confusion_mat = np.bincount(
+        label_idxs * (num_classes + 1) + predicted_idxs,
+        minlength=num_classes * (num_classes + 1)).reshape(
+            (num_classes, num_classes + 1))
+    num_correct = int(np.trace(confusion_mat[:, :num_classes]))
+    num_undefined = int(np.count_nonzero(is_undefined))
+
+    sample_idxs = np.arange(num_samples)
+    true_scores = score_mat[sample_idxs, label_idxs]
+    other_score_mat = score_mat.copy()
+    other_score_mat[sample_idxs, label_idxs] = -np.inf
+    other_scores = np.max(other_score_mat, axis=1, initial=SCORE_MIN)
+    margins = true_scores - other_scores
+
+    if num_samples > 0:
+        margin_stats = MarginStats(float(np.mean(margins)),
+                                   float(np.std(margins)),
+                                   float(np.min(margins)),
+                                   float(np.max(margins)))
+        accuracy = num_correct / num_samples
+        undefined_rate = num_undefined / num_samples
+    else:
+        margin_stats = MarginStats(np.nan, np.nan, np.nan, np.nan)
+        accuracy = np.nan
+        undefined_rate = np.nan
+    return EvaluationReport(num_samples, accuracy, undefined_rate,
+                            confusion_mat, margin_stats, complexity)
+
+
+def _to_label_idxs(labels, class_labels):
+    label_idxs = {label: idx for (idx, label) in enumerate(class_labels)}
+    try:
+        return np.fromiter((label_idxs[label] for label in labels),
+                           dtype=np.intp,
+                           count=len(labels))
+    except KeyError as e:
+        raise ValueError(f"Unknown class label: {e.args[0]!r}")
+
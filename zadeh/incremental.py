@@ -0,0 +1,296 @@
+"""Incremental re-scoring of a rule base over a fixed dataset as single rules
+are added, removed or replaced, e.g. in a rule learning loop."""
+import abc
+
+import numpy as np
+
+from .aggregation import (AvgAggregation, BiasedAvgAggregation,
+                          BoundedSumAggregation, MaximumAggregation,
+                          WeightedAvgAggregation, calc_implications,
+                          implication_prod, sum_over_rule_chunks)
+from .compiled_rule_base import CompiledRuleBase
+from .constants import SCORE_MAX, SCORE_MIN
+from .rule_base import FuzzyRuleBase
+
+
+class IncrementalScorer:
+    """Holds per-rule matching degree vectors over input_mat plus an
+    aggregation state, so scores after a one rule change cost O(num_samples)
+    (times num_classes) rather than a full re-score.
+
+    Bounded sum, avg, biased avg and weighted avg aggregation keep running
+    sums; floating point rounding means these can drift (by a few ulps per
+    update) from what InferenceEngine.score_batch() gives for the same rule
+    base, call recompute() to resync exactly. Sums that should be zero are
+    reset from exact counts of non-zero terms, so drift never turns an
+    undefined mapping into a defined one. Max aggregation is exact: adding a
+    rule is a running max, removing one recomputes only the (sample, class)
+    entries where that rule gave the max. Other aggregation strats are fully
+    recomputed from the stored matching degrees on each scores access, as are
+    all strats with a non product implication."""
+    def __init__(self, inference_engine, ling_vars, rule_base, input_mat):
+        input_mat = np.asarray(input_mat, dtype=float)
+        assert input_mat.ndim == 2
+        assert input_mat.shape[1] == len(ling_vars)
+        self._inference_engine = inference_engine
+        self._ling_vars = tuple(ling_vars)
+        self._class_labels = tuple(inference_engine.class_labels)
+        self._num_samples = input_mat.shape[0]
+        self._membership_tensor = inference_engine.fuzzify_batch(
+            self._ling_vars, input_mat)
+        self._rules = list(rule_base)
+        compiled_rule_base = CompiledRuleBase.from_rules(
+            self._rules, self._ling_vars, self._class_labels)
+        matching_degree_mat = inference_engine.compute_matching_degree_mat(
+            compiled_rule_base, self._membership_tensor)
+        self._matching_degree_vecs = list(matching_degree_mat.T.copy())
+        self._consequent_vecs = list(compiled_rule_base.consequent_mat)
+        self._state = _make_state(inference_engine.aggregation_strat,
+                                  self._num_samples, len(self._class_labels))
+        self.recompute()
+
+    @property
+    def rules(self):
+        return tuple(self._rules)
+
+    @property
+    def rule_base(self):
+        return FuzzyRuleBase(self._rules)
+
+    @property
+    def num_rules(self):
+        return len(self._rules)
+
+    @property
+    def scores(self):
+        """(num_samples, num_classes) score matrix for current rule base."""
+        return self._state.scores(self._matching_degree_vecs,
+                                  self._consequent_vecs)
+
+    def classify(self):
+        """Masked array of class labels for current rule base, see
+        InferenceEngine.classify_batch()."""
+        return self._inference_engine.classify_score_mat(self.scores)
+
+    def add_rule(self, rule):
+        """Appends rule, returns its idx."""
+        (matching_degree_vec, consequent_vec) = self._compile_rule(rule)
+        self._rules.append(rule)
+        self._matching_degree_vecs.append(matching_degree_vec)
+        self._consequent_vecs.append(consequent_vec)
+        self._state.add(matching_degree_vec, consequent_vec)
+        return len(self._rules) - 1
+
+    def remove_rule(self, rule_idx):
+        """Removes rule at rule_idx (later rules shift down), returns it."""
+        rule = self._rules.pop(rule_idx)
+        matching_degree_vec = self._matching_degree_vecs.pop(rule_idx)
+        consequent_vec = self._consequent_vecs.pop(rule_idx)
+        self._state.remove(matching_degree_vec, consequent_vec,
+                           self._matching_degree_vecs, self._consequent_vecs)
+        return rule
+
+    def replace_rule(self, rule_idx, rule):
+        """Replaces rule at rule_idx, returns the old rule."""
+        (matching_degree_vec, consequent_vec) = self._compile_rule(rule)
+        old_rule = self._rules[rule_idx]
+        old_matching_degree_vec = self._matching_degree_vecs[rule_idx]
+        old_consequent_vec = self._consequent_vecs[rule_idx]
+        self._rules[rule_idx] = rule
+        self._matching_degree_vecs[rule_idx] = matching_degree_vec
+        self._consequent_vecs[rule_idx] = consequent_vec
+        self._state.remove(old_matching_degree_vec, old_consequent_vec,
+                           self._matching_degree_vecs, self._consequent_vecs)
+        self._state.add(matching_degree_vec, consequent_vec)
+        return old_rule
+
+    def recompute(self):
+        """Rebuilds aggregation state from stored matching degrees (antecedents
+        are not re-evaluated)."""
+        self._state.reset(self._matching_degree_vecs, self._consequent_vecs)
+
+    def _compile_rule(self, rule):
+        compiled_rule_base = CompiledRuleBase.from_rules([rule],
+                                                         self._ling_vars,
+                                                         self._class_labels)
+        matching_degree_vec = \
+            self._inference_engine.compute_matching_degree_mat(
+                compiled_rule_base, self._membership_tensor)[:, 0]
+        return (matching_degree_vec, compiled_rule_base.consequent_mat[0])
+
+
+def _stack(matching_degree_vecs, consequent_vecs, num_samples, num_classes):
+    # same (C order) layout as in InferenceEngine, so matmuls match exactly
+    matching_degree_mat = np.empty((num_samples, len(matching_degree_vecs)))
+    for (rule_idx, matching_degree_vec) in enumerate(matching_degree_vecs):
+        matching_degree_mat[:, rule_idx] = matching_degree_vec
+    consequent_mat = np.array(consequent_vecs).reshape(
+        (len(consequent_vecs), num_classes))
+    return (matching_degree_mat, consequent_mat)
+
+
+def _sum_matching_degrees(matching_degree_mat, consequent_mat):
+    return np.sum(matching_degree_mat, axis=-1)
+
+
+class _SumState(metaclass=abc.ABCMeta):
+    """Running sums shared by the sum based aggregation strats."""
+    def __init__(self, num_samples, num_classes):
+        self._num_samples = num_samples
+        self._num_classes = num_classes
+
+    def reset(self, matching_degree_vecs, consequent_vecs):
+        (matching_degree_mat,
+         consequent_mat) = _stack(matching_degree_vecs, consequent_vecs,
+                                  self._num_samples, self._num_classes)
+        self._sum = sum_over_rule_chunks(np.matmul, matching_degree_mat,
+                                         consequent_mat)
+        self._num_non_zero = ((matching_degree_mat != 0).astype(np.int64)
+                              @ (consequent_mat != 0).astype(np.int64))
+        self._matching_degree_sum = sum_over_rule_chunks(
+            _sum_matching_degrees, matching_degree_mat, consequent_mat)
+        self._num_firing = np.count_nonzero(matching_degree_mat, axis=1)
+
+    def add(self, matching_degree_vec, consequent_vec):
+        self._update(matching_degree_vec, consequent_vec, 1)
+
+    def remove(self, matching_degree_vec, consequent_vec,
+               remaining_matching_degree_vecs, remaining_consequent_vecs):
+        self._update(matching_degree_vec, consequent_vec, -1)
+
+    def _update(self, matching_degree_vec, consequent_vec, sign):
+        self._sum += sign * np.outer(matching_degree_vec, consequent_vec)
+        self._num_non_zero += sign * np.outer(matching_degree_vec != 0,
+                                              consequent_vec != 0)
+        self._matching_degree_sum += sign * matching_degree_vec
+        self._num_firing += sign * (matching_degree_vec != 0)
+        # exact zeros where no terms are left, no negative drift
+        self._sum[self._num_non_zero == 0] = 0.0
+        np.maximum(self._sum, 0.0, out=self._sum)
+        self._matching_degree_sum[self._num_firing == 0] = 0.0
+        np.maximum(self._matching_degree_sum,
+                   0.0,
+                   out=self._matching_degree_sum)
+
+    @abc.abstractmethod
+    def scores(self, matching_degree_vecs, consequent_vecs):
+        raise NotImplementedError
+
+
+class _BoundedSumState(_SumState):
+    def scores(self, matching_degree_vecs, consequent_vecs):
+        return np.minimum(self._sum, SCORE_MAX)
+
+
+class _AvgState(_SumState):
+    def scores(self, matching_degree_vecs, consequent_vecs):
+        num_rules = len(consequent_vecs)
+        if num_rules == 0:
+            return np.full(self._sum.shape, SCORE_MIN)
+        return np.minimum(self._sum / num_rules, SCORE_MAX)
+
+
+class _BiasedAvgState(_SumState):
+    def scores(self, matching_degree_vecs, consequent_vecs):
+        scores = np.full(self._sum.shape, SCORE_MIN)
+        np.divide(self._sum,
+                  self._num_non_zero,
+                  out=scores,
+                  where=(self._num_non_zero != 0))
+        return np.minimum(scores, SCORE_MAX, out=scores)
+
+
+class _WeightedAvgState(_SumState):
+    def scores(self, matching_degree_vecs, consequent_vecs):
+        scores = np.full(self._sum.shape, SCORE_MIN)
+        np.divide(self._sum,
+                  self._matching_degree_sum[:, np.newaxis],
+                  out=scores,
+                  where=(self._num_firing != 0)[:, np.newaxis])
+        return np.minimum(scores, SCORE_MAX, out=scores)
+
+
+class _MaxState:
+    def __init__(self, num_samples, num_classes):
+        self._num_samples = num_samples
+        self._num_classes = num_classes
+
+    def reset(self, matching_degree_vecs, consequent_vecs):
+        self._max = self._calc_max(
+            *_stack(matching_degree_vecs, consequent_vecs, self._num_samples,
+                    self._num_classes))
+
+    def _calc_max(self, matching_degree_mat, consequent_mat):
+        # initial of SCORE_MIN gives same result as MaximumAggregation, as all
+        # implications are >= SCORE_MIN, and handles zero rules
+        return np.max(calc_implications(matching_degree_mat, consequent_mat),
+                      axis=-2,
+                      initial=SCORE_MIN)
+
+    def add(self, matching_degree_vec, consequent_vec):
+        np.maximum(self._max,
+                   np.outer(matching_degree_vec, consequent_vec),
+                   out=self._max)
+
+    def remove(self, matching_degree_vec, consequent_vec,
+               remaining_matching_degree_vecs, remaining_consequent_vecs):
+        implication = np.outer(matching_degree_vec, consequent_vec)
+        # only samples where removed rule gave a (non-min) max can change
+        sample_idxs = np.nonzero(
+            np.any((implication == self._max) & (implication != SCORE_MIN),
+                   axis=1))[0]
+        if len(sample_idxs) > 0:
+            (matching_degree_mat, consequent_mat) = _stack(
+                [
+                    vec[sample_idxs]
+                    for vec in remaining_matching_degree_vecs
+                ], remaining_consequent_vecs, len(sample_idxs),
+                self._num_classes)
+            self._max[sample_idxs] = self._calc_max(matching_degree_mat,
+                                                    consequent_mat)
+
+    def scores(self, matching_degree_vecs, consequent_vecs):
+        return self._max.copy()
+
+
+class _RecomputeState:
+    """Fallback for aggregation strats without an incremental form."""
+    def __init__(self, aggregation_strat, num_samples, num_classes):
+        self._aggregation_strat = aggregation_strat
+        self._num_samples = num_samples
+        self._num_classes = num_classes
+
+    def reset(self, matching_degree_vecs, consequent_vecs):
+        pass
+
+    def add(self, matching_degree_vec, consequent_vec):
+        pass
+
+    def remove(self, matching_degree_vec, consequent_vec,
+               remaining_matching_degree_vecs, remaining_consequent_vecs):
+        pass
+
+    def scores(self, matching_degree_vecs, consequent_vecs):
+        return self._aggregation_strat.aggregate(
+            *_stack(matching_degree_vecs, consequent_vecs, self._num_samples,
+                    self._num_classes))
+
+
+_INCREMENTAL_STATES = {
+    MaximumAggregation: _MaxState,
+    BoundedSumAggregation: _BoundedSumState,
+    AvgAggregation: _AvgState,
+    BiasedAvgAggregation: _BiasedAvgState,
+    WeightedAvgAggregation: _WeightedAvgState
+}
+
+
+def _make_state(aggregation_strat, num_samples, num_classes):
+    # incremental states all assume product implication
+    if aggregation_strat.implication is implication_prod:
+        try:
+            return _INCREMENTAL_STATES[type(aggregation_strat)](num_samples,
+                                                                num_classes)
+        except KeyError:
+            pass
+    return _RecomputeState(aggregation_strat, num_samples, num_classes)
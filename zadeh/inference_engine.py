@@ -1,59 +1,453 @@
-from collections import namedtuple
+import heapq
+import time
+from collections import OrderedDict, namedtuple
 
-import numpy as np
-
-from .constants import SCORE_MAX, SCORE_MIN
+from .aggregation import (AGGREGATION_STRATS, IMPLICATIONS,
+                          MaximumAggregation, implication_prod)
+from .compiled_rule_base import CompiledRuleBase
+from .constants import MATCHING_MAX, MATCHING_MIN, SCORE_MAX, SCORE_MIN
 from .error import UndefinedMappingError
+from .instrumentation import (AGGREGATE_STAGE, COMPILE_STAGE,
+                              EVAL_ANTECEDENTS_STAGE, FUZZIFY_STAGE,
+                              InferenceStats)
+from .logical_ops import (get_array_logical_op, get_unchecked_logical_op,
+                          is_t_conorm, is_t_norm)
+from .membership_cache import MembershipCache, MembershipCacheStats
+from .util import lazy_numpy as np
 
 MatchingRecord = namedtuple("MatchingRecord", ["rule", "matching_degree"])
 
+# debug mode asserts validity of membership vals, matching degrees and scores
+# on every call; fast mode only validates rule bases when they are compiled
+DEBUG_MODE = "debug"
+FAST_MODE = "fast"
+
 
 class InferenceEngine:
-    """FITA inference engine."""
+    """FITA inference engine.
+
+    If use_rule_activation_index is set and the logical ops are a known t-norm
+    / t-conorm, score() only evaluates rules that can have non-zero matching
+    degree for the given input (see RuleActivationIndex); all other rules get
+    matching degree zero without being evaluated.
+
+    Scalar inference (score(), classify(), score_top_k()) runs in plain
+    Python on the rule base's ScalarRuleBase, so needs no NumPy, unless
+    aggregation_strat is not one of AGGREGATION_STRATS with one of
+    IMPLICATIONS (aggregate() is then used) or instrumentation is enabled.
+    Batched inference uses the array kernels registered for the logical ops
+    (see register_logical_op()).
+
+    With MaximumAggregation (product implication) and a known t-norm /
+    t-conorm, classify() and score_top_k() evaluate rules in decreasing order
+    of their max consequent val and stop once no remaining rule can change
+    the result (see get_implication_bound_order() of ScalarRuleBase).
+
+    mode is either DEBUG_MODE or FAST_MODE, see set_mode()."""
     def __init__(self,
                  class_labels,
                  logical_and_strat=None,
                  logical_or_strat=None,
-                 aggregation_strat=None):
+                 aggregation_strat=None,
+                 use_rule_activation_index=True,
+                 mode=DEBUG_MODE):
         self._class_labels = class_labels
         self._logical_and_strat = logical_and_strat
         self._logical_or_strat = logical_or_strat
         self._aggregation_strat = aggregation_strat
+        self._logical_and_array_op = \
+            get_array_logical_op(logical_and_strat, MATCHING_MAX) \
+            if logical_and_strat is not None else None
+        self._logical_or_array_op = \
+            get_array_logical_op(logical_or_strat, MATCHING_MIN) \
+            if logical_or_strat is not None else None
+        self._use_rule_activation_index = \
+            (use_rule_activation_index and is_t_norm(logical_and_strat)
+             and (logical_or_strat is None
+                  or is_t_conorm(logical_or_strat)))
+        self._use_aggregate_fired = \
+            (type(aggregation_strat) in AGGREGATION_STRATS
+             and aggregation_strat.implication in IMPLICATIONS)
+        self._use_early_exit = \
+            (type(aggregation_strat) is MaximumAggregation
+             and aggregation_strat.implication is implication_prod
+             and is_t_norm(logical_and_strat)
+             and (logical_or_strat is None
+                  or is_t_conorm(logical_or_strat)))
+        self.set_mode(mode)
+        self.reset_membership_cache_stats()
+        self._stats = None
 
     @property
     def class_labels(self):
         return self._class_labels
 
+    @property
+    def logical_and_strat(self):
+        return self._logical_and_strat
+
+    @property
+    def logical_or_strat(self):
+        return self._logical_or_strat
+
+    @property
+    def aggregation_strat(self):
+        return self._aggregation_strat
+
+    @property
+    def use_rule_activation_index(self):
+        return self._use_rule_activation_index
+
+    @property
+    def mode(self):
+        return self._mode
+
+    def set_mode(self, mode):
+        """In DEBUG_MODE every membership val, matching degree and score
+        is range checked as it is computed. In FAST_MODE rule bases are
+        validated once when compiled and inference then runs with no per-call
+        checks (inputs outside ling var domains are not detected)."""
+        assert mode in (DEBUG_MODE, FAST_MODE)
+        self._mode = mode
+        self._validate = (mode == DEBUG_MODE)
+        if self._validate:
+            self._eval_logical_and_strat = self._logical_and_strat
+            self._eval_logical_or_strat = self._logical_or_strat
+        else:
+            self._eval_logical_and_strat = \
+                get_unchecked_logical_op(self._logical_and_strat)
+            self._eval_logical_or_strat = \
+                get_unchecked_logical_op(self._logical_or_strat)
+
+    @property
+    def membership_cache_stats(self):
+        """Membership cache hits/misses summed over all score() calls since
+        last reset."""
+        return MembershipCacheStats(self._num_membership_cache_hits,
+                                    self._num_membership_cache_misses)
+
+    def reset_membership_cache_stats(self):
+        self._num_membership_cache_hits = 0
+        self._num_membership_cache_misses = 0
+
+    @property
+    def stats(self):
+        """Attached InferenceStats, or None if instrumentation is
+        disabled."""
+        return self._stats
+
+    def enable_instrumentation(self, stats=None):
+        """Attaches stats (a new InferenceStats by default) that record
+        every subsequent score/classify call, returns it. While disabled (the
+        default) the only cost is one None check per call."""
+        self._stats = stats if stats is not None else InferenceStats()
+        return self._stats
+
+    def disable_instrumentation(self):
+        self._stats = None
+
     def score(self, ling_vars, rule_base, input_vec):
         """Takes input vector of features, returns array of score values,
         one for each class."""
-        matching_records = self._compute_matching_records(
-            ling_vars, rule_base, input_vec)
-        score_array = self._aggregation_strat(matching_records,
-                                              self._class_labels)
-        assert self._score_array_is_valid(score_array)
+        if self._stats is not None:
+            return self._score_instrumented(ling_vars, rule_base, input_vec)
+        scalar_rule_base = self._compile_scalar_rule_base(rule_base)
+        (rule_idxs, matching_degrees) = self._eval_fired_rules(
+            ling_vars, scalar_rule_base, input_vec)
+        score_vec = self._aggregate_fired(ling_vars, rule_base,
+                                          scalar_rule_base, rule_idxs,
+                                          matching_degrees)
+        score_array = OrderedDict(zip(self._class_labels, score_vec))
+        if self._validate:
+            assert self._score_array_is_valid(score_array)
         return score_array
 
-    def _compute_matching_records(self, ling_vars, rule_base, input_vec):
-        matching_records = []
-        for rule in rule_base:
-            matching_degree = rule.eval_antecedent(ling_vars, input_vec,
-                                                   self._logical_and_strat,
-                                                   self._logical_or_strat)
-            matching_records.append(MatchingRecord(rule, matching_degree))
-        return matching_records
+    def _score_instrumented(self, ling_vars, rule_base, input_vec):
+        start = time.perf_counter()
+        scalar_rule_base = self._compile_scalar_rule_base(rule_base)
+        compiled = time.perf_counter()
+        (rule_idxs, matching_degrees) = self._eval_fired_rules(
+            ling_vars, scalar_rule_base, input_vec)
+        evaluated = time.perf_counter()
+        score_vec = self._aggregate_fired(ling_vars, rule_base,
+                                          scalar_rule_base, rule_idxs,
+                                          matching_degrees)
+        score_array = OrderedDict(zip(self._class_labels, score_vec))
+        if self._validate:
+            assert self._score_array_is_valid(score_array)
+        aggregated = time.perf_counter()
+        self._stats.record_score(
+            "score", rule_base,
+            self._make_matching_degree_vec(len(scalar_rule_base), rule_idxs,
+                                           matching_degrees), {
+                COMPILE_STAGE: compiled - start,
+                EVAL_ANTECEDENTS_STAGE: evaluated - compiled,
+                AGGREGATE_STAGE: aggregated - evaluated
+            })
+        return score_array
+
+    def _compile_scalar_rule_base(self, rule_base):
+        if isinstance(rule_base, CompiledRuleBase):
+            assert rule_base.class_labels == tuple(self._class_labels)
+            return rule_base.compile_scalar()
+        else:
+            return rule_base.compile_scalar(self._class_labels)
+
+    def _eval_fired_rules(self, ling_vars, scalar_rule_base, input_vec):
+        """Returns (rule_idxs, matching_degrees) lists of the rules with
+        non-zero matching degree, all others have matching degree zero."""
+        # fuzzify input once, share the membership vals between all rules
+        membership_cache = MembershipCache(ling_vars, input_vec,
+                                           self._validate)
+        rules = scalar_rule_base.rules
+        if self._use_rule_activation_index:
+            candidate_rule_idxs = scalar_rule_base.get_activation_index(
+                ling_vars).find_candidate_rule_idxs(input_vec)
+        else:
+            candidate_rule_idxs = range(len(rules))
+        rule_idxs = []
+        matching_degrees = []
+        for rule_idx in candidate_rule_idxs:
+            matching_degree = rules[rule_idx].eval_antecedent(
+                ling_vars, input_vec, self._eval_logical_and_strat,
+                self._eval_logical_or_strat, membership_cache)
+            if matching_degree != MATCHING_MIN:
+                rule_idxs.append(rule_idx)
+                matching_degrees.append(matching_degree)
+        self._update_membership_cache_stats(membership_cache.stats)
+        return (rule_idxs, matching_degrees)
+
+    def _aggregate_fired(self, ling_vars, rule_base, scalar_rule_base,
+                         rule_idxs, matching_degrees):
+        """Returns list of scores in class_labels order."""
+        if self._use_aggregate_fired:
+            consequent_rows = scalar_rule_base.consequent_rows
+            return self._aggregation_strat.aggregate_fired(
+                matching_degrees,
+                [consequent_rows[rule_idx] for rule_idx in rule_idxs],
+                len(scalar_rule_base), len(self._class_labels))
+        # other aggregation strats / implications only have array form
+        compiled_rule_base = self._compile_rule_base(ling_vars, rule_base)
+        return self._aggregation_strat.aggregate(
+            self._make_matching_degree_vec(len(scalar_rule_base), rule_idxs,
+                                           matching_degrees),
+            compiled_rule_base.consequent_mat).tolist()
+
+    def _make_matching_degree_vec(self, num_rules, rule_idxs,
+                                  matching_degrees):
+        matching_degree_vec = np.zeros(num_rules)
+        matching_degree_vec[rule_idxs] = matching_degrees
+        return matching_degree_vec
+
+    def _update_membership_cache_stats(self, stats):
+        self._num_membership_cache_hits += stats.num_hits
+        self._num_membership_cache_misses += stats.num_misses
 
     def _score_array_is_valid(self, score_array):
-        return np.all([
+        return all([
             SCORE_MIN <= score <= SCORE_MAX for score in score_array.values()
         ])
 
+    def score_top_k(self, ling_vars, rule_base, input_vec, k):
+        """Returns OrderedDict mapping the (up to) k highest scoring class
+        labels to their scores, highest first (ties in class_labels order).
+        Scores are the same as score() gives."""
+        assert k >= 1
+        if self._use_early_exit and self._stats is None:
+            score_vec = self._score_early_exit(ling_vars, rule_base,
+                                               input_vec, k)
+        else:
+            score_vec = list(
+                self.score(ling_vars, rule_base, input_vec).values())
+        class_idxs = sorted(range(len(score_vec)),
+                            key=lambda class_idx: -score_vec[class_idx])[:k]
+        return OrderedDict([(self._class_labels[class_idx],
+                             score_vec[class_idx])
+                            for class_idx in class_idxs])
+
+    def _score_early_exit(self, ling_vars, rule_base, input_vec, k):
+        """Returns list of max aggregated scores in class_labels order, of
+        which only the k highest (and which classes have them) are
+        guaranteed to be final: rules are evaluated in decreasing order of
+        implication bound, stopping once the next bound is below the k-th
+        highest score so far (or zero)."""
+        scalar_rule_base = self._compile_scalar_rule_base(rule_base)
+        (rule_order, rule_ranks, implication_bounds) = \
+            scalar_rule_base.get_implication_bound_order()
+        if self._use_rule_activation_index:
+            candidate_rule_idxs = scalar_rule_base.get_activation_index(
+                ling_vars).find_candidate_rule_idxs(input_vec)
+            rule_idxs = [
+                rule_order[rank] for rank in sorted(
+                    [rule_ranks[rule_idx] for rule_idx in candidate_rule_idxs])
+            ]
+        else:
+            rule_idxs = rule_order
+        membership_cache = MembershipCache(ling_vars, input_vec,
+                                           self._validate)
+        rules = scalar_rule_base.rules
+        consequent_rows = scalar_rule_base.consequent_rows
+        scores = [SCORE_MIN] * len(self._class_labels)
+        # k-th highest score, only scores above it can change the result
+        threshold = SCORE_MIN
+        for rule_idx in rule_idxs:
+            implication_bound = implication_bounds[rule_idx]
+            if implication_bound < threshold or \
+                    implication_bound == SCORE_MIN:
+                break
+            matching_degree = rules[rule_idx].eval_antecedent(
+                ling_vars, input_vec, self._eval_logical_and_strat,
+                self._eval_logical_or_strat, membership_cache)
+            if matching_degree == MATCHING_MIN:
+                continue
+            is_updated = False
+            for (class_idx, consequent_val) in \
+                    enumerate(consequent_rows[rule_idx]):
+                implication = matching_degree * consequent_val
+                if implication > scores[class_idx]:
+                    scores[class_idx] = implication
+                    is_updated = True
+            if is_updated and k <= len(scores):
+                threshold = heapq.nlargest(k, scores)[-1]
+        self._update_membership_cache_stats(membership_cache.stats)
+        return scores
+
     def classify(self, ling_vars, rule_base, input_vec):
+        if self._use_early_exit and self._stats is None:
+            score_vec = self._score_early_exit(ling_vars, rule_base,
+                                               input_vec, 1)
+            if all([score == SCORE_MIN for score in score_vec]):
+                raise UndefinedMappingError
+            return self._class_labels[score_vec.index(max(score_vec))]
         score_array = self.score(ling_vars, rule_base, input_vec)
-        if not self._all_scores_are_min(score_array):
+        is_undefined = self._all_scores_are_min(score_array)
+        if self._stats is not None:
+            self._stats.record_classify("classify", 1, int(is_undefined))
+        if not is_undefined:
             return max(score_array, key=score_array.get)
         else:
             raise UndefinedMappingError
 
     def _all_scores_are_min(self, score_array):
-        return np.all([score == SCORE_MIN for score in score_array.values()])
+        return all([score == SCORE_MIN for score in score_array.values()])
+
+    def score_batch(self, ling_vars, rule_base, input_mat):
+        """Takes matrix of input vectors (one per row), returns matrix of score
+        values with one row per input vector and one column per class (in
+        class_labels order). rule_base can be a FuzzyRuleBase or a
+        CompiledRuleBase."""
+        input_mat = np.asarray(input_mat, dtype=float)
+        assert input_mat.ndim == 2
+        assert input_mat.shape[1] == len(ling_vars)
+        if self._stats is not None:
+            return self._score_batch_instrumented(ling_vars, rule_base,
+                                                  input_mat)
+        compiled_rule_base = self._compile_rule_base(ling_vars, rule_base)
+        membership_tensor = self.fuzzify_batch(
+            ling_vars, input_mat,
+            compiled_rule_base.max_num_membership_funcs)
+        matching_degree_mat = self.compute_matching_degree_mat(
+            compiled_rule_base, membership_tensor)
+        return self.aggregate_batch(matching_degree_mat,
+                                    compiled_rule_base.consequent_mat)
+
+    def _score_batch_instrumented(self, ling_vars, rule_base, input_mat):
+        start = time.perf_counter()
+        compiled_rule_base = self._compile_rule_base(ling_vars, rule_base)
+        compiled = time.perf_counter()
+        membership_tensor = self.fuzzify_batch(
+            ling_vars, input_mat,
+            compiled_rule_base.max_num_membership_funcs)
+        fuzzified = time.perf_counter()
+        matching_degree_mat = self.compute_matching_degree_mat(
+            compiled_rule_base, membership_tensor)
+        evaluated = time.perf_counter()
+        score_mat = self.aggregate_batch(matching_degree_mat,
+                                         compiled_rule_base.consequent_mat)
+        aggregated = time.perf_counter()
+        self._stats.record_score(
+            "score_batch", rule_base, matching_degree_mat, {
+                COMPILE_STAGE: compiled - start,
+                FUZZIFY_STAGE: fuzzified - compiled,
+                EVAL_ANTECEDENTS_STAGE: evaluated - fuzzified,
+                AGGREGATE_STAGE: aggregated - evaluated
+            })
+        return score_mat
+
+    def _compile_rule_base(self, ling_vars, rule_base):
+        if isinstance(rule_base, CompiledRuleBase):
+            assert rule_base.class_labels == tuple(self._class_labels)
+            return rule_base
+        else:
+            return rule_base.compile(ling_vars, self._class_labels)
+
+    def fuzzify_batch(self,
+                      ling_vars,
+                      input_mat,
+                      max_num_membership_funcs=None):
+        """First stage of score_batch(): returns (num_samples, num_features,
+        max_num_membership_funcs) membership tensor, zero padded for ling vars
+        with fewer membership funcs. max_num_membership_funcs defaults to the
+        max over ling_vars."""
+        if max_num_membership_funcs is None:
+            max_num_membership_funcs = max(
+                [ling_var.num_membership_funcs for ling_var in ling_vars])
+        membership_tensor = np.zeros(
+            (input_mat.shape[0], len(ling_vars), max_num_membership_funcs))
+        for (feature_idx, ling_var) in enumerate(ling_vars):
+            membership_tensor[:, feature_idx, :ling_var.num_membership_funcs] \
+                = ling_var.eval_all_membership_funcs_array(
+                    input_mat[:, feature_idx], self._validate)
+        return membership_tensor
+
+    def compute_matching_degree_mat(self, compiled_rule_base,
+                                    membership_tensor):
+        """Second stage of score_batch(): returns (num_samples, num_rules)
+        matching degree matrix."""
+        return compiled_rule_base.eval_matching_degree_mat(
+            membership_tensor, self._logical_and_array_op,
+            self._logical_or_array_op, self._validate)
+
+    def aggregate_batch(self, matching_degree_mat, consequent_mat):
+        """Final stage of score_batch(): returns (num_samples, num_classes)
+        score matrix."""
+        score_mat = self._aggregation_strat.aggregate(matching_degree_mat,
+                                                      consequent_mat)
+        if self._validate:
+            assert self._score_mat_is_valid(score_mat)
+        return score_mat
+
+    def merge_partial_states(self, partial_states, num_rules):
+        """As aggregate_batch(), but from the partial aggregation states of
+        every rule chunk, in rule order (see ChunkedAggregationStrategyABC);
+        num_rules is the total over all chunks."""
+        score_mat = self._aggregation_strat.merge_partial_states(
+            partial_states, num_rules)
+        if self._validate:
+            assert self._score_mat_is_valid(score_mat)
+        return score_mat
+
+    def _score_mat_is_valid(self, score_mat):
+        return np.all((SCORE_MIN <= score_mat) & (score_mat <= SCORE_MAX))
+
+    def classify_batch(self, ling_vars, rule_base, input_mat):
+        """Returns masked array of class labels, one per input vector. Input
+        vectors whose scores are all min (for which classify() would raise
+        UndefinedMappingError) are masked out."""
+        score_mat = self.score_batch(ling_vars, rule_base, input_mat)
+        labels = self.classify_score_mat(score_mat)
+        if self._stats is not None:
+            self._stats.record_classify(
+                "classify_batch", len(labels),
+                int(np.count_nonzero(np.ma.getmaskarray(labels))))
+        return labels
+
+    def classify_score_mat(self, score_mat):
+        """Turns score matrix as returned by score_batch() into masked array of
+        class labels, as returned by classify_batch()."""
+        undefined_mask = self._all_scores_are_min_batch(score_mat)
+        labels = np.asarray(self._class_labels)[np.argmax(score_mat, axis=1)]
+        return np.ma.masked_array(labels, mask=undefined_mask)
+
+    def _all_scores_are_min_batch(self, score_mat):
+        return np.all(score_mat == SCORE_MIN, axis=1)
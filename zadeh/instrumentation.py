@@ -0,0 +1,149 @@
+"""Opt-in inference stats, see InferenceEngine.enable_instrumentation()."""
+from .util import lazy_numpy as np
+
+COMPILE_STAGE = "compile"
+FUZZIFY_STAGE = "fuzzify"
+EVAL_ANTECEDENTS_STAGE = "eval_antecedents"
+AGGREGATE_STAGE = "aggregate"
+STAGES = (COMPILE_STAGE, FUZZIFY_STAGE, EVAL_ANTECEDENTS_STAGE,
+          AGGREGATE_STAGE)
+
+
+class InferenceStats:
+    """Accumulates stats over the score/classify calls of the engine it is
+    attached to:
+
+    - per stage wall times (see STAGES); for scalar score() calls
+      fuzzification happens lazily as antecedents are evaluated, so it is
+      counted under EVAL_ANTECEDENTS_STAGE,
+    - num score calls, samples scored, samples classified and undefined
+      mappings,
+    - histogram of non-zero matching degrees (num_matching_degree_bins equal
+      width bins over (0, 1]) plus count of zero ones,
+    - if per_rule, per-rule firing (non-zero matching degree) counts and
+      matching degree sums, for finding hot or dead rules. These are for the
+      most recently scored rule base and start over when a different one is
+      scored.
+
+    If given, callback is called after every call with a dict describing just
+    that call."""
+    def __init__(self, num_matching_degree_bins=10, per_rule=False,
+                 callback=None):
+        assert num_matching_degree_bins >= 1
+        self._num_matching_degree_bins = num_matching_degree_bins
+        self._per_rule = per_rule
+        self._callback = callback
+        self.reset()
+
+    @property
+    def per_rule(self):
+        return self._per_rule
+
+    def reset(self):
+        self._stage_times = dict.fromkeys(STAGES, 0.0)
+        self._num_score_calls = 0
+        self._num_score_batch_calls = 0
+        self._num_samples_scored = 0
+        self._num_classified = 0
+        self._num_undefined = 0
+        self._matching_degree_counts = np.zeros(
+            self._num_matching_degree_bins, dtype=np.int64)
+        self._num_zero_matching_degrees = 0
+        self._rule_base = None
+        self._rule_firing_counts = None
+        self._rule_matching_degree_sums = None
+
+    def record_score(self, call, rule_base, matching_degrees, stage_times):
+        """Records one score() (matching_degrees is a (num_rules, ) vector)
+        or score_batch() (a (num_samples, num_rules) matrix) call."""
+        matching_degree_mat = np.atleast_2d(matching_degrees)
+        num_samples = matching_degree_mat.shape[0]
+        if matching_degrees.ndim == 1:
+            self._num_score_calls += 1
+        else:
+            self._num_score_batch_calls += 1
+        self._num_samples_scored += num_samples
+        for (stage, stage_time) in stage_times.items():
+            self._stage_times[stage] += stage_time
+
+        is_firing = (matching_degree_mat != 0)
+        num_firing = int(np.count_nonzero(is_firing))
+        self._num_zero_matching_degrees += matching_degree_mat.size - \
+            num_firing
+        bin_idxs = np.minimum(
+            (matching_degree_mat[is_firing] *
+             self._num_matching_degree_bins).astype(np.intp),
+            self._num_matching_degree_bins - 1)
+        self._matching_degree_counts += np.bincount(
+            bin_idxs, minlength=self._num_matching_degree_bins)
+
+        if self._per_rule:
+            if rule_base is not self._rule_base:
+                self._rule_base = rule_base
+                self._rule_firing_counts = np.zeros(
+                    matching_degree_mat.shape[1], dtype=np.int64)
+                self._rule_matching_degree_sums = np.zeros(
+                    matching_degree_mat.shape[1])
+            self._rule_firing_counts += np.count_nonzero(is_firing, axis=0)
+            self._rule_matching_degree_sums += np.sum(matching_degree_mat,
+                                                      axis=0)
+
+        if self._callback is not None:
+            self._callback({
+                "call": call,
+                "num_samples": num_samples,
+                "num_rules": matching_degree_mat.shape[1],
+                "num_firing": num_firing,
+                "stage_times_s": dict(stage_times)
+            })
+
+    def record_classify(self, call, num_samples, num_undefined):
+        self._num_classified += num_samples
+        self._num_undefined += num_undefined
+        if self._callback is not None:
+            self._callback({
+                "call": call,
+                "num_samples": num_samples,
+                "num_undefined": num_undefined
+            })
+
+    def dead_rule_idxs(self):
+        """Idxs of rules that never fired, needs per_rule."""
+        assert self._per_rule
+        if self._rule_firing_counts is None:
+            return np.array([], dtype=np.intp)
+        return np.nonzero(self._rule_firing_counts == 0)[0]
+
+    def hot_rule_idxs(self, k):
+        """Idxs of (up to) k rules that fired most, most first; needs
+        per_rule."""
+        assert self._per_rule
+        if self._rule_firing_counts is None:
+            return np.array([], dtype=np.intp)
+        return np.argsort(-self._rule_firing_counts, kind="stable")[:k]
+
+    def snapshot(self):
+        """Returns plain dict of everything recorded so far."""
+        return {
+            "num_score_calls": self._num_score_calls,
+            "num_score_batch_calls": self._num_score_batch_calls,
+            "num_samples_scored": self._num_samples_scored,
+            "num_classified": self._num_classified,
+            "num_undefined": self._num_undefined,
+            "undefined_rate": (self._num_undefined / self._num_classified)
+            if self._num_classified > 0 else 0.0,
+            "stage_times_s": dict(self._stage_times),
+            "matching_degree_hist": {
+                "bin_edges":
+                np.linspace(0, 1, self._num_matching_degree_bins +
+                            1).tolist(),
+                "counts": self._matching_degree_counts.tolist(),
+                "num_zero": self._num_zero_matching_degrees
+            },
+            "rule_firing_counts":
+            self._rule_firing_counts.tolist()
+            if self._rule_firing_counts is not None else None,
+            "rule_matching_degree_sums":
+            self._rule_matching_degree_sums.tolist()
+            if self._rule_matching_degree_sums is not None else None
+        }
@@ -0,0 +1,89 @@
+from collections.abc import Sequence
+
+from .antecedent import UNSPECIFIED, CNFAntecedent, ConjunctiveAntecedent
+from .rule import FuzzyRule
+from .util import lazy_numpy as np
+
+CNF_ANTECEDENT_KIND = 0
+CONJUNCTIVE_ANTECEDENT_KIND = 1
+_ANTECEDENT_KINDS = {
+    CNFAntecedent: CNF_ANTECEDENT_KIND,
+    ConjunctiveAntecedent: CONJUNCTIVE_ANTECEDENT_KIND
+}
+
+
+def get_antecedent_kind(antecedent):
+    try:
+        return _ANTECEDENT_KINDS[type(antecedent)]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported antecedent type: {type(antecedent).__name__}")
+
+
+class LazyRuleSequence(Sequence):
+    """Read-only sequence of FuzzyRules backed by compiled rule base arrays
+    (see CompiledRuleBase): each rule object is only built on first access,
+    then kept."""
+    def __init__(self, antecedent_masks, antecedent_kinds, consequent_mat,
+                 class_labels, num_membership_funcs):
+        assert len(antecedent_masks) == len(antecedent_kinds) == \
+            len(consequent_mat)
+        self._antecedent_masks = antecedent_masks
+        self._antecedent_kinds = antecedent_kinds
+        self._consequent_mat = consequent_mat
+        self._class_labels = tuple(class_labels)
+        self._num_membership_funcs = tuple(num_membership_funcs)
+        self._rules = [None] * len(antecedent_kinds)
+
+    @property
+    def antecedent_kinds(self):
+        return self._antecedent_kinds
+
+    @property
+    def num_built(self):
+        return sum([rule is not None for rule in self._rules])
+
+    def __len__(self):
+        return len(self._rules)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return tuple(
+                [self[rule_idx] for rule_idx in range(*idx.indices(len(self)))])
+        rule = self._rules[idx]
+        if rule is None:
+            rule = self._build_rule(idx)
+            self._rules[idx] = rule
+        return rule
+
+    def get_sub_sequence(self, start, stop):
+        """LazyRuleSequence of rules [start, stop), built afresh."""
+        return self.__class__(self._antecedent_masks[start:stop],
+                              self._antecedent_kinds[start:stop],
+                              self._consequent_mat[start:stop],
+                              self._class_labels, self._num_membership_funcs)
+
+    def _build_rule(self, rule_idx):
+        antecedent_mask = self._antecedent_masks[rule_idx]
+        if self._antecedent_kinds[rule_idx] == CNF_ANTECEDENT_KIND:
+            antecedent = CNFAntecedent([
+                tuple(mf_mask[:num_mfs].astype(int).tolist())
+                for (mf_mask, num_mfs) in zip(antecedent_mask,
+                                              self._num_membership_funcs)
+            ])
+        else:
+            antecedent = ConjunctiveAntecedent([
+                int(np.argmax(mf_mask)) if np.any(mf_mask) else UNSPECIFIED
+                for mf_mask in antecedent_mask
+            ])
+        consequent = dict(
+            zip(self._class_labels, self._consequent_mat[rule_idx].tolist()))
+        return FuzzyRule(antecedent, consequent)
+
+    def calc_num_spec_fuzzy_decision_regions(self):
+        """As FuzzyRuleBase.calc_num_spec_fuzzy_decision_regions(), computed
+        from the arrays without building any rules."""
+        if np.any(self._antecedent_kinds != CNF_ANTECEDENT_KIND):
+            raise NotImplementedError
+        return int(
+            np.sum(np.prod(np.sum(self._antecedent_masks, axis=2), axis=1)))
@@ -2,6 +2,9 @@ from .constants import RANGE_MAX, RANGE_MIN
 
 
 class Line:
+    __slots__ = ("_first_point", "_second_point", "_is_vertical", "_m", "_c",
+                 "_is_always_min", "_is_always_max")
+
     def __init__(self, first_point, second_point):
         self._first_point = first_point
         self._second_point = second_point
@@ -35,6 +38,14 @@ class Line:
     def is_always_max(self):
         return self._is_always_max
 
+    @property
+    def m(self):
+        return self._m
+
+    @property
+    def c(self):
+        return self._c
+
     @property
     def subdomain_min(self):
         return self._first_point.x
@@ -1,9 +1,19 @@
+from .constants import RANGE_MAX, RANGE_MIN
+from .domain import Domain
+from .membership_func import TriangularMembershipFunc
+from .membership_lookup import MembershipLookupTable
+from .util import lazy_numpy as np
+
+
 class LinguisticVar:
     """Linguistic var has underlying fuzzy sets / membership funcs associated
     with it."""
+    __slots__ = ("_membership_funcs", "_name", "_lookup_table")
+
     def __init__(self, membership_funcs, name):
         self._membership_funcs = tuple(membership_funcs)
         self._name = name
+        self._lookup_table = None
 
     @property
     def membership_funcs(self):
@@ -17,9 +27,38 @@ class LinguisticVar:
     def name(self):
         return self._name
 
-    def eval_membership_func(self, membership_func_idx, input_scalar):
-        return \
-            self._membership_funcs[membership_func_idx].fuzzify(input_scalar)
+    @property
+    def lookup_table(self):
+        return self._lookup_table
+
+    @property
+    def input_domain(self):
+        """Domain of inputs that all membership funcs can fuzzify, i.e. the
+        intersection of their domains."""
+        return Domain(max([mf.domain.min for mf in self._membership_funcs]),
+                      min([mf.domain.max for mf in self._membership_funcs]))
+
+    def enable_lookup_table(self, resolution, interpolate=True):
+        """Switches membership func evaluation (scalar and array) over to a
+        MembershipLookupTable with given resolution. Returns its max
+        approximation error vs exact evaluation, see
+        MembershipLookupTable.calc_max_approx_error()."""
+        self._lookup_table = MembershipLookupTable(self._membership_funcs,
+                                                   resolution, interpolate)
+        return self._lookup_table.calc_max_approx_error()
+
+    def disable_lookup_table(self):
+        self._lookup_table = None
+
+    def eval_membership_func(self,
+                             membership_func_idx,
+                             input_scalar,
+                             validate=True):
+        if self._lookup_table is not None:
+            return self._lookup_table.eval(membership_func_idx, input_scalar,
+                                           validate)
+        return self._membership_funcs[membership_func_idx].fuzzify(
+            input_scalar, validate)
 
     def eval_membership_funcs(self, membership_func_idxs, input_scalar):
         result = []
@@ -28,13 +67,161 @@ class LinguisticVar:
         return tuple(result)
 
     def eval_all_membership_funcs(self, input_scalar):
+        if self._lookup_table is not None:
+            return tuple([
+                self._lookup_table.eval(idx, input_scalar)
+                for idx in range(self.num_membership_funcs)
+            ])
         result = []
         for membership_func in self._membership_funcs:
             result.append(membership_func.fuzzify(input_scalar))
         return tuple(result)
 
+    def eval_all_membership_funcs_array(self, input_arr, validate=True):
+        """Returns (len(input_arr), num_membership_funcs) matrix of membership
+        vals."""
+        if self._lookup_table is not None:
+            return self._lookup_table.eval_all_array(input_arr, validate)
+        input_arr = np.asarray(input_arr, dtype=float)
+        result = np.empty((len(input_arr), self.num_membership_funcs))
+        for (membership_func_idx, membership_func) in \
+                enumerate(self._membership_funcs):
+            result[:, membership_func_idx] = \
+                membership_func.fuzzify_array(input_arr, validate)
+        return result
+
     def __str__(self):
         return ", ".join([str(mf) for mf in self._membership_funcs])
 
     def __repr__(self):
         return str(self)
+
+
+class StrongFuzzyPartition(LinguisticVar):
+    """Ling var of num_membership_funcs triangular membership funcs with
+    evenly spaced apexes from domain min to domain max (shoulders at either
+    end), each base reaching the neighbouring apexes. Memberships sum to 1
+    and at most two (of adjacent membership funcs) are non-zero for any
+    input; these are found in O(1) rather than by evaluating every membership
+    func."""
+    __slots__ = ("_domain", "_apex_xs", "_apex_x_arr", "_inv_spacing")
+
+    def __init__(self, domain, num_membership_funcs, name,
+                 membership_func_names=None):
+        assert num_membership_funcs >= 2
+        if membership_func_names is None:
+            membership_func_names = [
+                str(idx) for idx in range(num_membership_funcs)
+            ]
+        assert len(membership_func_names) == num_membership_funcs
+        # as np.linspace(), without needing NumPy for scalar inference
+        apex_spacing = (domain.max - domain.min) / (num_membership_funcs - 1)
+        apex_xs = [
+            idx * apex_spacing + domain.min
+            for idx in range(num_membership_funcs - 1)
+        ] + [float(domain.max)]
+        membership_funcs = [
+            TriangularMembershipFunc(domain, apex_xs[max(idx - 1, 0)],
+                                     apex_xs[idx],
+                                     apex_xs[min(idx + 1,
+                                                 num_membership_funcs - 1)],
+                                     mf_name)
+            for (idx, mf_name) in enumerate(membership_func_names)
+        ]
+        super().__init__(membership_funcs, name)
+        self._domain = domain
+        self._apex_xs = apex_xs
+        # built on first eval_non_zero_array()
+        self._apex_x_arr = None
+        self._inv_spacing = (num_membership_funcs - 1) / (domain.max -
+                                                         domain.min)
+
+    @property
+    def domain(self):
+        return self._domain
+
+    @property
+    def apex_xs(self):
+        return tuple(self._apex_xs)
+
+    def eval_non_zero(self, input_scalar, validate=True):
+        """Returns (lower_idx, lower_val, upper_val): the membership vals of
+        membership funcs lower_idx and lower_idx + 1, all others are
+        RANGE_MIN."""
+        if validate:
+            assert self._domain.min <= input_scalar <= self._domain.max
+        lower_idx = min(max(int((input_scalar - self._domain.min) *
+                                self._inv_spacing), 0),
+                        self.num_membership_funcs - 2)
+        # correct for rounding so input is in [apex lower_idx,
+        # apex lower_idx + 1], which keeps vals zero outside non min
+        # matching domains
+        if input_scalar < self._apex_xs[lower_idx] and lower_idx > 0:
+            lower_idx -= 1
+        elif input_scalar > self._apex_xs[lower_idx + 1] and \
+                lower_idx < self.num_membership_funcs - 2:
+            lower_idx += 1
+        upper_val = min(
+            max((input_scalar - self._apex_xs[lower_idx]) *
+                self._inv_spacing, RANGE_MIN), RANGE_MAX)
+        return (lower_idx, RANGE_MAX - upper_val, upper_val)
+
+    def eval_non_zero_array(self, input_arr, validate=True):
+        """Vectorised eval_non_zero(): returns (lower_idxs, lower_vals,
+        upper_vals) arrays."""
+        if self._apex_x_arr is None:
+            self._apex_x_arr = np.array(self._apex_xs)
+        input_arr = np.asarray(input_arr, dtype=float)
+        if validate:
+            assert np.all((self._domain.min <= input_arr)
+                          & (input_arr <= self._domain.max))
+        max_lower_idx = self.num_membership_funcs - 2
+        lower_idxs = np.clip(
+            ((input_arr - self._domain.min) * self._inv_spacing).astype(
+                np.intp), 0, max_lower_idx)
+        lower_idxs -= ((input_arr < self._apex_x_arr[lower_idxs])
+                       & (lower_idxs > 0))
+        lower_idxs += ((input_arr > self._apex_x_arr[lower_idxs + 1])
+                       & (lower_idxs < max_lower_idx))
+        upper_vals = np.clip(
+            (input_arr - self._apex_x_arr[lower_idxs]) * self._inv_spacing,
+            RANGE_MIN, RANGE_MAX)
+        return (lower_idxs, RANGE_MAX - upper_vals, upper_vals)
+
+    def eval_membership_func(self,
+                             membership_func_idx,
+                             input_scalar,
+                             validate=True):
+        if self._lookup_table is not None:
+            return super().eval_membership_func(membership_func_idx,
+                                                input_scalar, validate)
+        (lower_idx, lower_val,
+         upper_val) = self.eval_non_zero(input_scalar, validate)
+        if membership_func_idx == lower_idx:
+            return lower_val
+        elif membership_func_idx == lower_idx + 1:
+            return upper_val
+        else:
+            return RANGE_MIN
+
+    def eval_all_membership_funcs(self, input_scalar):
+        if self._lookup_table is not None:
+            return super().eval_all_membership_funcs(input_scalar)
+        (lower_idx, lower_val,
+         upper_val) = self.eval_non_zero(input_scalar)
+        result = [RANGE_MIN] * self.num_membership_funcs
+        result[lower_idx] = lower_val
+        result[lower_idx + 1] = upper_val
+        return tuple(result)
+
+    def eval_all_membership_funcs_array(self, input_arr, validate=True):
+        if self._lookup_table is not None:
+            return super().eval_all_membership_funcs_array(
+                input_arr, validate)
+        (lower_idxs, lower_vals,
+         upper_vals) = self.eval_non_zero_array(input_arr, validate)
+        row_idxs = np.arange(len(lower_idxs))
+        result = np.zeros((len(lower_idxs), self.num_membership_funcs))
+        result[row_idxs, lower_idxs] = lower_vals
+        result[row_idxs, lower_idxs + 1] = upper_vals
+        return result
@@ -1,6 +1,9 @@
-import numpy as np
+import functools
+import math
+from collections import namedtuple
 
 from .constants import FLOAT_TOL, MATCHING_MAX, MATCHING_MIN
+from .util import lazy_numpy as np
 from .util import trunc_val
 
 
@@ -17,7 +20,40 @@ def logical_and_min(membership_vals):
 
 
 def logical_and_prod(membership_vals):
-    return _operate_on_membership_vals(membership_vals, operator=np.prod)
+    return _operate_on_membership_vals(membership_vals, operator=_prod)
+
+
+def logical_and_lukasiewicz(membership_vals):
+    return _operate_on_membership_vals(membership_vals,
+                                       operator=_lukasiewicz_t_norm)
+
+
+def logical_or_lukasiewicz(membership_vals):
+    """Bounded sum."""
+    return _operate_on_membership_vals(membership_vals,
+                                       operator=_lukasiewicz_t_conorm)
+
+
+def logical_and_hamacher(membership_vals):
+    """Hamacher product."""
+    return _operate_on_membership_vals(membership_vals,
+                                       operator=_hamacher_t_norm)
+
+
+def logical_or_hamacher(membership_vals):
+    """Hamacher sum."""
+    return _operate_on_membership_vals(membership_vals,
+                                       operator=_hamacher_t_conorm)
+
+
+def logical_and_drastic(membership_vals):
+    return _operate_on_membership_vals(membership_vals,
+                                       operator=_drastic_t_norm)
+
+
+def logical_or_drastic(membership_vals):
+    return _operate_on_membership_vals(membership_vals,
+                                       operator=_drastic_t_conorm)
 
 
 def _operate_on_membership_vals(membership_vals, operator):
@@ -28,9 +64,365 @@ def _operate_on_membership_vals(membership_vals, operator):
     return result
 
 
+def _prod(membership_vals):
+    # not np.prod, which is slow on short lists
+    return math.prod(membership_vals, start=1.0)
+
+
 def _probor(membership_vals):
     only_one_val = len(membership_vals) == 1
     if only_one_val:
         return membership_vals[0]
     else:
-        return sum(membership_vals) - np.prod(membership_vals)
+        result = 1.0
+        for membership_val in membership_vals:
+            result *= (1.0 - membership_val)
+        return 1.0 - result
+
+
+def _lukasiewicz_t_norm(membership_vals):
+    return max(MATCHING_MIN,
+               sum(membership_vals) - (len(membership_vals) - 1))
+
+
+def _lukasiewicz_t_conorm(membership_vals):
+    return min(MATCHING_MAX, sum(membership_vals))
+
+
+def _hamacher_t_norm(membership_vals):
+    return functools.reduce(_hamacher_prod, membership_vals)
+
+
+def _hamacher_prod(a, b):
+    denominator = a + b - a * b
+    return (a * b) / denominator if denominator != 0.0 else MATCHING_MIN
+
+
+def _hamacher_t_conorm(membership_vals):
+    return functools.reduce(_hamacher_sum, membership_vals)
+
+
+def _hamacher_sum(a, b):
+    # dual of the product, (a + b - 2ab) / (1 - ab) cancels badly near 1
+    return MATCHING_MAX - _hamacher_prod(MATCHING_MAX - a, MATCHING_MAX - b)
+
+
+def _drastic_t_norm(membership_vals):
+    # val when all others are max, else min
+    num_non_max = sum([
+        membership_val < MATCHING_MAX for membership_val in membership_vals
+    ])
+    return min(membership_vals) if num_non_max <= 1 else MATCHING_MIN
+
+
+def _drastic_t_conorm(membership_vals):
+    num_non_min = sum([
+        membership_val > MATCHING_MIN for membership_val in membership_vals
+    ])
+    return max(membership_vals) if num_non_min <= 1 else MATCHING_MAX
+
+
+# ops built by the factories below are partials of module level funcs, not
+# closures, so inference engines holding them can be pickled (e.g. for
+# process pools)
+
+
+def _make_unchecked_logical_op(operator):
+    """Op that truncates rounding errors into range rather than asserting."""
+    return functools.partial(_unchecked_logical_op, operator)
+
+
+def _unchecked_logical_op(operator, membership_vals):
+    return trunc_val(operator(membership_vals), MATCHING_MIN, MATCHING_MAX)
+
+
+def logical_or_max_array(membership_vals,
+                         axis=-1,
+                         where=True,
+                         validate=True):
+    return _operate_on_membership_val_arrays(membership_vals,
+                                             axis,
+                                             where,
+                                             validate,
+                                             operator=_max_array)
+
+
+def logical_or_probor_array(membership_vals,
+                            axis=-1,
+                            where=True,
+                            validate=True):
+    return _operate_on_membership_val_arrays(membership_vals,
+                                             axis,
+                                             where,
+                                             validate,
+                                             operator=_probor_array)
+
+
+def logical_and_min_array(membership_vals,
+                          axis=-1,
+                          where=True,
+                          validate=True):
+    return _operate_on_membership_val_arrays(membership_vals,
+                                             axis,
+                                             where,
+                                             validate,
+                                             operator=_min_array)
+
+
+def logical_and_prod_array(membership_vals,
+                           axis=-1,
+                           where=True,
+                           validate=True):
+    return _operate_on_membership_val_arrays(membership_vals,
+                                             axis,
+                                             where,
+                                             validate,
+                                             operator=_prod_array)
+
+
+def _operate_on_membership_val_arrays(membership_vals, axis, where, validate,
+                                      operator):
+    """Reduces membership_vals along axis, only including vals where `where`
+    is True (reductions that include no vals give the op's identity)."""
+    membership_vals = np.asarray(membership_vals, dtype=float)
+    if validate:
+        assert membership_vals.shape[axis] > 0
+    result = operator(membership_vals, axis, where)
+    if validate:
+        assert np.all(((MATCHING_MIN - FLOAT_TOL) <= result)
+                      & (result <= (MATCHING_MAX + FLOAT_TOL)))
+    return np.clip(result, MATCHING_MIN, MATCHING_MAX)
+
+
+def _max_array(membership_vals, axis, where):
+    return np.max(membership_vals,
+                  axis=axis,
+                  where=where,
+                  initial=MATCHING_MIN)
+
+
+def _min_array(membership_vals, axis, where):
+    return np.min(membership_vals,
+                  axis=axis,
+                  where=where,
+                  initial=MATCHING_MAX)
+
+
+def _prod_array(membership_vals, axis, where):
+    return np.prod(membership_vals, axis=axis, where=where)
+
+
+def _probor_array(membership_vals, axis, where):
+    num_vals = np.sum(np.broadcast_to(where, membership_vals.shape),
+                      axis=axis)
+    # sum of a single val is that val, exactly as in _probor()
+    sum_ = np.sum(membership_vals, axis=axis, where=where)
+    complement_prod = np.prod(1.0 - membership_vals, axis=axis, where=where)
+    only_one_val = (num_vals <= 1)
+    return np.where(only_one_val, sum_, 1.0 - complement_prod)
+
+
+def _lukasiewicz_t_norm_array(membership_vals, axis, where):
+    num_vals = np.sum(np.broadcast_to(where, membership_vals.shape),
+                      axis=axis)
+    sum_ = np.sum(membership_vals, axis=axis, where=where)
+    # no vals gives the identity
+    return np.where(num_vals > 0,
+                    np.maximum(MATCHING_MIN, sum_ - (num_vals - 1)),
+                    MATCHING_MAX)
+
+
+def _lukasiewicz_t_conorm_array(membership_vals, axis, where):
+    return np.minimum(MATCHING_MAX,
+                      np.sum(membership_vals, axis=axis, where=where))
+
+
+def _hamacher_prod_array(a, b):
+    denominator = a + b - a * b
+    return np.divide(a * b,
+                     denominator,
+                     out=np.full(np.shape(denominator), MATCHING_MIN),
+                     where=(denominator != 0.0))
+
+
+def _hamacher_sum_array(a, b):
+    return MATCHING_MAX - _hamacher_prod_array(MATCHING_MAX - a,
+                                               MATCHING_MAX - b)
+
+
+def _drastic_t_norm_array(membership_vals, axis, where):
+    num_non_max = np.sum((membership_vals < MATCHING_MAX) & where,
+                         axis=axis)
+    return np.where(num_non_max <= 1,
+                    _min_array(membership_vals, axis, where), MATCHING_MIN)
+
+
+def _drastic_t_conorm_array(membership_vals, axis, where):
+    num_non_min = np.sum((membership_vals > MATCHING_MIN) & where,
+                         axis=axis)
+    return np.where(num_non_min <= 1,
+                    _max_array(membership_vals, axis, where), MATCHING_MAX)
+
+
+def make_fold_array_operator(binary_op, identity):
+    """Returns (membership_vals, axis, where) reduction that folds the
+    elementwise binary_op over the vals along axis, starting from the first
+    val included by where (so results match functools.reduce() over the same
+    vals); reductions that include no vals give identity. Pass it to
+    make_array_logical_op() to get an array logical op."""
+    return functools.partial(_fold_array_operator, binary_op, identity)
+
+
+def _fold_array_operator(binary_op, identity, membership_vals, axis, where):
+    where = np.moveaxis(np.broadcast_to(where, membership_vals.shape), axis,
+                        -1)
+    membership_vals = np.moveaxis(membership_vals, axis, -1)
+    result = np.full(membership_vals.shape[:-1], identity)
+    is_started = np.zeros(membership_vals.shape[:-1], dtype=bool)
+    for val_idx in range(membership_vals.shape[-1]):
+        vals = membership_vals[..., val_idx]
+        result = np.where(where[..., val_idx],
+                          np.where(is_started, binary_op(result, vals), vals),
+                          result)
+        is_started |= where[..., val_idx]
+    return result
+
+
+def make_array_logical_op(operator):
+    """Returns array logical op (with the signature of
+    logical_or_max_array()) around given (membership_vals, axis, where)
+    reduction."""
+    return functools.partial(_array_logical_op, operator)
+
+
+def _array_logical_op(operator,
+                      membership_vals,
+                      axis=-1,
+                      where=True,
+                      validate=True):
+    return _operate_on_membership_val_arrays(membership_vals, axis, where,
+                                             validate, operator)
+
+
+logical_and_lukasiewicz_array = make_array_logical_op(
+    _lukasiewicz_t_norm_array)
+logical_or_lukasiewicz_array = make_array_logical_op(
+    _lukasiewicz_t_conorm_array)
+logical_and_hamacher_array = make_array_logical_op(
+    make_fold_array_operator(_hamacher_prod_array, MATCHING_MAX))
+logical_or_hamacher_array = make_array_logical_op(
+    make_fold_array_operator(_hamacher_sum_array, MATCHING_MIN))
+logical_and_drastic_array = make_array_logical_op(_drastic_t_norm_array)
+logical_or_drastic_array = make_array_logical_op(_drastic_t_conorm_array)
+
+T_NORM = "t_norm"
+T_CONORM = "t_conorm"
+
+# scalar logical op -> its kernels
+_LogicalOpKernels = namedtuple("_LogicalOpKernels",
+                               ["unchecked_op", "array_op", "kind"])
+_logical_op_registry = {}
+
+
+def register_logical_op(logical_op, array_op, unchecked_op=None, kind=None):
+    """Registers kernels for scalar logical_op (which takes a list of
+    membership vals): array_op is used for batched inference (see
+    make_array_logical_op()), unchecked_op (default logical_op itself) in
+    fast mode. kind is T_NORM or T_CONORM if logical_op is one; all t-norms
+    give zero if any val is zero and all t-conorms give zero if all vals are
+    zero, which is what lets the inference engine skip rules that cannot
+    fire."""
+    assert kind in (None, T_NORM, T_CONORM)
+    _logical_op_registry[logical_op] = _LogicalOpKernels(
+        unchecked_op if unchecked_op is not None else logical_op, array_op,
+        kind)
+
+
+def is_t_norm(logical_op):
+    kernels = _logical_op_registry.get(logical_op)
+    return kernels is not None and kernels.kind == T_NORM
+
+
+def is_t_conorm(logical_op):
+    kernels = _logical_op_registry.get(logical_op)
+    return kernels is not None and kernels.kind == T_CONORM
+
+
+def get_unchecked_logical_op(logical_op):
+    """Returns version of given logical op without per-call asserts, or the op
+    itself if it is unknown."""
+    kernels = _logical_op_registry.get(logical_op)
+    return kernels.unchecked_op if kernels is not None else logical_op
+
+
+def get_array_logical_op(logical_op, identity=None):
+    """Returns array version of given scalar logical op, i.e. one that reduces
+    an array of membership vals along a given axis. Unknown ops fall back to
+    applying the scalar op along the axis; reductions that include no vals
+    then give identity (MATCHING_MAX for an op used as AND, MATCHING_MIN for
+    one used as OR), or raise ValueError if it is None."""
+    kernels = _logical_op_registry.get(logical_op)
+    return kernels.array_op if kernels is not None \
+        else _make_fallback_array_logical_op(logical_op, identity)
+
+
+# unchecked max/min/prod of vals in range are always in range, so need no
+# truncation
+register_logical_op(logical_or_max, logical_or_max_array, max, T_CONORM)
+register_logical_op(logical_or_probor, logical_or_probor_array,
+                    _make_unchecked_logical_op(_probor), T_CONORM)
+register_logical_op(logical_and_min, logical_and_min_array, min, T_NORM)
+register_logical_op(logical_and_prod, logical_and_prod_array, _prod, T_NORM)
+register_logical_op(logical_and_lukasiewicz, logical_and_lukasiewicz_array,
+                    _make_unchecked_logical_op(_lukasiewicz_t_norm), T_NORM)
+register_logical_op(logical_or_lukasiewicz, logical_or_lukasiewicz_array,
+                    _make_unchecked_logical_op(_lukasiewicz_t_conorm),
+                    T_CONORM)
+register_logical_op(logical_and_hamacher, logical_and_hamacher_array,
+                    _make_unchecked_logical_op(_hamacher_t_norm), T_NORM)
+register_logical_op(logical_or_hamacher, logical_or_hamacher_array,
+                    _make_unchecked_logical_op(_hamacher_t_conorm), T_CONORM)
+register_logical_op(logical_and_drastic, logical_and_drastic_array,
+                    _drastic_t_norm, T_NORM)
+register_logical_op(logical_or_drastic, logical_or_drastic_array,
+                    _drastic_t_conorm, T_CONORM)
+
+# built in t-norms / t-conorms, see is_t_norm() / is_t_conorm() for any
+# registered ones
+T_NORMS = (logical_and_min, logical_and_prod, logical_and_lukasiewicz,
+           logical_and_hamacher, logical_and_drastic)
+T_CONORMS = (logical_or_max, logical_or_probor, logical_or_lukasiewicz,
+             logical_or_hamacher, logical_or_drastic)
+
+
+def _make_fallback_array_logical_op(logical_op, identity):
+    return functools.partial(_fallback_array_logical_op, logical_op,
+                             identity)
+
+
+def _fallback_array_logical_op(logical_op,
+                               identity,
+                               membership_vals,
+                               axis=-1,
+                               where=True,
+                               validate=True):
+    membership_vals = np.asarray(membership_vals, dtype=float)
+    if validate:
+        assert membership_vals.shape[axis] > 0
+    where = np.broadcast_to(where, membership_vals.shape)
+    membership_vals = np.moveaxis(membership_vals, axis, -1)
+    where = np.moveaxis(where, axis, -1)
+    result = np.empty(membership_vals.shape[:-1])
+    for idx in np.ndindex(result.shape):
+        vals = membership_vals[idx][where[idx]].tolist()
+        if len(vals) > 0:
+            result[idx] = logical_op(vals)
+        elif identity is not None:
+            result[idx] = identity
+        else:
+            raise ValueError(f"No identity given for logical op {logical_op}"
+                             ", needed to reduce over no vals")
+    if validate:
+        assert np.all(((MATCHING_MIN - FLOAT_TOL) <= result)
+                      & (result <= (MATCHING_MAX + FLOAT_TOL)))
+    return np.clip(result, MATCHING_MIN, MATCHING_MAX)
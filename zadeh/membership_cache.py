@@ -0,0 +1,36 @@
+from collections import namedtuple
+
+MembershipCacheStats = namedtuple("MembershipCacheStats",
+                                  ["num_hits", "num_misses"])
+
+
+class MembershipCache:
+    """Per-input table of membership vals, one row per input feature, shared
+    by all rules evaluated on that input. Each membership val is computed at
+    most once, on first lookup."""
+    def __init__(self, ling_vars, input_vec, validate=True):
+        self._ling_vars = ling_vars
+        self._input_vec = input_vec
+        self._validate = validate
+        self._membership_table = [[None] * ling_var.num_membership_funcs
+                                  for ling_var in ling_vars]
+        self._num_hits = 0
+        self._num_misses = 0
+
+    @property
+    def stats(self):
+        return MembershipCacheStats(self._num_hits, self._num_misses)
+
+    def lookup(self, feature_idx, membership_func_idx):
+        membership_vals = self._membership_table[feature_idx]
+        membership_val = membership_vals[membership_func_idx]
+        if membership_val is None:
+            membership_val = \
+                self._ling_vars[feature_idx].eval_membership_func(
+                    membership_func_idx, self._input_vec[feature_idx],
+                    self._validate)
+            membership_vals[membership_func_idx] = membership_val
+            self._num_misses += 1
+        else:
+            self._num_hits += 1
+        return membership_val
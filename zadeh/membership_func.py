@@ -1,9 +1,11 @@
 import abc
+import math
 from collections import namedtuple
 
 from .constants import FLOAT_TOL, RANGE_MAX, RANGE_MIN
 from .domain import Domain
 from .line import Line
+from .util import lazy_numpy as np
 from .util import trunc_val
 
 Point = namedtuple("Point", ["x", "y"])
@@ -23,10 +25,42 @@ class MembershipFuncABC(metaclass=abc.ABCMeta):
     def name(self):
         return self._name
 
+    @property
+    def non_min_matching_domain(self):
+        """Closed interval outside of which fuzzify() always gives RANGE_MIN;
+        conservatively the whole domain unless overridden."""
+        return self._domain
+
+    @property
+    def breakpoints(self):
+        """For piecewise linear membership funcs: sorted xs (including the
+        domain bounds) strictly between any two adjacent of which fuzzify()
+        is linear."""
+        raise NotImplementedError
+
+    def calc_linear_params(self, input_scalar):
+        """For piecewise linear membership funcs: (m, x0, c) such that
+        fuzzify(x) == trunc_val(m * (x - x0) + c, RANGE_MIN, RANGE_MAX) for
+        all x strictly between the breakpoints either side of input_scalar
+        (which must not be a breakpoint itself)."""
+        raise NotImplementedError
+
     @abc.abstractmethod
-    def fuzzify(self, input_scalar):
+    def fuzzify(self, input_scalar, validate=True):
+        """validate=False skips the domain/range asserts, for use once inputs
+        are known to be valid."""
         raise NotImplementedError
 
+    def fuzzify_array(self, input_arr, validate=True):
+        """Fuzzifies each element of input_arr; subclasses should override
+        this with a vectorised implementation."""
+        input_arr = np.asarray(input_arr, dtype=float)
+        return np.fromiter(
+            (self.fuzzify(input_scalar, validate)
+             for input_scalar in input_arr),
+            dtype=float,
+            count=len(input_arr))
+
     @abc.abstractmethod
     def __str__(self):
         raise NotImplementedError
@@ -37,19 +71,81 @@ class MembershipFuncABC(metaclass=abc.ABCMeta):
 
 class PiecewiseLinearMembershipFunc(MembershipFuncABC):
     """Fuzzy set / membership function composed of a series of linear sections,
-    e.g. triangle or trapezoid."""
+    e.g. triangle or trapezoid. Points are checked at construction, but
+    Lines are only built on first use (and the arrays used by
+    fuzzify_array() on its first use), so constructing many membership funcs
+    stays cheap."""
     def __init__(self, domain, points, name):
         super().__init__(domain, name)
+        self._check_points(points)
         self._points = points
-        self._lines = self._create_lines(self._points)
+        self._non_min_line_params = None
+        self._non_min_line_subdomain_maxs = None
+
+    def _check_points(self, points):
+        """Same checks as building the Lines, without building them: first
+        and last points at RANGE_MIN, some non vertical line, and the non
+        min lines having contiguous subdomains."""
+        assert points[0].y == RANGE_MIN
+        assert points[-1].y == RANGE_MIN
+        all_points = ([Point(self._domain.min, RANGE_MIN)] + list(points) +
+                      [Point(self._domain.max, RANGE_MIN)])
+        non_vertical_subdomains = [
+            (lhs_point.x, rhs_point.x, lhs_point.y == rhs_point.y == RANGE_MIN)
+            for (lhs_point, rhs_point) in zip(all_points[:-1], all_points[1:])
+            if lhs_point.x != rhs_point.x
+        ]
+        assert len(non_vertical_subdomains) > 0
+        non_min_subdomains = sorted(
+            (subdomain_min, subdomain_max)
+            for (subdomain_min, subdomain_max, is_always_min)
+            in non_vertical_subdomains if not is_always_min)
+        assert len(non_min_subdomains) > 0
+        for (this_subdomain, next_subdomain) in zip(non_min_subdomains[:-1],
+                                                    non_min_subdomains[1:]):
+            assert this_subdomain[1] == next_subdomain[0]
+
+    def _build_lines(self):
+        lines = self._create_lines(self._points)
         self._non_min_matching_domain = \
-            self._cache_non_min_matching_domain(self._lines)
-        self._non_min_lines = self._cache_non_min_lines(self._lines)
+            self._cache_non_min_matching_domain(lines)
+        self._non_min_lines = self._cache_non_min_lines(lines)
+        # set last, marks lines as built
+        self._non_min_line_params = \
+            self._cache_non_min_line_params(self._non_min_lines)
+
+    def _build_line_arrays(self):
+        if self._non_min_line_params is None:
+            self._build_lines()
+        (self._non_min_line_subdomain_maxs, self._non_min_line_ms,
+         self._non_min_line_cs) = \
+            self._cache_non_min_line_arrays(self._non_min_lines)
 
     @property
     def points(self):
         return self._points
 
+    @property
+    def non_min_matching_domain(self):
+        if self._non_min_line_params is None:
+            self._build_lines()
+        return self._non_min_matching_domain
+
+    @property
+    def breakpoints(self):
+        return tuple(
+            sorted({self._domain.min, self._domain.max}
+                   | {point.x
+                      for point in self._points}))
+
+    def calc_linear_params(self, input_scalar):
+        if self._non_min_line_params is None:
+            self._build_lines()
+        for (subdomain_min, subdomain_max, m, c) in self._non_min_line_params:
+            if subdomain_min < input_scalar < subdomain_max:
+                return (m, 0.0, c)
+        return (0.0, 0.0, RANGE_MIN)
+
     def _create_lines(self, points):
         lines = self._create_lines_from_points(points)
         lines = self._keep_non_vertical_lines(lines)
@@ -109,29 +205,352 @@ class PiecewiseLinearMembershipFunc(MembershipFuncABC):
     def _cache_non_min_lines(self, lines):
         return [line for line in lines if not line.is_always_min]
 
-    def fuzzify(self, input_scalar):
-        assert self._domain.min <= input_scalar <= self._domain.max
+    def _cache_non_min_line_params(self, non_min_lines):
+        """(subdomain min, subdomain max, m, c) per line, used by fuzzify() to
+        avoid attr lookups + asserts in Line."""
+        return tuple([(line.subdomain_min, line.subdomain_max, line.m, line.c)
+                      for line in non_min_lines])
+
+    def _cache_non_min_line_arrays(self, non_min_lines):
+        """Breakpoint/slope/intercept arrays used by fuzzify_array()."""
+        subdomain_maxs = np.array(
+            [line.subdomain_max for line in non_min_lines], dtype=float)
+        ms = np.array([line.m for line in non_min_lines], dtype=float)
+        cs = np.array([line.c for line in non_min_lines], dtype=float)
+        return (subdomain_maxs, ms, cs)
+
+    def fuzzify(self, input_scalar, validate=True):
+        if validate:
+            assert self._domain.min <= input_scalar <= self._domain.max
+        if self._non_min_line_params is None:
+            self._build_lines()
         result = None
 
         need_to_eval_lines = (self._non_min_matching_domain.min <= input_scalar
                               <= self._non_min_matching_domain.max)
         if need_to_eval_lines:
-            for line in self._non_min_lines:
-                if line.subdomain_min <= input_scalar <= line.subdomain_max:
-                    result = line.eval(input_scalar)
+            for (subdomain_min, subdomain_max, m, c) in \
+                    self._non_min_line_params:
+                if subdomain_min <= input_scalar <= subdomain_max:
+                    result = m * input_scalar + c
                     break
         else:
             result = RANGE_MIN
 
-        assert result is not None
-        assert (RANGE_MIN - FLOAT_TOL) <= result <= (RANGE_MAX + FLOAT_TOL)
+        if validate:
+            assert result is not None
+            assert (RANGE_MIN - FLOAT_TOL) <= result <= (RANGE_MAX + FLOAT_TOL)
         result = trunc_val(result, RANGE_MIN, RANGE_MAX)
         return result
 
+    def fuzzify_array(self, input_arr, validate=True):
+        input_arr = np.asarray(input_arr, dtype=float)
+        if validate:
+            assert np.all((self._domain.min <= input_arr)
+                          & (input_arr <= self._domain.max))
+        if self._non_min_line_subdomain_maxs is None:
+            self._build_line_arrays()
+
+        # non min lines are contiguous and sorted, so first line whose
+        # subdomain max is >= input is the first line (in order) containing
+        # that input, as in fuzzify()
+        line_idxs = np.searchsorted(self._non_min_line_subdomain_maxs,
+                                    input_arr,
+                                    side="left")
+        np.minimum(line_idxs, len(self._non_min_lines) - 1, out=line_idxs)
+        result = (self._non_min_line_ms[line_idxs] * input_arr +
+                  self._non_min_line_cs[line_idxs])
+        need_to_eval_lines = (
+            (self._non_min_matching_domain.min <= input_arr)
+            & (input_arr <= self._non_min_matching_domain.max))
+        result = np.where(need_to_eval_lines, result, RANGE_MIN)
+
+        if validate:
+            assert np.all(((RANGE_MIN - FLOAT_TOL) <= result)
+                          & (result <= (RANGE_MAX + FLOAT_TOL)))
+        return np.clip(result, RANGE_MIN, RANGE_MAX, out=result)
+
     def __str__(self):
         return str(self._points)
 
 
+class TriangularMembershipFunc(MembershipFuncABC):
+    """Triangle with apex (val RANGE_MAX) at apex_x, evaluated in closed form.
+    Val is RANGE_MIN outside [base_lhs_x, base_rhs_x], also with a degenerate
+    side (base_lhs_x == apex_x or apex_x == base_rhs_x), as for
+    make_triangular_membership_func(); for a shoulder, put the apex on a
+    domain bound."""
+    def __init__(self, domain, base_lhs_x, apex_x, base_rhs_x, name):
+        super().__init__(domain, name)
+        assert domain.min <= base_lhs_x <= apex_x <= base_rhs_x <= domain.max
+        self._base_lhs_x = float(base_lhs_x)
+        self._apex_x = float(apex_x)
+        self._base_rhs_x = float(base_rhs_x)
+        self._lhs_slope = _calc_slope(self._base_lhs_x, self._apex_x)
+        self._rhs_slope = _calc_slope(self._apex_x, self._base_rhs_x)
+
+    @property
+    def base_lhs_x(self):
+        return self._base_lhs_x
+
+    @property
+    def apex_x(self):
+        return self._apex_x
+
+    @property
+    def base_rhs_x(self):
+        return self._base_rhs_x
+
+    @property
+    def non_min_matching_domain(self):
+        return Domain(self._base_lhs_x, self._base_rhs_x)
+
+    @property
+    def breakpoints(self):
+        return tuple(
+            sorted({
+                self._domain.min, self._base_lhs_x, self._apex_x,
+                self._base_rhs_x, self._domain.max
+            }))
+
+    def calc_linear_params(self, input_scalar):
+        # (base_rhs_x - x) * slope == -slope * (x - base_rhs_x) exactly
+        if input_scalar < self._apex_x:
+            return (self._lhs_slope, self._base_lhs_x, 0.0)
+        else:
+            return (-self._rhs_slope, self._base_rhs_x, 0.0)
+
+    def fuzzify(self, input_scalar, validate=True):
+        if validate:
+            assert self._domain.min <= input_scalar <= self._domain.max
+        if input_scalar < self._apex_x:
+            result = (input_scalar - self._base_lhs_x) * self._lhs_slope
+        elif input_scalar > self._apex_x:
+            result = (self._base_rhs_x - input_scalar) * self._rhs_slope
+        else:
+            result = RANGE_MAX
+        return trunc_val(result, RANGE_MIN, RANGE_MAX)
+
+    def fuzzify_array(self, input_arr, validate=True):
+        input_arr = np.asarray(input_arr, dtype=float)
+        if validate:
+            assert np.all((self._domain.min <= input_arr)
+                          & (input_arr <= self._domain.max))
+        result = np.where(
+            input_arr < self._apex_x,
+            (input_arr - self._base_lhs_x) * self._lhs_slope,
+            np.where(input_arr > self._apex_x,
+                     (self._base_rhs_x - input_arr) * self._rhs_slope,
+                     RANGE_MAX))
+        return np.clip(result, RANGE_MIN, RANGE_MAX, out=result)
+
+    def __str__(self):
+        return (f"Triangular({self._base_lhs_x}, {self._apex_x}, "
+                f"{self._base_rhs_x})")
+
+
+class TrapezoidalMembershipFunc(MembershipFuncABC):
+    """Trapezoid with top (val RANGE_MAX) between top_base_lhs_x and
+    top_base_rhs_x, evaluated in closed form."""
+    def __init__(self, domain, bottom_base_lhs_x, top_base_lhs_x,
+                 top_base_rhs_x, bottom_base_rhs_x, name):
+        super().__init__(domain, name)
+        assert domain.min <= bottom_base_lhs_x <= top_base_lhs_x <= \
+            top_base_rhs_x <= bottom_base_rhs_x <= domain.max
+        self._bottom_base_lhs_x = float(bottom_base_lhs_x)
+        self._top_base_lhs_x = float(top_base_lhs_x)
+        self._top_base_rhs_x = float(top_base_rhs_x)
+        self._bottom_base_rhs_x = float(bottom_base_rhs_x)
+        self._lhs_slope = _calc_slope(self._bottom_base_lhs_x,
+                                      self._top_base_lhs_x)
+        self._rhs_slope = _calc_slope(self._top_base_rhs_x,
+                                      self._bottom_base_rhs_x)
+
+    @property
+    def bottom_base_lhs_x(self):
+        return self._bottom_base_lhs_x
+
+    @property
+    def top_base_lhs_x(self):
+        return self._top_base_lhs_x
+
+    @property
+    def top_base_rhs_x(self):
+        return self._top_base_rhs_x
+
+    @property
+    def bottom_base_rhs_x(self):
+        return self._bottom_base_rhs_x
+
+    @property
+    def non_min_matching_domain(self):
+        return Domain(self._bottom_base_lhs_x, self._bottom_base_rhs_x)
+
+    @property
+    def breakpoints(self):
+        return tuple(
+            sorted({
+                self._domain.min, self._bottom_base_lhs_x,
+                self._top_base_lhs_x, self._top_base_rhs_x,
+                self._bottom_base_rhs_x, self._domain.max
+            }))
+
+    def calc_linear_params(self, input_scalar):
+        if input_scalar < self._top_base_lhs_x:
+            return (self._lhs_slope, self._bottom_base_lhs_x, 0.0)
+        elif input_scalar > self._top_base_rhs_x:
+            return (-self._rhs_slope, self._bottom_base_rhs_x, 0.0)
+        else:
+            return (0.0, 0.0, RANGE_MAX)
+
+    def fuzzify(self, input_scalar, validate=True):
+        if validate:
+            assert self._domain.min <= input_scalar <= self._domain.max
+        if input_scalar < self._top_base_lhs_x:
+            result = (input_scalar - self._bottom_base_lhs_x) * \
+                self._lhs_slope
+        elif input_scalar > self._top_base_rhs_x:
+            result = (self._bottom_base_rhs_x - input_scalar) * \
+                self._rhs_slope
+        else:
+            result = RANGE_MAX
+        return trunc_val(result, RANGE_MIN, RANGE_MAX)
+
+    def fuzzify_array(self, input_arr, validate=True):
+        input_arr = np.asarray(input_arr, dtype=float)
+        if validate:
+            assert np.all((self._domain.min <= input_arr)
+                          & (input_arr <= self._domain.max))
+        result = np.where(
+            input_arr < self._top_base_lhs_x,
+            (input_arr - self._bottom_base_lhs_x) * self._lhs_slope,
+            np.where(input_arr > self._top_base_rhs_x,
+                     (self._bottom_base_rhs_x - input_arr) * self._rhs_slope,
+                     RANGE_MAX))
+        return np.clip(result, RANGE_MIN, RANGE_MAX, out=result)
+
+    def __str__(self):
+        return (f"Trapezoidal({self._bottom_base_lhs_x}, "
+                f"{self._top_base_lhs_x}, {self._top_base_rhs_x}, "
+                f"{self._bottom_base_rhs_x})")
+
+
+def _calc_slope(lhs_x, rhs_x):
+    """Slope magnitude of line rising from RANGE_MIN to RANGE_MAX between lhs_x
+    and rhs_x; zero width sides are never evaluated so get slope 0."""
+    return (RANGE_MAX - RANGE_MIN) / (rhs_x - lhs_x) if rhs_x > lhs_x else 0.0
+
+
+class GaussianMembershipFunc(MembershipFuncABC):
+    """exp(-(x - mean)^2 / (2 * sigma^2))."""
+    def __init__(self, domain, mean, sigma, name):
+        super().__init__(domain, name)
+        assert sigma > 0
+        self._mean = float(mean)
+        self._sigma = float(sigma)
+
+    @property
+    def mean(self):
+        return self._mean
+
+    @property
+    def sigma(self):
+        return self._sigma
+
+    def fuzzify(self, input_scalar, validate=True):
+        if validate:
+            assert self._domain.min <= input_scalar <= self._domain.max
+        z = (input_scalar - self._mean) / self._sigma
+        return math.exp(-0.5 * z * z)
+
+    def fuzzify_array(self, input_arr, validate=True):
+        input_arr = np.asarray(input_arr, dtype=float)
+        if validate:
+            assert np.all((self._domain.min <= input_arr)
+                          & (input_arr <= self._domain.max))
+        z = (input_arr - self._mean) / self._sigma
+        return np.exp(-0.5 * z * z)
+
+    def __str__(self):
+        return f"Gaussian({self._mean}, {self._sigma})"
+
+
+class GeneralizedBellMembershipFunc(MembershipFuncABC):
+    """1 / (1 + |(x - center) / width|^(2 * slope))."""
+    def __init__(self, domain, width, slope, center, name):
+        super().__init__(domain, name)
+        assert width != 0
+        assert slope > 0
+        self._width = float(width)
+        self._slope = float(slope)
+        self._center = float(center)
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def slope(self):
+        return self._slope
+
+    @property
+    def center(self):
+        return self._center
+
+    def fuzzify(self, input_scalar, validate=True):
+        if validate:
+            assert self._domain.min <= input_scalar <= self._domain.max
+        return 1.0 / (1.0 + abs(
+            (input_scalar - self._center) / self._width)**(2 * self._slope))
+
+    def fuzzify_array(self, input_arr, validate=True):
+        input_arr = np.asarray(input_arr, dtype=float)
+        if validate:
+            assert np.all((self._domain.min <= input_arr)
+                          & (input_arr <= self._domain.max))
+        return 1.0 / (1.0 + np.abs(
+            (input_arr - self._center) / self._width)**(2 * self._slope))
+
+    def __str__(self):
+        return (f"GeneralizedBell({self._width}, {self._slope}, "
+                f"{self._center})")
+
+
+class SigmoidMembershipFunc(MembershipFuncABC):
+    """1 / (1 + exp(-slope * (x - center))); rising for positive slope."""
+    def __init__(self, domain, slope, center, name):
+        super().__init__(domain, name)
+        self._slope = float(slope)
+        self._center = float(center)
+
+    @property
+    def slope(self):
+        return self._slope
+
+    @property
+    def center(self):
+        return self._center
+
+    def fuzzify(self, input_scalar, validate=True):
+        if validate:
+            assert self._domain.min <= input_scalar <= self._domain.max
+        exponent = -self._slope * (input_scalar - self._center)
+        # math.exp raises on overflow, where the limit is 0 anyway
+        return 1.0 / (1.0 + math.exp(exponent)) if exponent < 709 else 0.0
+
+    def fuzzify_array(self, input_arr, validate=True):
+        input_arr = np.asarray(input_arr, dtype=float)
+        if validate:
+            assert np.all((self._domain.min <= input_arr)
+                          & (input_arr <= self._domain.max))
+        with np.errstate(over="ignore"):
+            return 1.0 / (1.0 +
+                          np.exp(-self._slope * (input_arr - self._center)))
+
+    def __str__(self):
+        return f"Sigmoid({self._slope}, {self._center})"
+
+
 def make_triangular_membership_func(domain, base_lhs_x, apex_x, base_rhs_x,
                                     name):
     assert domain.min <= base_lhs_x <= apex_x <= base_rhs_x <= domain.max
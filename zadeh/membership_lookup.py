@@ -0,0 +1,138 @@
+from .constants import RANGE_MIN
+from .membership_func import PiecewiseLinearMembershipFunc
+from .util import lazy_numpy as np
+
+# num check points per grid interval used by calc_max_approx_error()
+_ERROR_CHECK_POINTS_PER_INTERVAL = 8
+
+
+class MembershipLookupTable:
+    """Membership vals of a ling var's membership funcs precomputed at
+    resolution evenly spaced grid points over their (shared) domain, so
+    fuzzifying is an index into the table rather than a line search.
+
+    Inputs between grid points get linearly interpolated vals if interpolate
+    is set, otherwise the vals of the nearest grid point. Either way, inputs
+    outside a membership func's non min matching domain get RANGE_MIN, as
+    with exact fuzzify(), so rules the RuleActivationIndex skips still have
+    matching degree zero.
+
+    For piecewise linear membership funcs whose points all lie on grid points,
+    interpolation is exact (up to float rounding); inputs from a known
+    discrete set are exact if the set is contained in the grid."""
+    def __init__(self, membership_funcs, resolution, interpolate=True):
+        membership_funcs = tuple(membership_funcs)
+        assert resolution >= 2
+        domain = membership_funcs[0].domain
+        assert all([
+            membership_func.domain == domain
+            for membership_func in membership_funcs
+        ])
+        self._membership_funcs = membership_funcs
+        self._domain = domain
+        self._resolution = resolution
+        self._interpolate = interpolate
+        self._grid = np.linspace(domain.min, domain.max, resolution)
+        self._inv_step = (resolution - 1) / (domain.max - domain.min)
+        self._table = np.stack([
+            membership_func.fuzzify_array(self._grid)
+            for membership_func in membership_funcs
+        ],
+                               axis=1)
+        # python floats for scalar lookups, numpy scalar indexing is slow
+        self._table_rows = self._table.tolist()
+        self._non_min_domains = tuple([
+            membership_func.non_min_matching_domain
+            for membership_func in membership_funcs
+        ])
+        self._non_min_domain_mins = np.array(
+            [non_min_domain.min for non_min_domain in self._non_min_domains])
+        self._non_min_domain_maxs = np.array(
+            [non_min_domain.max for non_min_domain in self._non_min_domains])
+
+    @property
+    def domain(self):
+        return self._domain
+
+    @property
+    def resolution(self):
+        return self._resolution
+
+    @property
+    def interpolate(self):
+        return self._interpolate
+
+    @property
+    def grid(self):
+        return self._grid
+
+    @property
+    def table(self):
+        """(resolution, num_membership_funcs) array of membership vals at
+        grid points."""
+        return self._table
+
+    def eval(self, membership_func_idx, input_scalar, validate=True):
+        if validate:
+            assert self._domain.min <= input_scalar <= self._domain.max
+        non_min_domain = self._non_min_domains[membership_func_idx]
+        if not (non_min_domain.min <= input_scalar <= non_min_domain.max):
+            return RANGE_MIN
+        pos = (input_scalar - self._domain.min) * self._inv_step
+        if self._interpolate:
+            lower_idx = min(max(int(pos), 0), self._resolution - 2)
+            lower_val = self._table_rows[lower_idx][membership_func_idx]
+            upper_val = self._table_rows[lower_idx + 1][membership_func_idx]
+            return lower_val + (pos - lower_idx) * (upper_val - lower_val)
+        else:
+            nearest_idx = min(max(int(pos + 0.5), 0), self._resolution - 1)
+            return self._table_rows[nearest_idx][membership_func_idx]
+
+    def eval_all_array(self, input_arr, validate=True):
+        """Returns (len(input_arr), num_membership_funcs) matrix of membership
+        vals."""
+        input_arr = np.asarray(input_arr, dtype=float)
+        if validate:
+            assert np.all((self._domain.min <= input_arr)
+                          & (input_arr <= self._domain.max))
+        pos = (input_arr - self._domain.min) * self._inv_step
+        if self._interpolate:
+            lower_idxs = np.clip(pos.astype(np.intp), 0,
+                                 self._resolution - 2)
+            lower_vals = self._table[lower_idxs]
+            upper_vals = self._table[lower_idxs + 1]
+            result = lower_vals + (pos - lower_idxs)[:, np.newaxis] * \
+                (upper_vals - lower_vals)
+        else:
+            nearest_idxs = np.clip(
+                np.floor(pos + 0.5).astype(np.intp), 0, self._resolution - 1)
+            result = self._table[nearest_idxs]
+        outside_non_min_domain = \
+            (input_arr[:, np.newaxis] < self._non_min_domain_mins) | \
+            (input_arr[:, np.newaxis] > self._non_min_domain_maxs)
+        result[outside_non_min_domain] = RANGE_MIN
+        return result
+
+    def calc_max_approx_error(self, input_arr=None):
+        """Returns max abs difference between table and exact fuzzify() vals,
+        over all membership funcs, at input_arr. By default checks a grid
+        _ERROR_CHECK_POINTS_PER_INTERVAL times finer than the table's plus
+        the x coords of all piecewise linear membership func points, which
+        covers where nearest grid point lookup is worst."""
+        if input_arr is None:
+            input_arr = np.linspace(
+                self._domain.min, self._domain.max,
+                (self._resolution - 1) * _ERROR_CHECK_POINTS_PER_INTERVAL + 1)
+            point_xs = [
+                point.x for membership_func in self._membership_funcs
+                if isinstance(membership_func, PiecewiseLinearMembershipFunc)
+                for point in membership_func.points
+            ]
+            input_arr = np.concatenate([input_arr, point_xs])
+        input_arr = np.asarray(input_arr, dtype=float)
+        exact = np.stack([
+            membership_func.fuzzify_array(input_arr)
+            for membership_func in self._membership_funcs
+        ],
+                         axis=1)
+        return float(np.max(np.abs(self.eval_all_array(input_arr) - exact)))
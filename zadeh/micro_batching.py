@@ -0,0 +1,175 @@
+"""Asyncio front-end that gathers concurrent single-input score/classify
+requests into micro-batches for batched inference."""
+import asyncio
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from .constants import SCORE_MIN
+from .error import UndefinedMappingError
+
+# set in each worker process by _init_worker()
+_worker_system = None
+
+
+class _LoopState:
+    """Pending requests of one event loop."""
+    def __init__(self):
+        self.pending = []
+        self.flush_handle = None
+
+
+class MicroBatcher:
+    """await score(input_vec) / classify(input_vec) from any number of
+    coroutines: requests are queued and sent to system.score_batch() as one
+    batch once max_batch_size are pending, or max_latency_s after the first
+    request of a batch arrived, whichever is sooner. Batches run on a pool
+    of num_workers threads, or processes if use_processes (the system is
+    then pickled once per worker, and must be picklable), so the event loop
+    is never blocked.
+
+    Each input is checked on submission: one of the wrong shape or outside
+    its ling var's domain raises ValueError for that request only, and is not
+    batched. classify() raises UndefinedMappingError as
+    InferenceEngine.classify() does; any other error raised for a batch is
+    raised for every request in it. Await aclose() (or use as an async
+    context manager) to shut the pool down from the event loop, close() from
+    sync code."""
+    def __init__(self,
+                 system,
+                 max_batch_size=256,
+                 max_latency_s=0.005,
+                 num_workers=1,
+                 use_processes=False):
+        assert max_batch_size >= 1
+        assert max_latency_s >= 0
+        self._system = system
+        self._class_labels = tuple(system.inference_engine.class_labels)
+        self._input_mins = np.array([
+            ling_var.input_domain.min for ling_var in system.ling_vars
+        ])
+        self._input_maxs = np.array([
+            ling_var.input_domain.max for ling_var in system.ling_vars
+        ])
+        self._max_batch_size = max_batch_size
+        self._max_latency_s = max_latency_s
+        if use_processes:
+            self._executor = ProcessPoolExecutor(num_workers,
+                                                 initializer=_init_worker,
+                                                 initargs=(system, ))
+            self._score_batch = _score_batch_in_worker
+        else:
+            self._executor = ThreadPoolExecutor(num_workers)
+            self._score_batch = system.score_batch
+        self._loop_states = weakref.WeakKeyDictionary()
+        # running batch tasks, referenced so they are not garbage collected
+        self._tasks = set()
+
+    @property
+    def max_batch_size(self):
+        return self._max_batch_size
+
+    @property
+    def max_latency_s(self):
+        return self._max_latency_s
+
+    async def score(self, input_vec):
+        """As system.score(), but micro-batched."""
+        score_vec = await self._submit(input_vec)
+        return OrderedDict(zip(self._class_labels, score_vec.tolist()))
+
+    async def classify(self, input_vec):
+        """As system.classify(), but micro-batched."""
+        score_vec = await self._submit(input_vec)
+        if np.all(score_vec == SCORE_MIN):
+            raise UndefinedMappingError
+        return self._class_labels[int(np.argmax(score_vec))]
+
+    async def _submit(self, input_vec):
+        input_vec = self._check_input_vec(input_vec)
+        loop = asyncio.get_running_loop()
+        loop_state = self._loop_states.get(loop)
+        if loop_state is None:
+            loop_state = _LoopState()
+            self._loop_states[loop] = loop_state
+        future = loop.create_future()
+        loop_state.pending.append((input_vec, future))
+        if len(loop_state.pending) >= self._max_batch_size:
+            self._flush(loop, loop_state)
+        elif loop_state.flush_handle is None:
+            loop_state.flush_handle = loop.call_later(self._max_latency_s,
+                                                      self._flush, loop,
+                                                      loop_state)
+        return await future
+
+    def _check_input_vec(self, input_vec):
+        input_vec = np.asarray(input_vec, dtype=float)
+        if input_vec.shape != self._input_mins.shape:
+            raise ValueError(f"Input of shape {input_vec.shape}, expected "
+                             f"{self._input_mins.shape}")
+        if not np.all((self._input_mins <= input_vec)
+                      & (input_vec <= self._input_maxs)):
+            raise ValueError(f"Input {input_vec.tolist()} outside ling var "
+                             "domains")
+        return input_vec
+
+    def _flush(self, loop, loop_state):
+        if loop_state.flush_handle is not None:
+            loop_state.flush_handle.cancel()
+            loop_state.flush_handle = None
+        batch = loop_state.pending
+        loop_state.pending = []
+        if len(batch) > 0:
+            task = loop.create_task(self._run_batch(loop, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, loop, batch):
+        try:
+            input_mat = np.stack([input_vec for (input_vec, _) in batch])
+            score_mat = await loop.run_in_executor(self._executor,
+                                                   self._score_batch,
+                                                   input_mat)
+        except Exception as e:
+            for (_, future) in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for ((_, future), score_vec) in zip(batch, score_mat):
+                if not future.done():
+                    future.set_result(score_vec)
+
+    def close(self):
+        """Shuts the pool down, waiting for running batches; blocks, so from
+        the event loop await aclose() instead."""
+        self._executor.shutdown(wait=True)
+
+    async def aclose(self):
+        """Sends off requests pending on the running loop, waits for its
+        batches to finish, then shuts the pool down without blocking the
+        loop."""
+        loop = asyncio.get_running_loop()
+        loop_state = self._loop_states.get(loop)
+        if loop_state is not None:
+            self._flush(loop, loop_state)
+        # _run_batch() passes errors on to the request futures, never raises
+        await asyncio.gather(
+            *[task for task in self._tasks if task.get_loop() is loop])
+        await loop.run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+
+def _init_worker(system):
+    global _worker_system
+    _worker_system = system
+
+
+def _score_batch_in_worker(input_mat):
+    return _worker_system.score_batch(input_mat)
@@ -0,0 +1,115 @@
+"""Evaluation of many FuzzyRuleBasedSystems over one dataset on a process
+pool, e.g. a GA population each generation."""
+import multiprocessing
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from .evaluation import calc_complexity, evaluate_score_mat
+from .shared_array import SharedArray, attach_shared_array
+
+SystemEvaluation = namedtuple("SystemEvaluation",
+                              ["score_mat", "accuracy", "complexity"])
+
+# set in each worker process by _init_worker()
+_worker_shm = None
+_worker_input_mat = None
+_worker_true_labels = None
+
+
+class ParallelSystemEvaluator:
+    """Keeps a process pool plus a shared memory copy of input_mat alive
+    between evaluate() calls: workers attach to the dataset once, so only the
+    systems themselves are pickled per task.
+
+    Results are returned in the same order as the given systems and do not
+    depend on num_workers. Accuracy counts undefined mappings as incorrect
+    and is None if no true_labels were given; complexity is None for rule
+    bases that do not support it (see evaluation.calc_complexity()). Systems (including their
+    logical/aggregation strats) must be picklable.
+
+    With num_workers=1 systems are evaluated in this process, no pool or
+    shared memory is used."""
+    def __init__(self, input_mat, true_labels=None, num_workers=None):
+        input_mat = np.asarray(input_mat, dtype=float)
+        assert input_mat.ndim == 2
+        if true_labels is not None:
+            true_labels = np.asarray(true_labels)
+            assert len(true_labels) == input_mat.shape[0]
+        self._num_workers = \
+            num_workers if num_workers is not None else os.cpu_count()
+        assert self._num_workers >= 1
+        self._input_mat = input_mat
+        self._true_labels = true_labels
+        if self._num_workers == 1:
+            self._shared_input_mat = None
+            self._pool = None
+        else:
+            self._shared_input_mat = SharedArray(input_mat)
+            self._pool = multiprocessing.Pool(
+                processes=self._num_workers,
+                initializer=_init_worker,
+                initargs=(self._shared_input_mat.spec, true_labels))
+
+    @property
+    def num_workers(self):
+        return self._num_workers
+
+    def evaluate(self, systems):
+        """Returns list of SystemEvaluations, one per system."""
+        systems = list(systems)
+        if self._pool is None:
+            return [
+                _evaluate_system(system, self._input_mat, self._true_labels)
+                for system in systems
+            ]
+        else:
+            chunksize = max(1, len(systems) // (self._num_workers * 4))
+            return self._pool.map(_evaluate_system_in_worker,
+                                  systems,
+                                  chunksize=chunksize)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        if self._shared_input_mat is not None:
+            self._shared_input_mat.close()
+            self._shared_input_mat = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def evaluate_systems(systems, input_mat, true_labels=None, num_workers=None):
+    """One-off version of ParallelSystemEvaluator.evaluate()."""
+    with ParallelSystemEvaluator(input_mat, true_labels,
+                                 num_workers) as evaluator:
+        return evaluator.evaluate(systems)
+
+
+def _init_worker(input_mat_spec, true_labels):
+    global _worker_shm, _worker_input_mat, _worker_true_labels
+    (_worker_shm, _worker_input_mat) = attach_shared_array(input_mat_spec)
+    _worker_true_labels = true_labels
+
+
+def _evaluate_system_in_worker(system):
+    return _evaluate_system(system, _worker_input_mat, _worker_true_labels)
+
+
+def _evaluate_system(system, input_mat, true_labels):
+    score_mat = system.score_batch(input_mat)
+    if true_labels is not None:
+        accuracy = evaluate_score_mat(
+            score_mat, true_labels,
+            system.inference_engine.class_labels).accuracy
+    else:
+        accuracy = None
+    return SystemEvaluation(score_mat, accuracy,
+                            calc_complexity(system.rule_base))
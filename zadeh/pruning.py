@@ -0,0 +1,272 @@
+"""Removal of rules that do not affect classification of a sample dataset:
+rules that never fire on it, rules dominated by another rule, and (where
+exact) merging of rules that differ in a single feature."""
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .aggregation import MaximumAggregation
+from .antecedent import CNFAntecedent
+from .compiled_rule_base import CompiledRuleBase
+from .evaluation import calc_complexity
+from .logical_ops import logical_or_max
+from .rule import FuzzyRule
+from .rule_base import FuzzyRuleBase
+
+PruningReport = namedtuple("PruningReport", [
+    "rule_base", "removed_rule_idxs", "merged_rule_idxs", "num_rules_before",
+    "num_rules_after", "complexity_before", "complexity_after",
+    "classify_time_before_s", "classify_time_after_s", "speedup"
+])
+
+
+def prune_rule_base(inference_engine,
+                    ling_vars,
+                    rule_base,
+                    input_mat,
+                    remove_dominated=True,
+                    merge=True,
+                    num_timing_repeats=3):
+    """Returns PruningReport whose rule_base gives identical classify_batch()
+    output (labels and undefined mask) to rule_base on input_mat, using
+    inference_engine. Passes, in order:
+
+    1. rules whose matching degree is zero on every sample are removed,
+    2. with MaximumAggregation, CNF rules dominated by another CNF rule with
+       the same consequent and a superset antecedent mask (which therefore
+       has a matching degree at least as high everywhere) are removed; of
+       rules with equal masks the first is kept. calc_num_spec_fuzzy_decision
+       _regions() is used to rule out pairs cheaply (a superset never has
+       fewer regions),
+    3. with MaximumAggregation and logical_or_max, CNF rules with the same
+       consequent whose masks only differ for one feature are merged into one
+       rule using the union of their membership funcs for that feature; its
+       matching degree is the max of theirs, so max aggregated scores do not
+       change.
+
+    Every pass is checked against the reference labels on input_mat and
+    only changes that keep them identical are kept, so the guarantee holds
+    whatever the logical ops / aggregation strat. removed_rule_idxs and
+    merged_rule_idxs (tuples of idxs merged into one rule) refer to
+    positions in the given rule_base. Complexities are None for rule bases
+    with non-CNF antecedents. speedup is classify_batch() time before / after
+    (best of num_timing_repeats)."""
+    input_mat = np.asarray(input_mat, dtype=float)
+    class_labels = tuple(inference_engine.class_labels)
+    rules = list(rule_base)
+    ref_labels = inference_engine.classify_batch(ling_vars,
+                                                 FuzzyRuleBase(rules),
+                                                 input_mat)
+
+    def is_ok(entries):
+        if len(entries) == 0:
+            return False
+        labels = inference_engine.classify_batch(
+            ling_vars, FuzzyRuleBase([rule for (_, rule) in entries]),
+            input_mat)
+        return _labels_are_equal(labels, ref_labels)
+
+    # (idxs of original rules it stands for, rule)
+    entries = [((rule_idx, ), rule) for (rule_idx, rule) in enumerate(rules)]
+    removed_rule_idxs = []
+    merged_rule_idxs = []
+
+    (new_entries, accepted_changes) = _apply_verified(
+        entries, _find_dead_rule_changes(inference_engine, ling_vars, entries,
+                                         input_mat), is_ok)
+    removed_rule_idxs += _get_removed_rule_idxs(entries, accepted_changes)
+    entries = new_entries
+
+    is_max_aggregation = isinstance(inference_engine.aggregation_strat,
+                                    MaximumAggregation)
+    if remove_dominated and is_max_aggregation:
+        (new_entries, accepted_changes) = _apply_verified(
+            entries,
+            _find_dominated_rule_changes(ling_vars, class_labels, entries),
+            is_ok)
+        removed_rule_idxs += _get_removed_rule_idxs(entries,
+                                                    accepted_changes)
+        entries = new_entries
+
+    if merge and is_max_aggregation and \
+            inference_engine.logical_or_strat is logical_or_max:
+        any_merged = True
+        while any_merged:
+            any_merged = False
+            for feature_idx in range(len(ling_vars)):
+                (entries, accepted_changes) = _apply_verified(
+                    entries,
+                    _find_merge_changes(ling_vars, class_labels, entries,
+                                        feature_idx), is_ok)
+                any_merged = any_merged or len(accepted_changes) > 0
+        merged_rule_idxs = [
+            orig_rule_idxs for (orig_rule_idxs, _) in entries
+            if len(orig_rule_idxs) > 1
+        ]
+
+    pruned_rule_base = FuzzyRuleBase([rule for (_, rule) in entries])
+    time_before = _time_classify_batch(inference_engine, ling_vars,
+                                       rule_base, input_mat,
+                                       num_timing_repeats)
+    time_after = _time_classify_batch(inference_engine, ling_vars,
+                                      pruned_rule_base, input_mat,
+                                      num_timing_repeats)
+    return PruningReport(pruned_rule_base, sorted(removed_rule_idxs),
+                         merged_rule_idxs, len(rules), len(pruned_rule_base),
+                         calc_complexity(rule_base),
+                         calc_complexity(pruned_rule_base), time_before,
+                         time_after, time_before / time_after)
+
+
+def _labels_are_equal(labels, ref_labels):
+    mask = np.ma.getmaskarray(labels)
+    return (np.array_equal(mask, np.ma.getmaskarray(ref_labels))
+            and np.array_equal(labels.data[~mask], ref_labels.data[~mask]))
+
+
+def _apply(entries, changes):
+    """changes are (positions, replacement rule or None): entries at
+    positions are removed and replacement (if any) put at the first of
+    them."""
+    replacements = {}
+    removed_positions = set()
+    for (positions, replacement_rule) in changes:
+        removed_positions.update(positions)
+        if replacement_rule is not None:
+            orig_rule_idxs = tuple(
+                sorted([
+                    rule_idx for position in positions
+                    for rule_idx in entries[position][0]
+                ]))
+            replacements[min(positions)] = (orig_rule_idxs, replacement_rule)
+    new_entries = []
+    for (position, entry) in enumerate(entries):
+        if position in replacements:
+            new_entries.append(replacements[position])
+        elif position not in removed_positions:
+            new_entries.append(entry)
+    return new_entries
+
+
+def _apply_verified(entries, changes, is_ok):
+    """Applies as many of changes as possible such that is_ok() holds for the
+    result: all at once if that works, else by recursively halving."""
+    accepted_changes = []
+    pending = [changes] if len(changes) > 0 else []
+    while len(pending) > 0:
+        chunk = pending.pop()
+        if is_ok(_apply(entries, accepted_changes + chunk)):
+            accepted_changes += chunk
+        elif len(chunk) > 1:
+            pending.append(chunk[len(chunk) // 2:])
+            pending.append(chunk[:len(chunk) // 2])
+    return (_apply(entries, accepted_changes), accepted_changes)
+
+
+def _get_removed_rule_idxs(entries, removal_changes):
+    return [
+        rule_idx for (positions, _) in removal_changes
+        for position in positions for rule_idx in entries[position][0]
+    ]
+
+
+def _find_dead_rule_changes(inference_engine, ling_vars, entries, input_mat):
+    compiled_rule_base = CompiledRuleBase.from_rules(
+        [rule for (_, rule) in entries], ling_vars,
+        inference_engine.class_labels)
+    matching_degree_mat = inference_engine.compute_matching_degree_mat(
+        compiled_rule_base,
+        inference_engine.fuzzify_batch(
+            ling_vars, input_mat,
+            compiled_rule_base.max_num_membership_funcs))
+    dead_positions = np.nonzero(~np.any(matching_degree_mat != 0, axis=0))[0]
+    return [((int(position), ), None) for position in dead_positions]
+
+
+def _group_cnf_entries(ling_vars, class_labels, entries):
+    """Returns (masks, {consequent key: [positions]}) for CNF entries."""
+    compiled_rule_base = CompiledRuleBase.from_rules(
+        [rule for (_, rule) in entries], ling_vars, class_labels)
+    groups = {}
+    for (position, (_, rule)) in enumerate(entries):
+        if isinstance(rule.antecedent, CNFAntecedent):
+            consequent_key = \
+                compiled_rule_base.consequent_mat[position].tobytes()
+            groups.setdefault(consequent_key, []).append(position)
+    return (compiled_rule_base.antecedent_masks, groups)
+
+
+def _find_dominated_rule_changes(ling_vars, class_labels, entries):
+    (masks, groups) = _group_cnf_entries(ling_vars, class_labels, entries)
+    changes = []
+    for positions in groups.values():
+        positions = np.array(positions)
+        group_masks = masks[positions]
+        num_regions = np.array([
+            entries[position][1].calc_num_spec_fuzzy_decision_regions()
+            for position in positions
+        ])
+        for (group_idx, position) in enumerate(positions):
+            # supersets have at least as many decision regions
+            could_dominate = (num_regions >= num_regions[group_idx])
+            could_dominate[group_idx] = False
+            is_superset = np.all(group_masks[could_dominate]
+                                 | ~group_masks[group_idx],
+                                 axis=(1, 2))
+            dominator_positions = positions[could_dominate][is_superset]
+            is_equal = np.all(
+                group_masks[could_dominate][is_superset] ==
+                group_masks[group_idx],
+                axis=(1, 2))
+            # of equal masks only the first is kept
+            is_dominated = np.any((~is_equal)
+                                  | (dominator_positions < position))
+            if is_dominated:
+                changes.append(((int(position), ), None))
+    return changes
+
+
+def _find_merge_changes(ling_vars, class_labels, entries, feature_idx):
+    (masks, groups) = _group_cnf_entries(ling_vars, class_labels, entries)
+    changes = []
+    for positions in groups.values():
+        merge_groups = {}
+        for position in positions:
+            other_features_mask = masks[position].copy()
+            other_features_mask[feature_idx] = False
+            merge_groups.setdefault(other_features_mask.tobytes(),
+                                    []).append(position)
+        for merge_positions in merge_groups.values():
+            if len(merge_positions) > 1:
+                changes.append(
+                    (tuple(merge_positions),
+                     _make_merged_rule(ling_vars,
+                                       [entries[position][1]
+                                        for position in merge_positions],
+                                       masks[merge_positions], feature_idx)))
+    return changes
+
+
+def _make_merged_rule(ling_vars, rules, masks, feature_idx):
+    merged_mask = masks[0].copy()
+    merged_mask[feature_idx] = np.any(masks[:, feature_idx], axis=0)
+    membership_func_usages = [
+        tuple(mf_mask[:ling_var.num_membership_funcs].astype(int).tolist())
+        for (mf_mask, ling_var) in zip(merged_mask, ling_vars)
+    ]
+    return FuzzyRule(CNFAntecedent(membership_func_usages),
+                     dict(rules[0].consequent))
+
+
+def _time_classify_batch(inference_engine, ling_vars, rule_base, input_mat,
+                         num_repeats):
+    compiled_rule_base = CompiledRuleBase.from_rules(
+        rule_base, ling_vars, inference_engine.class_labels)
+    best = float("inf")
+    for _ in range(num_repeats):
+        start = time.perf_counter()
+        inference_engine.classify_batch(ling_vars, compiled_rule_base,
+                                        input_mat)
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -1,4 +1,8 @@
 class FuzzyRule:
+    """consequent maps class label to consequent val: a dict, or a
+    ConsequentRow for rules in compacted rule bases."""
+    __slots__ = ("_antecedent", "_consequent")
+
     def __init__(self, antecedent, consequent):
         self._antecedent = antecedent
         self._consequent = consequent
@@ -15,9 +19,21 @@ class FuzzyRule:
                         ling_vars,
                         input_vec,
                         logical_and_strat=None,
-                        logical_or_strat=None):
+                        logical_or_strat=None,
+                        membership_cache=None):
         return self._antecedent.eval(ling_vars, input_vec, logical_and_strat,
-                                     logical_or_strat)
+                                     logical_or_strat, membership_cache)
 
     def calc_num_spec_fuzzy_decision_regions(self):
         return self._antecedent.calc_num_spec_fuzzy_decision_regions()
+
+    def __eq__(self, other):
+        """Rules are equal if their antecedents and consequents are; rules
+        should not be mutated once used as keys."""
+        return (isinstance(other, FuzzyRule)
+                and self._antecedent == other._antecedent
+                and self._consequent == other._consequent)
+
+    def __hash__(self):
+        return hash(
+            (self._antecedent, frozenset(self._consequent.items())))
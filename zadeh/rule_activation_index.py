@@ -0,0 +1,118 @@
+import bisect
+
+
+class RuleActivationIndex:
+    """Finds the rules that can have a non-zero matching degree for a given
+    input vector, so that all other rules can be skipped. Only valid for
+    logical ANDs where a single zero membership val gives a zero matching
+    degree (any t-norm, e.g. min or prod).
+
+    For each feature, the bounds of all membership funcs' non min matching
+    domains split the feature's values into cells: the bounds themselves and
+    the open intervals between them. Which membership funcs can be non-min is
+    fixed within a cell, so the set of rules that can fire on that feature is
+    precomputed per cell, as a bitset over rules. Candidate rules for an input
+    are then one bisect and one AND per feature.
+
+    usage_bits has, for each rule, the membership func usage bits of its
+    antecedent (see AntecedentABC.membership_func_usage_bits())."""
+    def __init__(self, ling_vars, usage_bits):
+        self._num_rules = len(usage_bits)
+        self._all_rule_bits = (1 << self._num_rules) - 1
+        self._feature_bounds = []
+        self._feature_cell_rule_bits = []
+        for (feature_idx, ling_var) in enumerate(ling_vars):
+            bounds = sorted({
+                bound
+                for membership_func in ling_var.membership_funcs
+                for bound in membership_func.non_min_matching_domain
+            })
+            self._feature_bounds.append(bounds)
+            self._feature_cell_rule_bits.append(
+                self._calc_cell_rule_bits(feature_idx, ling_var, bounds,
+                                          usage_bits))
+
+    @property
+    def num_rules(self):
+        return self._num_rules
+
+    def _calc_cell_rule_bits(self, feature_idx, ling_var, bounds,
+                             usage_bits):
+        num_membership_funcs = ling_var.num_membership_funcs
+        rules_using_mf_idxs = [[] for _ in range(num_membership_funcs)]
+        rules_not_using_feature_idxs = []
+        for (rule_idx, rule_usage_bits) in enumerate(usage_bits):
+            feature_usage_bits = rule_usage_bits[feature_idx]
+            assert (feature_usage_bits >> num_membership_funcs) == 0
+            if feature_usage_bits == 0:
+                rules_not_using_feature_idxs.append(rule_idx)
+            for (mf_idx, rule_idxs) in enumerate(rules_using_mf_idxs):
+                if (feature_usage_bits >> mf_idx) & 1:
+                    rule_idxs.append(rule_idx)
+        rules_using_mf_bits = [
+            _to_bits(rule_idxs, self._num_rules)
+            for rule_idxs in rules_using_mf_idxs
+        ]
+        rules_not_using_feature_bits = _to_bits(rules_not_using_feature_idxs,
+                                                self._num_rules)
+
+        cell_rule_bits = []
+        for cell_point in self._make_cell_points(bounds):
+            rule_bits = rules_not_using_feature_bits
+            for (mf_idx, membership_func) in \
+                    enumerate(ling_var.membership_funcs):
+                domain = membership_func.non_min_matching_domain
+                if domain.min <= cell_point <= domain.max:
+                    rule_bits |= rules_using_mf_bits[mf_idx]
+            cell_rule_bits.append(rule_bits)
+        return cell_rule_bits
+
+    def _make_cell_points(self, bounds):
+        """One representative point per cell, cells ordered as in
+        _find_cell_idx()."""
+        cell_points = [bounds[0] - 1.0]
+        for (bound, next_bound) in zip(bounds, bounds[1:] + [None]):
+            cell_points.append(bound)
+            cell_points.append((bound + next_bound) /
+                               2 if next_bound is not None else bound + 1.0)
+        return cell_points
+
+    def _find_cell_idx(self, bounds, input_scalar):
+        """Cell 2i+1 is the bound bounds[i], cell 2i is the open interval just
+        below it (and cell 2*len(bounds) is the interval above the last
+        bound)."""
+        idx = bisect.bisect_left(bounds, input_scalar)
+        on_bound = (idx < len(bounds) and bounds[idx] == input_scalar)
+        return (2 * idx + 1) if on_bound else (2 * idx)
+
+    def find_candidate_rule_idxs(self, input_vec):
+        """Returns sorted list of idxs of rules that can fire for
+        input_vec."""
+        candidate_bits = self._all_rule_bits
+        for (input_scalar, bounds, cell_rule_bits) in zip(
+                input_vec, self._feature_bounds,
+                self._feature_cell_rule_bits):
+            candidate_bits &= \
+                cell_rule_bits[self._find_cell_idx(bounds, input_scalar)]
+            if candidate_bits == 0:
+                break
+        return _to_idxs(candidate_bits)
+
+
+def _to_bits(idxs, num_bits):
+    packed = bytearray((num_bits + 7) // 8)
+    for idx in idxs:
+        packed[idx >> 3] |= (1 << (idx & 7))
+    return int.from_bytes(packed, byteorder="little")
+
+
+def _to_idxs(bits):
+    # bin() and str.find() scan at C speed, leaving one loop iteration per set
+    # bit; bit i is char i of the reversed digits
+    digits = bin(bits)[:1:-1]
+    idxs = []
+    idx = digits.find("1")
+    while idx != -1:
+        idxs.append(idx)
+        idx = digits.find("1", idx + 1)
+    return idxs
@@ -1,6 +1,70 @@
+from .compiled_rule_base import CompiledRuleBase, make_consequent_mat
+from .consequent import ConsequentRow, ConsequentTable
+from .rule import FuzzyRule
+from .scalar_rule_base import ScalarRuleBase
+
+
 class FuzzyRuleBase:
     def __init__(self, rules):
         self._rules = tuple(rules)
+        self._compiled_cache = {}
+        self._scalar_cache = {}
+
+    def compile(self, ling_vars, class_labels=None):
+        """Returns CompiledRuleBase for this rule base. class_labels defaults
+        to the consequent keys of the first rule. Result is cached, so repeat
+        calls with same ling var sizes and class labels are free."""
+        if class_labels is None:
+            class_labels = tuple(self._rules[0].consequent.keys())
+        cache_key = (tuple([
+            ling_var.num_membership_funcs for ling_var in ling_vars
+        ]), tuple(class_labels))
+        try:
+            return self._compiled_cache[cache_key]
+        except KeyError:
+            compiled = CompiledRuleBase.from_rules(self._rules, ling_vars,
+                                                   class_labels)
+            self._compiled_cache[cache_key] = compiled
+            return compiled
+
+    def compile_scalar(self, class_labels=None):
+        """Returns ScalarRuleBase for this rule base, cached as in
+        compile(). Needs no NumPy."""
+        if class_labels is None:
+            class_labels = tuple(self._rules[0].consequent.keys())
+        cache_key = tuple(class_labels)
+        try:
+            return self._scalar_cache[cache_key]
+        except KeyError:
+            scalar_rule_base = ScalarRuleBase.from_rules(
+                self._rules, class_labels)
+            self._scalar_cache[cache_key] = scalar_rule_base
+            return scalar_rule_base
+
+    def compact(self, class_labels=None):
+        """Returns equal rule base using less memory: consequents become
+        ConsequentRows of one shared ConsequentTable, and rules with equal
+        antecedents share one antecedent object. class_labels defaults as
+        in compile(); consequent vals for other labels are dropped."""
+        if class_labels is None:
+            class_labels = tuple(self._rules[0].consequent.keys())
+        table = ConsequentTable(class_labels,
+                                make_consequent_mat(self._rules, class_labels))
+        shared_antecedents = {}
+        return FuzzyRuleBase([
+            FuzzyRule(
+                shared_antecedents.setdefault(rule.antecedent,
+                                              rule.antecedent),
+                ConsequentRow(table, row_idx))
+            for (row_idx, rule) in enumerate(self._rules)
+        ])
+
+    def __getstate__(self):
+        # compiled forms are derived data, cheaper to rebuild than to pickle
+        state = self.__dict__.copy()
+        state["_compiled_cache"] = {}
+        state["_scalar_cache"] = {}
+        return state
 
     def calc_num_spec_fuzzy_decision_regions(self):
         return sum(
@@ -10,6 +74,14 @@ class FuzzyRuleBase:
     def __iter__(self):
         return iter(self._rules)
 
+    def __eq__(self, other):
+        """Rule bases are equal if they have equal rules in the same order."""
+        return (isinstance(other, FuzzyRuleBase)
+                and self._rules == other._rules)
+
+    def __hash__(self):
+        return hash(self._rules)
+
     def __len__(self):
         return len(self._rules)
 
@@ -0,0 +1,90 @@
+from .constants import CONSEQUENT_MAX, CONSEQUENT_MIN, MATCHING_MAX
+from .rule_activation_index import RuleActivationIndex
+
+
+class ScalarRuleBase:
+    """Plain Python form of a rule base, used for scalar inference (see
+    InferenceEngine.score()), which so needs no NumPy.
+
+    usage_bits has the membership func usage bits of each rule's antecedent
+    (see AntecedentABC.membership_func_usage_bits()); consequent_rows has each
+    rule's consequent vals as a list in class_labels order. rules can be a
+    LazyRuleSequence, as for CompiledRuleBase."""
+    def __init__(self, rules, usage_bits, consequent_rows, class_labels):
+        self._rules = rules
+        self._usage_bits = usage_bits
+        self._consequent_rows = consequent_rows
+        self._class_labels = tuple(class_labels)
+        # derived on first use
+        self._activation_index_ling_vars = None
+        self._activation_index = None
+        self._implication_bound_order = None
+
+    @classmethod
+    def from_rules(cls, rules, class_labels):
+        rules = tuple(rules)
+        consequent_rows = [[
+            float(rule.consequent[class_label]) for class_label in class_labels
+        ] for rule in rules]
+        assert all([
+            CONSEQUENT_MIN <= consequent_val <= CONSEQUENT_MAX
+            for consequent_row in consequent_rows
+            for consequent_val in consequent_row
+        ])
+        usage_bits = [
+            rule.antecedent.membership_func_usage_bits() for rule in rules
+        ]
+        return cls(rules, usage_bits, consequent_rows, class_labels)
+
+    @property
+    def rules(self):
+        return self._rules
+
+    @property
+    def consequent_rows(self):
+        return self._consequent_rows
+
+    @property
+    def class_labels(self):
+        return self._class_labels
+
+    def __len__(self):
+        return len(self._consequent_rows)
+
+    def get_activation_index(self, ling_vars):
+        """Returns RuleActivationIndex for given ling vars, built on first
+        use and kept until called with different ling vars."""
+        same_ling_vars = (
+            self._activation_index_ling_vars is not None
+            and len(self._activation_index_ling_vars) == len(ling_vars)
+            and all([
+                cached is given for (cached, given) in zip(
+                    self._activation_index_ling_vars, ling_vars)
+            ]))
+        if not same_ling_vars:
+            self._activation_index = RuleActivationIndex(
+                ling_vars, self._usage_bits)
+            self._activation_index_ling_vars = tuple(ling_vars)
+        return self._activation_index
+
+    def get_implication_bound_order(self):
+        """Returns (rule_order, rule_ranks, implication_bounds): rule idxs
+        sorted by decreasing max consequent val, each rule's position in
+        rule_order, and the max consequent vals themselves. As matching
+        degrees are at most MATCHING_MAX, a rule's max consequent val bounds
+        its product implication for any class. Built on first use."""
+        if self._implication_bound_order is None:
+            implication_bounds = [
+                MATCHING_MAX * max(consequent_row, default=CONSEQUENT_MIN)
+                for consequent_row in self._consequent_rows
+            ]
+            # sorted() is stable
+            rule_order = sorted(
+                range(len(implication_bounds)),
+                key=lambda rule_idx: -implication_bounds[rule_idx])
+            rule_ranks = [None] * len(rule_order)
+            for (rank, rule_idx) in enumerate(rule_order):
+                rule_ranks[rule_idx] = rank
+            self._implication_bound_order = (rule_order, rule_ranks,
+                                             implication_bounds)
+        return self._implication_bound_order
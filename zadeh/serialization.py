@@ -0,0 +1,332 @@
+"""Versioned binary save/load of whole FuzzyRuleBasedSystems.
+
+File layout (little endian): 8 byte magic, uint32 format version, uint64
+header size, UTF-8 JSON header, then (from the next 64 byte boundary) the
+data section of raw arrays, each starting at a 64 byte aligned offset. The
+header holds everything that is not an array (names, class labels, engine
+config) plus the data section offset, dtype and shape of each array:
+
+    mf_domains          (num_mfs_total, 2) float64
+    mf_kinds            (num_mfs_total, ) uint8, see _MF_KINDS
+    mf_point_offsets    (num_mfs_total + 1, ) int64, into mf_points
+    mf_points           (num_points_total, 2) float64
+    mf_param_offsets    (num_mfs_total + 1, ) int64, into mf_params
+    mf_params           (num_params_total, ) float64
+    antecedent_masks    (num_rules, num_features, max_num_mfs) bool
+    antecedent_kinds    (num_rules, ) uint8, see lazy_rules
+    consequent_mat      (num_rules, num_classes) float64
+
+Membership funcs are listed ling var by ling var, in order. Piecewise linear
+ones have points, the closed form ones constructor params (after domain).
+StrongFuzzyPartitions are flagged in the header and rebuilt as such. Loading
+memory maps the arrays (by default) and builds a CompiledRuleBase directly on
+them; FuzzyRule objects are only created if scalar inference needs them.
+Version 1 files (piecewise linear membership funcs only) can still be loaded.
+
+Only the membership funcs in _MF_KINDS, CNF/conjunctive antecedents and the
+logical ops / aggregation strats / implications defined in this package can
+be saved."""
+import json
+import struct
+
+import numpy as np
+
+from . import aggregation, logical_ops
+from .compiled_rule_base import CompiledRuleBase
+from .domain import Domain
+from .inference_engine import InferenceEngine
+from .lazy_rules import LazyRuleSequence, get_antecedent_kind
+from .linguistic_var import LinguisticVar, StrongFuzzyPartition
+from .membership_func import (GaussianMembershipFunc,
+                              GeneralizedBellMembershipFunc,
+                              PiecewiseLinearMembershipFunc, Point,
+                              SigmoidMembershipFunc,
+                              TrapezoidalMembershipFunc,
+                              TriangularMembershipFunc)
+from .system import FuzzyRuleBasedSystem
+
+MAGIC = b"ZADEHFRB"
+FORMAT_VERSION = 2
+# kind -> (membership func type, names of its constructor params after domain,
+# also its properties); piecewise linear ones store points instead
+_MF_KINDS = {
+    0: (PiecewiseLinearMembershipFunc, ()),
+    1: (TriangularMembershipFunc, ("base_lhs_x", "apex_x", "base_rhs_x")),
+    2: (TrapezoidalMembershipFunc, ("bottom_base_lhs_x", "top_base_lhs_x",
+                                    "top_base_rhs_x", "bottom_base_rhs_x")),
+    3: (GaussianMembershipFunc, ("mean", "sigma")),
+    4: (GeneralizedBellMembershipFunc, ("width", "slope", "center")),
+    5: (SigmoidMembershipFunc, ("slope", "center"))
+}
+_MF_KIND_BY_TYPE = {
+    mf_type: mf_kind
+    for (mf_kind, (mf_type, _)) in _MF_KINDS.items()
+}
+_PREAMBLE_FORMAT = "<8sIQ"
+_ARRAY_ALIGNMENT = 64
+
+
+def save_system(system, path):
+    """Writes system to path in the format described above."""
+    inference_engine = system.inference_engine
+    ling_vars = system.ling_vars
+    class_labels = tuple(inference_engine.class_labels)
+    rule_base = system.rule_base
+    if isinstance(rule_base, CompiledRuleBase):
+        compiled_rule_base = rule_base
+    else:
+        compiled_rule_base = rule_base.compile(ling_vars, class_labels)
+    assert compiled_rule_base.class_labels == class_labels
+    compiled_rules = compiled_rule_base.rules
+    if isinstance(compiled_rules, LazyRuleSequence):
+        antecedent_kinds = compiled_rules.antecedent_kinds
+    else:
+        antecedent_kinds = np.array(
+            [get_antecedent_kind(rule.antecedent) for rule in compiled_rules],
+            dtype=np.uint8)
+
+    membership_funcs = [
+        membership_func for ling_var in ling_vars
+        for membership_func in ling_var.membership_funcs
+    ]
+    mf_kinds = []
+    for membership_func in membership_funcs:
+        if type(membership_func) not in _MF_KIND_BY_TYPE:
+            raise ValueError("Unsupported membership func type: "
+                             f"{type(membership_func).__name__}")
+        mf_kinds.append(_MF_KIND_BY_TYPE[type(membership_func)])
+    mf_points = [
+        membership_func.points if mf_kind == 0 else []
+        for (membership_func, mf_kind) in zip(membership_funcs, mf_kinds)
+    ]
+    mf_params = [[
+        getattr(membership_func, param_name)
+        for param_name in _MF_KINDS[mf_kind][1]
+    ] for (membership_func, mf_kind) in zip(membership_funcs, mf_kinds)]
+    arrays = {
+        "mf_domains":
+        np.array([tuple(membership_func.domain)
+                  for membership_func in membership_funcs],
+                 dtype="<f8").reshape((len(membership_funcs), 2)),
+        "mf_kinds":
+        np.array(mf_kinds, dtype=np.uint8),
+        "mf_point_offsets":
+        np.cumsum([0] + [len(points) for points in mf_points],
+                  dtype="<i8"),
+        "mf_points":
+        np.array([tuple(point) for points in mf_points for point in points],
+                 dtype="<f8").reshape((-1, 2)),
+        "mf_param_offsets":
+        np.cumsum([0] + [len(params) for params in mf_params],
+                  dtype="<i8"),
+        "mf_params":
+        np.array([param for params in mf_params for param in params],
+                 dtype="<f8"),
+        "antecedent_masks":
+        np.asarray(compiled_rule_base.antecedent_masks, dtype=bool),
+        "antecedent_kinds":
+        np.asarray(antecedent_kinds, dtype=np.uint8),
+        "consequent_mat":
+        np.asarray(compiled_rule_base.consequent_mat, dtype="<f8")
+    }
+
+    header = {
+        "class_labels": [_to_json_label(label) for label in class_labels],
+        "engine": {
+            "logical_and_strat":
+            _get_logical_op_name(inference_engine.logical_and_strat),
+            "logical_or_strat":
+            _get_logical_op_name(inference_engine.logical_or_strat),
+            "aggregation_strat":
+            _get_aggregation_strat_name(inference_engine.aggregation_strat),
+            "implication":
+            _get_implication_name(inference_engine.aggregation_strat),
+            "use_rule_activation_index":
+            inference_engine.use_rule_activation_index,
+            "mode": inference_engine.mode
+        },
+        "ling_vars": [{
+            "name": ling_var.name,
+            "membership_func_names":
+            [membership_func.name for membership_func in
+             ling_var.membership_funcs],
+            "is_strong_fuzzy_partition":
+            type(ling_var) is StrongFuzzyPartition
+        } for ling_var in ling_vars],
+        "arrays": {}
+    }
+    offset = 0
+    for (name, arr) in arrays.items():
+        header["arrays"][name] = {
+            "offset": offset,
+            "dtype": arr.dtype.str,
+            "shape": list(arr.shape)
+        }
+        offset = _align(offset + arr.nbytes)
+    header_bytes = _encode_header(header)
+    data_start = _calc_data_start(len(header_bytes))
+
+    with open(path, "wb") as fp:
+        fp.write(
+            struct.pack(_PREAMBLE_FORMAT, MAGIC, FORMAT_VERSION,
+                        len(header_bytes)))
+        fp.write(header_bytes)
+        for (name, arr) in arrays.items():
+            fp.write(b"\0" *
+                     (data_start + header["arrays"][name]["offset"] -
+                      fp.tell()))
+            fp.write(np.ascontiguousarray(arr).tobytes())
+
+
+def load_system(path, mmap=True):
+    """Loads system saved by save_system(). With mmap the arrays are memory
+    mapped read-only rather than read into memory. The rule base of the
+    returned system is a CompiledRuleBase whose rules are built lazily."""
+    (header, arrays) = _read(path, mmap)
+    class_labels = tuple(header["class_labels"])
+
+    mf_domains = arrays["mf_domains"]
+    ling_vars = []
+    mf_idx = 0
+    for ling_var_header in header["ling_vars"]:
+        mf_names = ling_var_header["membership_func_names"]
+        if ling_var_header.get("is_strong_fuzzy_partition", False):
+            ling_vars.append(
+                StrongFuzzyPartition(Domain(*mf_domains[mf_idx].tolist()),
+                                     len(mf_names), ling_var_header["name"],
+                                     mf_names))
+        else:
+            ling_vars.append(
+                LinguisticVar([
+                    _load_membership_func(arrays, mf_idx + offset, mf_name)
+                    for (offset, mf_name) in enumerate(mf_names)
+                ], ling_var_header["name"]))
+        mf_idx += len(mf_names)
+    assert mf_idx == len(mf_domains)
+
+    antecedent_masks = arrays["antecedent_masks"]
+    consequent_mat = arrays["consequent_mat"]
+    rules = LazyRuleSequence(
+        antecedent_masks, arrays["antecedent_kinds"], consequent_mat,
+        class_labels,
+        [ling_var.num_membership_funcs for ling_var in ling_vars])
+    compiled_rule_base = CompiledRuleBase(rules, antecedent_masks,
+                                          consequent_mat, class_labels)
+
+    engine_header = header["engine"]
+    inference_engine = InferenceEngine(
+        class_labels,
+        _get_logical_op(engine_header["logical_and_strat"]),
+        _get_logical_op(engine_header["logical_or_strat"]),
+        _get_aggregation_strat(
+            engine_header["aggregation_strat"],
+            # files saved before implications were pluggable have none
+            engine_header.get("implication", "implication_prod")),
+        use_rule_activation_index=engine_header["use_rule_activation_index"],
+        mode=engine_header["mode"])
+    return FuzzyRuleBasedSystem(inference_engine, ling_vars,
+                                compiled_rule_base)
+
+
+def _load_membership_func(arrays, mf_idx, name):
+    domain = Domain(*arrays["mf_domains"][mf_idx].tolist())
+    # version 1 files have piecewise linear membership funcs only
+    mf_kind = int(arrays["mf_kinds"][mf_idx]) if "mf_kinds" in arrays else 0
+    if mf_kind not in _MF_KINDS:
+        raise ValueError(f"Unknown membership func kind: {mf_kind}")
+    if mf_kind == 0:
+        (start, end) = arrays["mf_point_offsets"][mf_idx:mf_idx + 2].tolist()
+        points = [
+            Point(x, y) for (x, y) in arrays["mf_points"][start:end].tolist()
+        ]
+        return PiecewiseLinearMembershipFunc(domain, points, name)
+    (start, end) = arrays["mf_param_offsets"][mf_idx:mf_idx + 2].tolist()
+    params = arrays["mf_params"][start:end].tolist()
+    return _MF_KINDS[mf_kind][0](domain, *params, name)
+
+
+def _read(path, mmap):
+    preamble_size = struct.calcsize(_PREAMBLE_FORMAT)
+    with open(path, "rb") as fp:
+        preamble = fp.read(preamble_size)
+        if len(preamble) != preamble_size:
+            raise ValueError(f"Not a zadeh system file: {path}")
+        (magic, version, header_size) = struct.unpack(_PREAMBLE_FORMAT,
+                                                      preamble)
+        if magic != MAGIC:
+            raise ValueError(f"Not a zadeh system file: {path}")
+        if not 1 <= version <= FORMAT_VERSION:
+            raise ValueError(f"Unsupported format version {version} (this "
+                             f"version of zadeh reads up to "
+                             f"{FORMAT_VERSION})")
+        header = json.loads(fp.read(header_size).decode("utf-8"))
+        data_start = _calc_data_start(header_size)
+        arrays = {}
+        for (name, array_header) in header["arrays"].items():
+            dtype = np.dtype(array_header["dtype"])
+            shape = tuple(array_header["shape"])
+            if mmap and int(np.prod(shape)) > 0:
+                arrays[name] = np.memmap(path,
+                                         dtype=dtype,
+                                         mode="r",
+                                         offset=data_start +
+                                         array_header["offset"],
+                                         shape=shape)
+            else:
+                fp.seek(data_start + array_header["offset"])
+                arrays[name] = np.fromfile(fp,
+                                           dtype=dtype,
+                                           count=int(
+                                               np.prod(shape))).reshape(shape)
+    return (header, arrays)
+
+
+def _encode_header(header):
+    return json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+
+def _calc_data_start(header_size):
+    return _align(struct.calcsize(_PREAMBLE_FORMAT) + header_size)
+
+
+def _align(offset):
+    return -(-offset // _ARRAY_ALIGNMENT) * _ARRAY_ALIGNMENT
+
+
+def _to_json_label(label):
+    if isinstance(label, np.generic):
+        label = label.item()
+    if not isinstance(label, (str, int, float, bool)):
+        raise ValueError(f"Unsupported class label type: {type(label)}")
+    return label
+
+
+def _get_logical_op_name(logical_op):
+    if logical_op is None:
+        return None
+    name = getattr(logical_op, "__name__", None)
+    if getattr(logical_ops, str(name), None) is not logical_op:
+        raise ValueError(f"Unsupported logical op: {logical_op}")
+    return name
+
+
+def _get_logical_op(name):
+    return getattr(logical_ops, name) if name is not None else None
+
+
+def _get_aggregation_strat_name(aggregation_strat):
+    name = type(aggregation_strat).__name__
+    if getattr(aggregation, name, None) is not type(aggregation_strat):
+        raise ValueError(f"Unsupported aggregation strat: {aggregation_strat}")
+    return name
+
+
+def _get_implication_name(aggregation_strat):
+    implication = aggregation_strat.implication
+    if implication not in aggregation.IMPLICATIONS:
+        raise ValueError(f"Unsupported implication: {implication}")
+    return implication.__name__
+
+
+def _get_aggregation_strat(name, implication_name):
+    return getattr(aggregation, name)(getattr(aggregation, implication_name))
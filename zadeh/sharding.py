@@ -0,0 +1,143 @@
+"""Batched scoring with a single (large) rule base split into shards, each
+held and evaluated by its own worker process."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .aggregation import ChunkedAggregationStrategyABC, get_rule_chunks
+from .compiled_rule_base import CompiledRuleBase
+
+# set in each worker process by _init_worker()
+_worker_inference_engine = None
+_worker_ling_vars = None
+_worker_shard = None
+
+
+class ShardedScorer:
+    """Splits rule_base into up to num_shards contiguous shards of whole
+    rule chunks (see ChunkedAggregationStrategyABC) and starts one worker
+    process per shard, which is sent its compiled shard once and keeps it.
+
+    For score_batch(), every worker fuzzifies the inputs and computes the
+    matching degrees of its own rules only, then returns the partial
+    aggregation state of each of its rule chunks (partial maxes, sums, counts
+    of non-zero supports, matching degree sums, as the aggregation strat
+    needs). These are merged here in rule order, exactly as the serial
+    engine merges them, so scores are bit for bit those of
+    InferenceEngine.score_batch(). For aggregation strats that are not
+    chunked the workers return their matching degree columns instead, and
+    aggregation is done here.
+
+    num_shards defaults to the num CPUs; rule bases with fewer than
+    num_shards rule chunks get fewer shards. With one shard scoring is done
+    in this process, no workers are started. The inference engine (incl.
+    its strats) and ling vars must be picklable. Call close() (or use as a
+    context manager) to stop the workers."""
+    def __init__(self, inference_engine, ling_vars, rule_base,
+                 num_shards=None):
+        if isinstance(rule_base, CompiledRuleBase):
+            compiled_rule_base = rule_base
+        else:
+            compiled_rule_base = rule_base.compile(
+                ling_vars, inference_engine.class_labels)
+        num_shards = num_shards if num_shards is not None else os.cpu_count()
+        assert num_shards >= 1
+        self._inference_engine = inference_engine
+        self._ling_vars = tuple(ling_vars)
+        self._compiled_rule_base = compiled_rule_base
+        self._shard_bounds = _calc_shard_bounds(len(compiled_rule_base),
+                                                num_shards)
+        if len(self._shard_bounds) == 1:
+            self._executors = None
+        else:
+            self._executors = [
+                ProcessPoolExecutor(1,
+                                    initializer=_init_worker,
+                                    initargs=(inference_engine,
+                                              self._ling_vars,
+                                              compiled_rule_base.get_rule_slice(
+                                                  start, stop)))
+                for (start, stop) in self._shard_bounds
+            ]
+
+    @property
+    def num_shards(self):
+        return len(self._shard_bounds)
+
+    @property
+    def shard_bounds(self):
+        """(start, stop) rule idxs of each shard."""
+        return self._shard_bounds
+
+    def score_batch(self, input_mat):
+        """As InferenceEngine.score_batch()."""
+        input_mat = np.asarray(input_mat, dtype=float)
+        assert input_mat.ndim == 2
+        assert input_mat.shape[1] == len(self._ling_vars)
+        if self._executors is None:
+            return self._inference_engine.score_batch(
+                self._ling_vars, self._compiled_rule_base, input_mat)
+        futures = [
+            executor.submit(_calc_shard_result_in_worker, input_mat)
+            for executor in self._executors
+        ]
+        shard_results = [future.result() for future in futures]
+        if isinstance(self._inference_engine.aggregation_strat,
+                      ChunkedAggregationStrategyABC):
+            return self._inference_engine.merge_partial_states(
+                [
+                    partial_state for partial_states in shard_results
+                    for partial_state in partial_states
+                ], len(self._compiled_rule_base))
+        else:
+            return self._inference_engine.aggregate_batch(
+                np.concatenate(shard_results, axis=1),
+                self._compiled_rule_base.consequent_mat)
+
+    def classify_batch(self, input_mat):
+        """As InferenceEngine.classify_batch()."""
+        return self._inference_engine.classify_score_mat(
+            self.score_batch(input_mat))
+
+    def close(self):
+        if self._executors is not None:
+            for executor in self._executors:
+                executor.shutdown(wait=True)
+            self._executors = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _calc_shard_bounds(num_rules, num_shards):
+    """Splits rule chunks as evenly as possible over at most num_shards
+    shards, returns their (start, stop) rule idxs."""
+    rule_chunks = get_rule_chunks(num_rules)
+    num_shards = min(num_shards, len(rule_chunks))
+    return [(rule_chunks[chunk_idxs[0]].start,
+             min(rule_chunks[chunk_idxs[-1]].stop, num_rules))
+            for chunk_idxs in np.array_split(np.arange(len(rule_chunks)),
+                                             num_shards)]
+
+
+def _init_worker(inference_engine, ling_vars, shard):
+    global _worker_inference_engine, _worker_ling_vars, _worker_shard
+    _worker_inference_engine = inference_engine
+    _worker_ling_vars = ling_vars
+    _worker_shard = shard
+
+
+def _calc_shard_result_in_worker(input_mat):
+    membership_tensor = _worker_inference_engine.fuzzify_batch(
+        _worker_ling_vars, input_mat, _worker_shard.max_num_membership_funcs)
+    matching_degree_mat = _worker_inference_engine.compute_matching_degree_mat(
+        _worker_shard, membership_tensor)
+    aggregation_strat = _worker_inference_engine.aggregation_strat
+    if isinstance(aggregation_strat, ChunkedAggregationStrategyABC):
+        return aggregation_strat.calc_partial_states(
+            matching_degree_mat, _worker_shard.consequent_mat)
+    return matching_degree_mat
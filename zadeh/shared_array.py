@@ -0,0 +1,59 @@
+"""NumPy arrays in shared memory, so worker processes can read a dataset
+without it being pickled per task. Needs Python 3.8+
+(multiprocessing.shared_memory)."""
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# picklable description of a shared array, enough for another process to
+# attach to it
+SharedArraySpec = namedtuple("SharedArraySpec", ["name", "shape", "dtype"])
+
+
+class SharedArray:
+    """Owner of a shared memory copy of an array. Call close() (or use as a
+    context manager) to free the shared memory."""
+    def __init__(self, arr):
+        arr = np.ascontiguousarray(arr)
+        self._shm = shared_memory.SharedMemory(create=True,
+                                               size=max(1, arr.nbytes))
+        self._arr = np.ndarray(arr.shape, dtype=arr.dtype,
+                               buffer=self._shm.buf)
+        self._arr[...] = arr
+        self._spec = SharedArraySpec(self._shm.name, arr.shape, arr.dtype.str)
+
+    @property
+    def spec(self):
+        return self._spec
+
+    @property
+    def arr(self):
+        return self._arr
+
+    def close(self):
+        if self._shm is not None:
+            self._arr = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def attach_shared_array(spec):
+    """Attaches to shared array described by spec, returns (shm, arr); keep shm
+    referenced for as long as arr is used. The owning process stays
+    responsible for unlinking."""
+    try:
+        shm = shared_memory.SharedMemory(name=spec.name, track=False)
+    except TypeError:
+        # py < 3.13 always tracks; fine for pool workers as they share the
+        # owner's resource tracker
+        shm = shared_memory.SharedMemory(name=spec.name)
+    arr = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=shm.buf)
+    return (shm, arr)
@@ -0,0 +1,181 @@
+"""Chunked classification of datasets too big to hold in memory: inputs are
+read from CSV or (memory mapped) .npy files a chunk of rows at a time, run
+through batched inference and streamed out, so peak memory depends on chunk
+size only. Undefined mappings and invalid input rows (unparseable, non-finite
+or outside the ling var domains) are reported in-band rather than raising, and
+output row idxs always match input row idxs."""
+import csv
+from collections import namedtuple
+
+import numpy as np
+
+from .constants import SCORE_MIN
+
+DEFAULT_CHUNK_SIZE = 10000
+
+ClassifiedChunk = namedtuple(
+    "ClassifiedChunk",
+    ["start_row_idx", "labels", "score_mat", "invalid_mask"])
+ClassificationCounts = namedtuple("ClassificationCounts",
+                                  ["num_rows", "num_undefined", "num_invalid"])
+
+
+def iter_array_chunks(input_mat, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields consecutive row chunks of input_mat (which can be a memmap) as
+    float arrays."""
+    assert chunk_size > 0
+    for start in range(0, len(input_mat), chunk_size):
+        yield np.asarray(input_mat[start:start + chunk_size], dtype=float)
+
+
+def iter_npy_chunks(npy_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yields row chunks of 2-D array stored in .npy file, which is memory
+    mapped rather than loaded."""
+    input_mat = np.load(npy_path, mmap_mode="r")
+    if input_mat.ndim != 2:
+        raise ValueError(f"Expected 2-D array in {npy_path}, got "
+                         f"{input_mat.ndim}-D")
+    yield from iter_array_chunks(input_mat, chunk_size)
+
+
+def iter_csv_chunks(csv_path,
+                    chunk_size=DEFAULT_CHUNK_SIZE,
+                    delimiter=",",
+                    has_header=False,
+                    usecols=None,
+                    num_cols=None):
+    """Yields row chunks of numeric CSV file as float arrays, one array row per
+    file row (after the header). usecols selects (and orders) the feature
+    columns, default all. num_cols is the expected num of feature columns,
+    default len(usecols) if given, else as in the first non-blank row. Rows
+    that are blank, non-numeric or have another num of feature columns are
+    kept as all-NaN rows, so row idxs still match the file."""
+    assert chunk_size > 0
+    if num_cols is None and usecols is not None:
+        num_cols = len(usecols)
+    with open(csv_path, "r", newline="") as fp:
+        reader = csv.reader(fp, delimiter=delimiter)
+        if has_header:
+            next(reader, None)
+        rows = []
+        for row in reader:
+            if num_cols is None and len(row) > 0:
+                num_cols = len(row)
+            rows.append(_parse_csv_row(row, usecols))
+            # (only a blank start of file can leave num_cols unknown)
+            while len(rows) >= chunk_size and num_cols is not None:
+                yield _make_input_mat(rows[:chunk_size], num_cols)
+                rows = rows[chunk_size:]
+        if len(rows) > 0:
+            yield _make_input_mat(rows,
+                                  num_cols if num_cols is not None else 0)
+
+
+def _parse_csv_row(row, usecols):
+    """Returns feature vals of row as list of floats, or None if row is blank,
+    non-numeric or lacks a usecols column."""
+    try:
+        if usecols is not None:
+            row = [row[col_idx] for col_idx in usecols]
+        vals = [float(val) for val in row]
+    except (IndexError, ValueError):
+        return None
+    return vals if len(vals) > 0 else None
+
+
+def _make_input_mat(rows, num_cols):
+    input_mat = np.full((len(rows), num_cols), np.nan)
+    for (row_idx, vals) in enumerate(rows):
+        if vals is not None and len(vals) == num_cols:
+            input_mat[row_idx] = vals
+    return input_mat
+
+
+def classify_chunks(system, input_chunks):
+    """Generator of ClassifiedChunks, one per input chunk: labels is a masked
+    array as returned by classify_batch() (masked = undefined mapping or
+    invalid row), score_mat as returned by score_batch() but with NaN rows for
+    invalid rows, and invalid_mask flags rows that are non-finite or outside
+    the domains of the system's ling vars. Only valid rows are scored."""
+    input_domains = [ling_var.input_domain for ling_var in system.ling_vars]
+    input_mins = np.array([domain.min for domain in input_domains])
+    input_maxs = np.array([domain.max for domain in input_domains])
+    inference_engine = system.inference_engine
+    num_classes = len(inference_engine.class_labels)
+    start_row_idx = 0
+    for input_mat in input_chunks:
+        if input_mat.shape[1] != len(input_domains):
+            raise ValueError(f"Expected {len(input_domains)} feature columns, "
+                             f"got {input_mat.shape[1]}")
+        # NaN compares False, so is invalid too
+        is_valid = np.all(
+            (input_mins <= input_mat) & (input_mat <= input_maxs), axis=1)
+        score_mat = np.full((len(input_mat), num_classes), np.nan)
+        if np.any(is_valid):
+            score_mat[is_valid] = system.score_batch(input_mat[is_valid])
+        labels = inference_engine.classify_score_mat(
+            np.where(is_valid[:, np.newaxis], score_mat, SCORE_MIN))
+        yield ClassifiedChunk(start_row_idx, labels, score_mat, ~is_valid)
+        start_row_idx += len(input_mat)
+
+
+def write_classified_chunks_csv(classified_chunks,
+                                out_path,
+                                class_labels,
+                                write_scores=True):
+    """Writes one CSV row per input row: row idx, label (empty if undefined or
+    invalid), undefined flag (0/1), invalid flag (0/1) and optionally one
+    score column per class (empty if invalid). Returns ClassificationCounts,
+    where invalid rows do not count as undefined."""
+    num_rows = 0
+    num_undefined = 0
+    num_invalid = 0
+    with open(out_path, "w", newline="") as fp:
+        writer = csv.writer(fp)
+        header = ["row", "label", "undefined", "invalid"]
+        if write_scores:
+            header += [f"score_{class_label}" for class_label in class_labels]
+        writer.writerow(header)
+        for classified_chunk in classified_chunks:
+            invalid_mask = classified_chunk.invalid_mask
+            undefined_mask = np.ma.getmaskarray(classified_chunk.labels) & \
+                ~invalid_mask
+            for (offset, (label, is_undefined, is_invalid)) in enumerate(
+                    zip(classified_chunk.labels.data.tolist(),
+                        undefined_mask.tolist(), invalid_mask.tolist())):
+                row = [
+                    classified_chunk.start_row_idx + offset,
+                    "" if is_undefined or is_invalid else label,
+                    int(is_undefined),
+                    int(is_invalid)
+                ]
+                if write_scores:
+                    row += [""] * len(class_labels) if is_invalid else \
+                        classified_chunk.score_mat[offset].tolist()
+                writer.writerow(row)
+            num_rows += len(undefined_mask)
+            num_undefined += int(np.sum(undefined_mask))
+            num_invalid += int(np.sum(invalid_mask))
+    return ClassificationCounts(num_rows, num_undefined, num_invalid)
+
+
+def classify_csv(system,
+                 in_path,
+                 out_path,
+                 chunk_size=DEFAULT_CHUNK_SIZE,
+                 **csv_kwargs):
+    """Classifies every row of CSV file in_path, writing results to CSV file
+    out_path (see write_classified_chunks_csv()). csv_kwargs are passed on to
+    iter_csv_chunks(), num_cols defaults to the num of ling vars."""
+    csv_kwargs.setdefault("num_cols", len(system.ling_vars))
+    return write_classified_chunks_csv(
+        classify_chunks(system,
+                        iter_csv_chunks(in_path, chunk_size, **csv_kwargs)),
+        out_path, system.inference_engine.class_labels)
+
+
+def classify_npy(system, in_path, out_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """As classify_csv(), but reading from memory mapped .npy file."""
+    return write_classified_chunks_csv(
+        classify_chunks(system, iter_npy_chunks(in_path, chunk_size)),
+        out_path, system.inference_engine.class_labels)
@@ -1,8 +1,20 @@
+# micro_batching and sharding pull in asyncio / multiprocessing, and
+# decision_regions and evaluation NumPy, so all are only imported when first
+# used: importing this module and scalar inference stay cheap and NumPy free
+
+
 class FuzzyRuleBasedSystem:
     def __init__(self, inference_engine, ling_vars, rule_base):
         self._inference_engine = inference_engine
         self._ling_vars = ling_vars
         self._rule_base = rule_base
+        self._micro_batcher = None
+
+    def __getstate__(self):
+        # micro batcher owns a thread/process pool, cannot be pickled
+        state = self.__dict__.copy()
+        state["_micro_batcher"] = None
+        return state
 
     @property
     def inference_engine(self):
@@ -16,6 +28,21 @@ class FuzzyRuleBasedSystem:
     def rule_base(self):
         return self._rule_base
 
+    @property
+    def stats(self):
+        return self._inference_engine.stats
+
+    def set_mode(self, mode):
+        """See InferenceEngine.set_mode()."""
+        self._inference_engine.set_mode(mode)
+
+    def enable_instrumentation(self, stats=None):
+        """See InferenceEngine.enable_instrumentation()."""
+        return self._inference_engine.enable_instrumentation(stats)
+
+    def disable_instrumentation(self):
+        self._inference_engine.disable_instrumentation()
+
     def score(self, input_vec):
         return self._inference_engine.score(self._ling_vars, self._rule_base,
                                             input_vec)
@@ -24,5 +51,79 @@ class FuzzyRuleBasedSystem:
         return self._inference_engine.classify(self._ling_vars,
                                                self._rule_base, input_vec)
 
+    def score_top_k(self, input_vec, k):
+        return self._inference_engine.score_top_k(self._ling_vars,
+                                                  self._rule_base, input_vec,
+                                                  k)
+
+    def score_batch(self, input_mat):
+        return self._inference_engine.score_batch(self._ling_vars,
+                                                  self._rule_base, input_mat)
+
+    def classify_batch(self, input_mat):
+        return self._inference_engine.classify_batch(self._ling_vars,
+                                                     self._rule_base,
+                                                     input_mat)
+
+    def enable_micro_batching(self, **micro_batcher_kwargs):
+        """Sets up the MicroBatcher used by ascore() / aclassify(), with
+        given kwargs (see MicroBatcher); closes any previous one. Returns
+        it."""
+        from .micro_batching import MicroBatcher
+        self.disable_micro_batching()
+        self._micro_batcher = MicroBatcher(self, **micro_batcher_kwargs)
+        return self._micro_batcher
+
+    def disable_micro_batching(self):
+        if self._micro_batcher is not None:
+            self._micro_batcher.close()
+            self._micro_batcher = None
+
+    async def adisable_micro_batching(self):
+        """As disable_micro_batching(), for use from asyncio code; does not
+        block the event loop (see MicroBatcher.aclose())."""
+        if self._micro_batcher is not None:
+            micro_batcher = self._micro_batcher
+            self._micro_batcher = None
+            await micro_batcher.aclose()
+
+    async def ascore(self, input_vec):
+        """Micro-batched score(), for use from asyncio code. Uses a default
+        MicroBatcher if enable_micro_batching() was not called."""
+        return await self._get_micro_batcher().score(input_vec)
+
+    async def aclassify(self, input_vec):
+        """Micro-batched classify(), see ascore()."""
+        return await self._get_micro_batcher().classify(input_vec)
+
+    def _get_micro_batcher(self):
+        if self._micro_batcher is None:
+            from .micro_batching import MicroBatcher
+            self._micro_batcher = MicroBatcher(self)
+        return self._micro_batcher
+
+    def build_decision_region_index(self, max_cell_cache_bytes=2**26):
+        """Returns DecisionRegionIndex for this system, for exact fast
+        inference when all membership funcs are piecewise linear and
+        aggregation is MaximumAggregation."""
+        from .decision_regions import DecisionRegionIndex
+        return DecisionRegionIndex(self._inference_engine, self._ling_vars,
+                                   self._rule_base, max_cell_cache_bytes)
+
+    def build_sharded_scorer(self, num_shards=None):
+        """Returns ShardedScorer for this system, which splits the rule base
+        over num_shards worker processes for score_batch() /
+        classify_batch(). Close it when done."""
+        from .sharding import ShardedScorer
+        return ShardedScorer(self._inference_engine, self._ling_vars,
+                             self._rule_base, num_shards)
+
+    def evaluate(self, input_mat, labels):
+        """Returns EvaluationReport (accuracy, undefined rate, confusion
+        matrix, margin stats, complexity) on given labelled data, computed in
+        one batched pass; see Evaluator for repeated evaluation."""
+        from .evaluation import evaluate
+        return evaluate(self, input_mat, labels)
+
     def calc_complexity(self):
         return self._rule_base.calc_num_spec_fuzzy_decision_regions()
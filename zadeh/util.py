@@ -1,4 +1,26 @@
+import importlib
+
+
 def trunc_val(val, min_val, max_val):
     val = min(val, max_val)
     val = max(val, min_val)
     return val
+
+
+class LazyModule:
+    """Stands in for the module with given name, which is only imported on
+    first attr access; its attrs are then copied over, so later lookups cost
+    the same as on the module itself."""
+    def __init__(self, name):
+        self.__name = name
+
+    def __getattr__(self, attr):
+        # only called for attrs not copied over (yet)
+        module = importlib.import_module(self.__name)
+        self.__dict__.update(vars(module))
+        return getattr(module, attr)
+
+
+# modules on the scalar inference path use this in place of numpy, so that
+# scalar inference (plain Python) runs without importing NumPy at all
+lazy_numpy = LazyModule("numpy")